@@ -1,7 +1,18 @@
 
+import numpy as np
 import pandas as pd
 import sqlite3
 
+from compact_ledger import CompactLedger, from_minor_units
+from report_cache import cached_report
+from balance_index import NAT, BalanceIndex
+from validation import validate_entries, line_flags
+from rollup_cube import CUBE_COLUMNS, PeriodCube
+from duplicates import find_duplicates
+from open_items import DEFAULT_BUCKETS, OPEN_ITEM_COLUMNS, open_items, age_open_items
+from reconciliation import RECONCILIATION_COLUMNS, statement_from_ledger, reconcile
+from fx import BASE_CURRENCY, convert_currency
+
 
 def load_data_from_db():
     """Fetch all journal entries from SQLite and return as DataFrame."""
@@ -30,15 +41,51 @@ def load_data_from_db():
     
     return df
 
+# Label columns filter() narrows on, in _normalize_filters order
+FILTER_COLUMNS = ("Account", "Customer_Vendor", "Transaction_Type", "Payment_Method")
+
+
 class AccountingAnalytics:
     """Core analytics for accounting data.
 
     Expected columns (case-sensitive):
     Date, Account, Description, Debit, Credit, Category, Transaction_Type, Customer_Vendor, Payment_Method, Reference
 
+    ``data_version`` identifies the ledger contents (see ``db_io.get_data_version``);
+    when given, report results are memoized per version and filter set.
+
+    With ``reporting_currency`` and ``fx_rates`` (see ``db_io.fetch_fx_rates``),
+    lines are converted once here (see ``fx.convert_currency``); lines
+    without a Currency are in ``base_currency``. Every report and filtered
+    view reuses the converted amounts.
+
+    Rows are held only as a ``CompactLedger``; ``df`` rebuilds a DataFrame on
+    first access, and reports that need frames build just the columns they read.
     """
     
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, data_version=None, filters=(), fx_rates=None, reporting_currency=None,
+                 base_currency=BASE_CURRENCY):
+        self.data_version = data_version
+        self.filters = tuple(filters)
+        self.currency_key = None
+        self._fx = (fx_rates, reporting_currency, base_currency)
+        df = self._prepare(df, *self._fx)
+        if reporting_currency:
+            rates_hash = 0 if fx_rates is None or fx_rates.empty else \
+                int(pd.util.hash_pandas_object(fx_rates, index=False).sum())
+            self.currency_key = (str(reporting_currency).upper(), str(base_currency).upper(), rates_hash)
+
+        # The integer-coded ledger is the only copy kept; frames are rebuilt on demand
+        self._compact = CompactLedger.from_frame(df)
+        self._df = None
+        self._cube = None
+        self._root = None  # unfiltered ledger a filtered view was derived from
+        # Date-sorted layout + per-account prefix sums for O(log n) period queries
+        self._index = BalanceIndex.from_ledger(self._compact)
+
+    @staticmethod
+    def _prepare(df, fx_rates=None, reporting_currency=None, base_currency=BASE_CURRENCY):
+        """Parsed copy of raw rows: datetime Date, float Debit/Credit, converted currency."""
         df = df.copy()
         # Normalize/parse
         if "Date" in df.columns:
@@ -47,44 +94,205 @@ class AccountingAnalytics:
         # More robust numeric conversion
         for col in ["Debit", "Credit"]:
             if col in df.columns:
-                # First convert to string, then clean, then to numeric
-                df[col] = df[col].astype(str).str.replace(r'[^\d.-]', '', regex=True)
+                if not pd.api.types.is_numeric_dtype(df[col]):
+                    # First convert to string, then clean, then to numeric
+                    df[col] = df[col].astype(str).str.replace(r'[^\d.-]', '', regex=True)
                 df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0.0)
-        
-        self.df = df
+
+        if reporting_currency:
+            df = convert_currency(df, fx_rates, reporting_currency, default_currency=base_currency)
+        return df
+
+    @classmethod
+    def from_compact(cls, ledger: CompactLedger, data_version=None):
+        """Build analytics directly on an integer-coded ledger (no DataFrame round trip)."""
+        obj = cls.__new__(cls)
+        obj.data_version = data_version
+        obj.filters = ()
+        obj.currency_key = None
+        obj._fx = (None, None, BASE_CURRENCY)
+        obj._compact = ledger
+        obj._df = None
+        obj._cube = None
+        obj._root = None
+        obj._index = BalanceIndex.from_ledger(ledger)
+        return obj
+
+    @property
+    def compact(self) -> CompactLedger:
+        """Integer-coded ledger backing every report."""
+        return self._compact
+
+    @property
+    def df(self) -> pd.DataFrame:
+        """The ledger as a DataFrame, built on first access and kept (for display/export)."""
+        if self._df is None:
+            self._df = self._compact.to_frame()
+        return self._df
+
+    def _frame(self, columns=None) -> pd.DataFrame:
+        """Frame of ``columns`` for a report; not kept unless ``df`` was already built."""
+        if self._df is not None:
+            return self._df if columns is None else self._df[[c for c in columns if c in self._df.columns]]
+        return self._compact.to_frame(columns)
+
+    def total(self, amount):
+        """Exact total of ``amount`` ("Debit" or "Credit") over this view."""
+        return self._amount(amount)
+
+    def _amount(self, amount, column=None, labels=None):
+        """Exact total of ``amount`` (optionally where ``column`` in ``labels``) as float."""
+        led = self.compact
+        if amount not in led.amounts:
+            return 0.0
+        mask = led.mask(column, labels) if column is not None else None
+        return float(from_minor_units(led.total(amount, mask), led.scale))
+
+    @property
+    def index(self) -> BalanceIndex:
+        """Date-sorted index with per-account cumulative Debit/Credit."""
+        if self._index is None:
+            self._index = BalanceIndex.from_ledger(self._compact)
+        return self._index
+
+    def cube(self, freq="M") -> PeriodCube:
+        """Period rollup cube; monthly cells are built once, coarser periods roll up from them."""
+        if self._cube is None:
+            self._cube = PeriodCube.from_frame(self._frame(CUBE_COLUMNS), "M")
+        return self._cube.rollup(freq)
+
+    @property
+    def cache_key(self):
+        """Normalized description of how this view was derived from the ledger."""
+        return self.filters if self.currency_key is None else (self.currency_key,) + self.filters
 
     # ---------- Helpers ----------
+    @staticmethod
+    def _normalize_filters(start_date, end_date, accounts, customers, txn_types, payment_methods):
+        def _date(v):
+            return None if v is None else pd.to_datetime(v).isoformat()
+
+        def _values(v):
+            return tuple(sorted(set(map(str, v)))) if v else None
+
+        return (_date(start_date), _date(end_date), _values(accounts), _values(customers),
+                _values(txn_types), _values(payment_methods))
+
     def filter(self, start_date=None, end_date=None, accounts=None, customers=None, txn_types=None, payment_methods=None):
-        d = self.df.copy()
-        if start_date is not None:
-            d = d[d["Date"] >= pd.to_datetime(start_date)]
-        if end_date is not None:
-            d = d[d["Date"] <= pd.to_datetime(end_date)]
-        if accounts:
-            d = d[d["Account"].isin(accounts)]
-        if customers:
-            d = d[d["Customer_Vendor"].isin(customers)]
-        if txn_types:
-            d = d[d["Transaction_Type"].isin(txn_types)]
-        if payment_methods:
-            d = d[d["Payment_Method"].isin(payment_methods)]
-        return AccountingAnalytics(d)
+        key = self._normalize_filters(start_date, end_date, accounts, customers, txn_types, payment_methods)
+        led = self._compact
+        keep = np.ones(len(led), dtype=bool)
+        if start_date is not None or end_date is not None:
+            keep = np.zeros(len(led), dtype=bool)
+            keep[self.index.date_range_positions(start_date, end_date)] = True
+        for column, labels in zip(FILTER_COLUMNS, (accounts, customers, txn_types, payment_methods)):
+            if labels:
+                keep &= led.mask(column, labels)
+        return self._derive(led.take(np.flatnonzero(keep)), key)
+
+    def _opening(self):
+        """``(assets, liabilities)`` in minor units carried forward from before this view's start date.
+
+        Zero for unfiltered ledgers; for filtered views, the root ledger's lines
+        dated before the latest start date that pass every other filter.
+        """
+        starts = [pd.Timestamp(key[0]) for key in self.filters if key[0] is not None]
+        led = self._root._compact if self._root is not None else None
+        times = led.times() if led is not None else None
+        if not starts or times is None or "Category" not in led.codes:
+            return 0, 0
+        keep = (times != NAT) & (times < max(starts).as_unit("ns").value)
+        for key in self.filters:
+            if key[1] is not None:
+                keep &= times <= pd.Timestamp(key[1]).as_unit("ns").value
+            for column, labels in zip(FILTER_COLUMNS, key[2:]):
+                if labels:
+                    keep &= led.mask(column, labels)
+        net = lambda category: led.total("Debit", keep & led.mask("Category", [category])) - \
+            led.total("Credit", keep & led.mask("Category", [category]))
+        return net("Asset"), -net("Liability")
+
+    def _derive(self, ledger, key):
+        """Child view over a row subset of the compact ledger (shares its dictionaries; no re-parsing)."""
+        child = AccountingAnalytics.__new__(AccountingAnalytics)
+        child.data_version = self.data_version
+        child.filters = self.filters + (key,)
+        child.currency_key = self.currency_key
+        child._fx = self._fx
+        child._compact = ledger
+        child._df = None
+        child._index = None
+        child._cube = None
+        child._root = self._root if self._root is not None else self
+        return child
+
+    def extend(self, new_rows: pd.DataFrame, data_version=None):
+        """Analytics over the ledger plus appended ``new_rows``, parsing/converting only the new rows.
+
+        The compact ledger, balance index and a built period cube are all
+        updated from the new rows alone.
+        """
+        added = self._prepare(new_rows, *self._fx)
+        obj = AccountingAnalytics.__new__(AccountingAnalytics)
+        obj.data_version = data_version
+        obj.filters = self.filters
+        obj.currency_key = self.currency_key
+        obj._fx = self._fx
+        obj._compact = self._compact.append(added)
+        obj._df = None
+        obj._root = None
+        obj._cube = PeriodCube(self._cube.freq, self._cube.cells).update(added) if self._cube is not None else None
+        obj._index = self.index.extend(obj._compact)
+        return obj
 
     # ---------- 1. Trial Balance ----------
+    @cached_report()
     def trial_balance(self):
-        if self.df.empty: 
+        if len(self._compact) == 0:
             return pd.DataFrame(columns=["Account", "Debit", "Credit", "Balance"])
-        tb = self.df.groupby("Account")[["Debit", "Credit"]].sum().reset_index()
-        tb["Balance"] = tb["Debit"] - tb["Credit"]
+        led = self.compact
+        sums = led.sum_by("Account")
+        tb = pd.DataFrame({
+            "Account": sums.index.to_numpy(dtype=object),
+            "Debit": from_minor_units(sums["Debit"].to_numpy(), led.scale),
+            "Credit": from_minor_units(sums["Credit"].to_numpy(), led.scale),
+            "Balance": from_minor_units((sums["Debit"] - sums["Credit"]).to_numpy(), led.scale),
+        })
         tb = tb.sort_values("Account").reset_index(drop=True)
         return tb
     
 
 
+    # ---------- 1b. Period Balances ----------
+    def account_balance(self, account, start_date=None, end_date=None):
+        """Debit/Credit movement and balance of one account between two dates (inclusive)."""
+        debit, credit = self.index.account_balance(account, start_date, end_date)
+        scale = self.compact.scale
+        return {
+            "Account": account,
+            "Debit": float(from_minor_units(debit, scale)),
+            "Credit": float(from_minor_units(credit, scale)),
+            "Balance": float(from_minor_units(debit - credit, scale)),
+        }
+
+    @cached_report()
+    def trial_balance_as_of(self, as_of, start_date=None):
+        """Trial balance of entries dated up to ``as_of`` (and from ``start_date``, if given)."""
+        sums = self.index.balances(start_date, as_of)
+        scale = self.compact.scale
+        tb = pd.DataFrame({
+            "Account": sums.index.to_numpy(dtype=object),
+            "Debit": from_minor_units(sums["Debit"].to_numpy(), scale),
+            "Credit": from_minor_units(sums["Credit"].to_numpy(), scale),
+            "Balance": from_minor_units((sums["Debit"] - sums["Credit"]).to_numpy(), scale),
+        })
+        return tb.sort_values("Account").reset_index(drop=True)
+
     # ---------- 2. Income Statement ----------
+    @cached_report()
     def income_statement(self):
-        revenue = self.df[self.df["Category"] == "Revenue"]["Credit"].sum()
-        expenses = self.df[self.df["Category"] == "Expense"]["Debit"].sum()
+        revenue = self._amount("Credit", "Category", ["Revenue"])
+        expenses = self._amount("Debit", "Category", ["Expense"])
         net_profit = revenue - expenses
         return pd.DataFrame({
             "Category": ["Revenue", "Expenses", "Net Profit"],
@@ -92,12 +300,10 @@ class AccountingAnalytics:
         })
 
     # ---------- 3. Balance Sheet ----------
+    @cached_report()
     def balance_sheet(self):
-        assets = self.df[self.df["Category"] == "Asset"]
-        liabilities = self.df[self.df["Category"] == "Liability"]
-
-        total_assets = assets["Debit"].sum() - assets["Credit"].sum()
-        total_liabilities = liabilities["Credit"].sum() - liabilities["Debit"].sum()
+        total_assets = self._amount("Debit", "Category", ["Asset"]) - self._amount("Credit", "Category", ["Asset"])
+        total_liabilities = self._amount("Credit", "Category", ["Liability"]) - self._amount("Debit", "Category", ["Liability"])
         equity = total_assets - total_liabilities
 
         return pd.DataFrame({
@@ -106,11 +312,11 @@ class AccountingAnalytics:
         })
 
     # ---------- 4. Cash Flow (simplified, cash-based) ----------
+    @cached_report()
     def cash_flow(self):
         # Treat Payment_Method == 'Cash' as affecting cash
-        cash_txn = self.df[self.df["Payment_Method"] == "Cash"]
-        inflows = cash_txn["Debit"].sum()   # cash increases on debits
-        outflows = cash_txn["Credit"].sum() # cash decreases on credits
+        inflows = self._amount("Debit", "Payment_Method", ["Cash"])   # cash increases on debits
+        outflows = self._amount("Credit", "Payment_Method", ["Cash"]) # cash decreases on credits
         net_cash = inflows - outflows
         return pd.DataFrame({
             "Category": ["Cash Inflows", "Cash Outflows", "Net Cash Flow"],
@@ -118,18 +324,17 @@ class AccountingAnalytics:
         })
 
     # ---------- 5. Aging Report ----------
-    def aging_report(self, account_name="Accounts Receivable"):
-        d = self.df[self.df["Account"] == account_name].copy()
-        if d.empty:
+    @cached_report(daily=True)
+    def open_items(self, account_name="Accounts Receivable", as_of=None):
+        """Open documents on an AR/AP account after matching settlements (see ``open_items``)."""
+        return open_items(self._frame(OPEN_ITEM_COLUMNS), account_name, as_of=as_of)
+
+    @cached_report(daily=True)
+    def aging_report(self, account_name="Accounts Receivable", as_of=None, buckets=DEFAULT_BUCKETS):
+        items = self.open_items(account_name, as_of=as_of)
+        if items.empty:
             return pd.DataFrame(columns=["Aging_Bucket", "Amount"])
-        today = pd.Timestamp.today().normalize()
-        d["Days_Outstanding"] = (today - d["Date"]).dt.days
-        bins = [0, 30, 60, 90, 120, 10_000]
-        labels = ["0-30", "31-60", "61-90", "91-120", "120+"]
-        d["Aging_Bucket"] = pd.cut(d["Days_Outstanding"], bins=bins, labels=labels, right=True, include_lowest=True)
-        # For AR typically the outstanding 'amount' would be the open balance; here we approximate with Debit
-        out = d.groupby("Aging_Bucket")["Debit"].sum().reset_index()
-        return out
+        return age_open_items(items, as_of=as_of, buckets=tuple(buckets))
 
     # ---------- 6. Transaction Drill-down ----------
     def drill_down(self, account=None, customer=None, txn_type=None, date_from=None, date_to=None):
@@ -139,19 +344,58 @@ class AccountingAnalytics:
                            txn_types=[txn_type] if txn_type else None).df
 
     # ---------- 7. Error Checks ----------
+    @cached_report()
     def error_checks(self):
         result = {}
         # Trial balance check
-        deb_sum = float(self.df["Debit"].sum())
-        cred_sum = float(self.df["Credit"].sum())
-        result["trial_balance_status"] = "✅ Balanced" if abs(deb_sum - cred_sum) < 1e-6 else "❌ Not Balanced"
+        led = self.compact
+        deb_cents = led.total("Debit") if "Debit" in led.amounts else 0
+        cred_cents = led.total("Credit") if "Credit" in led.amounts else 0
+        deb_sum = float(from_minor_units(deb_cents, led.scale))
+        cred_sum = float(from_minor_units(cred_cents, led.scale))
+        result["trial_balance_status"] = "✅ Balanced" if deb_cents == cred_cents else "❌ Not Balanced"
         result["total_debits"] = deb_sum
         result["total_credits"] = cred_sum
-        # Per-row balance flag
-        tmp = self.df.copy()
-        tmp["Balanced_Row"] = (tmp["Debit"].round(2) == tmp["Credit"].round(2))
-        result["unbalanced_entries"] = tmp[~tmp["Balanced_Row"]].drop(columns=["Balanced_Row"])
-        # Simple anomalies
-        anomalies = self.df[(self.df["Debit"] < 0) | (self.df["Credit"] < 0) | (self.df["Category"].isna())]
+        # Per-JE_ID validation (same rules as the ingest path)
+        df = self._frame()
+        exceptions = validate_entries(df)
+        result["exceptions"] = exceptions
+        unbalanced = exceptions.loc[exceptions["Rule"] == "Unbalanced", "JE_ID"]
+        if "JE_ID" in df.columns:
+            result["unbalanced_entries"] = df[df["JE_ID"].isin(unbalanced)]
+        else:
+            result["unbalanced_entries"] = df.iloc[0:0]
+        # Line-level anomalies
+        invalid_category, negative = line_flags(df)
+        anomalies = df[invalid_category | negative]
         result["anomalies"] = anomalies
         return result
+
+    @cached_report()
+    def duplicate_entries(self, date_window=7):
+        """Scored duplicate / near-duplicate journal entries (see ``duplicates.find_duplicates``)."""
+        return find_duplicates(self._frame(), date_window=date_window)
+
+    # ---------- 8. Period Trends ----------
+    @cached_report()
+    def income_statement_trend(self, freq="M"):
+        return self.cube(freq).income_statement_trend()
+
+    @cached_report()
+    def balance_sheet_trend(self, freq="M"):
+        return self.cube(freq).balance_sheet_trend(opening=self._opening())
+
+    @cached_report()
+    def cash_flow_trend(self, freq="M"):
+        return self.cube(freq).cash_flow_trend()
+
+    # ---------- 9. Bank Reconciliation ----------
+    @cached_report()
+    def bank_reconciliation(self, account="Cash", statement=None, date_window=3):
+        """Match bank statement lines to book lines on ``account`` (see ``reconciliation.reconcile``).
+
+        Without ``statement`` the "Bank Statement" lines already in the ledger
+        are used; a DataFrame with Date and signed Amount can be passed instead.
+        """
+        extracted, book = statement_from_ledger(self._frame(RECONCILIATION_COLUMNS), account)
+        return reconcile(extracted if statement is None else statement, book, date_window=date_window)
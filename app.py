@@ -3,66 +3,86 @@ import pandas as pd
 import io
 import os 
 
-from db_io import insert_entries, fetch_entries, init_db
+from db_io import insert_entries, fetch_entries, init_db, fetch_exceptions, insert_fx_rates
 from file_processor import process_uploaded_file
-from accounting_analytics import load_data_from_db, AccountingAnalytics
-from ocr import OCRExtractor
-import tempfile
-import openai
-from openai import OpenAIError, RateLimitError
-from openai import OpenAI
-
-import io
-import sys
-
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
+from dashboard_data import change_token, table_summary, filter_options, load_analytics, paginated_table
+from report_service import ledger_documents
+from fx import BASE_CURRENCY
+from ingest_jobs import ACTIVE_STATES, submit_ocr_job, list_jobs, job_result
+import metrics
 
 
-api_key = os.getenv("OPENAI_API_KEY")
+def openai_api_key():
+    """OPENAI_API_KEY, loading .env on first use (only the OCR path needs it)."""
+    if "OPENAI_API_KEY" not in os.environ:
+        from dotenv import load_dotenv
+        load_dotenv()
+    return os.getenv("OPENAI_API_KEY")
 
 
-
-# Ensure DB schema exists
+# Ensure DB schema exists (no-op after the first run in this process)
 init_db()
-
-# Lazy import OCR (so Streamlit doesn’t fail if Tesseract not installed yet)
-
-
-def run_ocr(uploaded_doc):
-
-    # Initialize OCR extractor
-    extractor = OCRExtractor(api_key=api_key)
-
-    # Save uploaded PDF temporarily
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as tmp:
-        tmp.write(uploaded_doc.read())
-        tmp_path = tmp.name
-
-    # Extract all entries
-    entries = extractor.extract_all_entries(tmp_path)
-
-    # Create DataFrame
-    df = pd.DataFrame(entries)
-
-    # ---------------- Robust Cleaning ----------------
-    for col in ['Debit', 'Credit']:
-        if col in df.columns:
-            # Convert all values to string first, strip whitespace
-            df[col] = df[col].astype(str).str.strip()
-            
-            # Remove any commas, currency symbols, or stray characters
-            df[col] = df[col].str.replace(r'[^0-9.\-]', '', regex=True)
-            
-            # Convert to numeric, invalid parsing becomes NaN
-            df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # Fill NaN with 0
-            df[col] = df[col].fillna(0)
-    return df
-
+# Stage events (ingest, refresh, FX) as JSON lines on stderr; reruns keep the handler
+if not metrics.logger.handlers:
+    metrics.configure_logging()
+# Untagged lines are in the base currency, which is also the default report currency
+st.session_state.setdefault("reporting_currency", BASE_CURRENCY)
+
+def current_analytics():
+    """The cached ledger behind the reports."""
+    return load_analytics(table_name="journal_entries", reporting_currency=st.session_state["reporting_currency"],
+                          base_currency=BASE_CURRENCY)
+
+def show_duplicates(dupes):
+    if not dupes.empty:
+        st.warning(f"⚠️ {len(dupes)} entries look like duplicates of existing ones")
+        st.dataframe(dupes, use_container_width=True)
+
+
+
+@st.fragment(run_every="2s")
+def ingest_job_panel():
+    """Background OCR jobs with per-page progress; refreshes itself while jobs run."""
+    jobs = list_jobs()
+    if jobs.empty:
+        return
+    # A job finished since the last poll: rerun the whole app so reports pick up its entries
+    active = set(jobs.loc[jobs["Status"].isin(ACTIVE_STATES), "Job_ID"])
+    finished = st.session_state.get("active_jobs", set()) - active
+    st.session_state["active_jobs"] = active
+    if finished:
+        st.rerun()
+    st.subheader("⏳ Ingest Jobs")
+    for job in jobs.itertuples(index=False):
+        label = f"{job.File_Name} · {job.Status}"
+        if job.Status in ACTIVE_STATES:
+            st.progress(job.Pages_Done / job.Pages_Total if job.Pages_Total else 0.0,
+                        text=f"{label} · page {job.Pages_Done}/{job.Pages_Total or '?'}")
+            continue
+        with st.expander(label):
+            if job.Status == "failed":
+                st.error(job.Error)
+                continue
+            if job.Duplicates:
+                st.warning(f"⚠️ {job.Duplicates} entries look like duplicates of existing ones")
+            if job.Status == "rejected":
+                st.error("❌ Batch rejected: journal entries failed validation")
+                st.dataframe(fetch_exceptions(batch_id=job.Batch_ID)[["JE_ID", "Rule", "Detail"]])
+            else:
+                st.success(f"✅ {job.Entries} OCR entries added to DB")
+            df = job_result(job.Job_ID)
+            st.dataframe(df, use_container_width=True)
+            # Excel download fallback
+            buffer = io.BytesIO()
+            df.to_excel(buffer, index=False, engine="openpyxl")
+            buffer.seek(0)
+            st.download_button(
+                "⬇️ Download Extracted Excel",
+                buffer,
+                file_name=f"ocr_extract_{job.Job_ID}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                key=f"download_{job.Job_ID}"
+            )
 
 
 # App title
@@ -87,7 +107,20 @@ with st.sidebar:
                 if 'Date' in df.columns:
                     df['Date'] = df['Date'].astype(str)
                 
-                if insert_entries(df.to_dict(orient="records")):
+                batch_id = f"B-{uploaded_file.file_id}"
+                # The file stays in the uploader across reruns: check and insert it once,
+                # before the insert so it is not reported as a duplicate of itself
+                uploads = st.session_state.setdefault("ingested_uploads", {})
+                if uploaded_file.file_id not in uploads:
+                    dupes = ledger_documents(table_name="journal_entries").find_duplicates(df)
+                    uploads[uploaded_file.file_id] = (dupes, insert_entries(df.to_dict(orient="records"),
+                                                                            batch_id=batch_id))
+                dupes, inserted = uploads[uploaded_file.file_id]
+                show_duplicates(dupes)
+                if not inserted:
+                    st.error("❌ Batch rejected: journal entries failed validation")
+                    st.dataframe(fetch_exceptions(batch_id=batch_id)[["JE_ID", "Rule", "Detail"]])
+                else:
                     st.success("✅ Excel data successfully added to DB!")
                     # Excel download fallback
                     buffer = io.BytesIO()
@@ -103,28 +136,33 @@ with st.sidebar:
     elif upload_choice == "Raw Document (OCR)":
         uploaded_doc = st.file_uploader("Upload PDF or Image", type=["pdf", "png", "jpg", "jpeg"])
         if uploaded_doc:
-            with st.spinner("🔍 Extracting data with OCR..."):
-                df = run_ocr(uploaded_doc)
-                if df is not None:
-                    if insert_entries(df.to_dict(orient="records")):
-                        st.success("✅ OCR data successfully added to DB!")
-                        # Excel download fallback
-                        buffer = io.BytesIO()
-                        df.to_excel(buffer, index=False, engine="openpyxl")
-                        buffer.seek(0)
-                        st.download_button(
-                            "⬇️ Download Extracted Excel",
-                            buffer,
-                            file_name="ocr_extract.xlsx",
-                            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-                        )
+            # Runs in the background; resubmitting on rerun returns the same job
+            job_id = submit_ocr_job(uploaded_doc.getvalue(), uploaded_doc.name,
+                                    batch_id=f"B-{uploaded_doc.file_id}", api_key=openai_api_key())
+            st.info(f"🔍 OCR job {job_id} queued, see progress below")
+
+        ingest_job_panel()
+
+    st.divider()
+    st.header("💱 Currency")
+    fx_file = st.file_uploader("Upload FX rates CSV (Date, From_Currency, To_Currency, Rate)", type=["csv"])
+    if fx_file:
+        # Saved once per uploaded file, not on every rerun while it stays in the uploader
+        fx_uploads = st.session_state.setdefault("fx_uploads", {})
+        if fx_file.file_id not in fx_uploads:
+            fx_uploads[fx_file.file_id] = insert_fx_rates(pd.read_csv(fx_file))
+        st.success(f"✅ {fx_uploads[fx_file.file_id]} FX rates saved")
 
 # ---------------- Main Tabs ----------------
 st.header("📊 Analytics & Reports")
-data = load_data_from_db()
+token = change_token(table_name="journal_entries")
+row_count = table_summary(token, table_name="journal_entries")[0]
 
-if not data.empty:
-    analytics = AccountingAnalytics(data)
+if row_count:
+    currencies = filter_options(token, table_name="journal_entries")["Currency"]
+    if currencies:
+        st.selectbox("Reporting Currency", sorted(set(currencies) | {BASE_CURRENCY}), key="reporting_currency")
+    analytics = current_analytics()
 
     tab0, tab1, tab2, tab3, tab4 = st.tabs(
         ["📑 Data Preview", "📈 KPIs", "📊 Trial Balance", "💰 Income Statement", "📃 Balance Sheet"]
@@ -132,17 +170,13 @@ if not data.empty:
 
     with tab0:
         st.subheader("📑 Preview of Journal Entries")
-        st.dataframe(data, use_container_width=True)
+        paginated_table(token, table_name="journal_entries", key="preview")
 
     with tab1:
         st.subheader("📈 Key Performance Indicators")
-    
-        # Convert Debit and Credit columns to numeric, coercing errors to 0
-        data['Debit'] = pd.to_numeric(data['Debit'], errors='coerce').fillna(0)
-        data['Credit'] = pd.to_numeric(data['Credit'], errors='coerce').fillna(0)
-        
-        st.metric("Total Debits", f"{data['Debit'].sum():,.2f}")
-        st.metric("Total Credits", f"{data['Credit'].sum():,.2f}")
+        # Exact totals of the (converted) compact ledger
+        st.metric("Total Debits", f"{analytics.total('Debit'):,.2f}")
+        st.metric("Total Credits", f"{analytics.total('Credit'):,.2f}")
 
     with tab2:
         st.subheader("📊 Trial Balance")
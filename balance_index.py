@@ -0,0 +1,152 @@
+import numpy as np
+import pandas as pd
+
+from compact_ledger import CompactLedger
+
+NAT = np.iinfo("int64").min
+
+
+def _to_ns(value):
+    """Timestamp-like -> int64 nanoseconds since epoch."""
+    return pd.Timestamp(value).as_unit("ns").value
+
+
+def _arrays(ledger: CompactLedger):
+    """``(times, account codes, debit, credit)`` of a ledger, with defaults for missing columns."""
+    n = len(ledger)
+    times = ledger.times()
+    if times is None:
+        times = np.full(n, NAT, dtype="int64")
+    codes = ledger.codes.get("Account", np.full(n, -1, dtype="int32"))
+    zeros = np.zeros(n, dtype="int64")
+    return times, codes, ledger.amounts.get("Debit", zeros), ledger.amounts.get("Credit", zeros)
+
+
+class _Segment:
+    """Sorted layout and prefix sums of the rows ``[offset, offset + size)``."""
+
+    def __init__(self, offset, times, account_codes, debit, credit):
+        valid = times != NAT
+        positions = np.flatnonzero(valid)
+
+        # Date-only ordering for range filters (positions in the whole ledger)
+        order = np.argsort(times[valid], kind="stable")
+        self.date_order = positions[order] + offset
+        self.sorted_times = times[valid][order]
+
+        # Dense date ranks keep (account, date) keys inside one int64
+        self.unique_times = np.unique(self.sorted_times)
+        acct_valid = valid & (account_codes >= 0)
+        rows = np.flatnonzero(acct_valid)
+        ranks = np.searchsorted(self.unique_times, times[rows])
+        keys = (account_codes[rows].astype("int64") << 32) | ranks
+        order = np.argsort(keys, kind="stable")
+        rows = rows[order]
+        self.keys = keys[order]
+        self.cum_debit = np.concatenate([[0], np.cumsum(debit[rows])]).astype("int64")
+        self.cum_credit = np.concatenate([[0], np.cumsum(credit[rows])]).astype("int64")
+        self.offset = offset
+        self.size = len(times)
+
+    @classmethod
+    def over(cls, arrays, start, stop):
+        return cls(start, *(a[start:stop] for a in arrays))
+
+    def date_range_positions(self, start=None, end=None):
+        lo = 0 if start is None else np.searchsorted(self.sorted_times, _to_ns(start), side="left")
+        hi = len(self.sorted_times) if end is None else np.searchsorted(self.sorted_times, _to_ns(end), side="right")
+        return np.sort(self.date_order[lo:hi])
+
+    def slices(self, codes, start=None, end=None):
+        lo_rank = 0 if start is None else np.searchsorted(self.unique_times, _to_ns(start), side="left")
+        hi_rank = len(self.unique_times) if end is None else \
+            np.searchsorted(self.unique_times, _to_ns(end), side="right")
+        base = np.asarray(codes, dtype="int64") << 32
+        lo = np.searchsorted(self.keys, base | lo_rank, side="left")
+        hi = np.searchsorted(self.keys, base | hi_rank, side="left")
+        hi = np.maximum(hi, lo)
+        return lo, hi
+
+
+class BalanceIndex:
+    """Date-sorted layout of a ledger with per-account prefix sums.
+
+    Rows are ordered by (account code, date); ``cum_debit``/``cum_credit`` hold
+    running totals in minor units with a leading zero, so the movement of any
+    account over any date range is two binary searches and a subtraction.
+    A separate date-only ordering serves date-range filters. Rows without a
+    date or account are left out, matching what the date filters keep.
+
+    Appended rows (``extend``) get a segment of their own; a segment is merged
+    into the one before it once it reaches half that one's size, so there are
+    O(log n) segments, each row is re-sorted O(log n) times, and queries add up
+    the segments.
+    """
+
+    def __init__(self, times, account_codes, accounts, debit, credit):
+        self.accounts = accounts
+        self.segments = [_Segment(0, times, account_codes, debit, credit)]
+        self.size = len(times)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, ledger: CompactLedger = None):
+        return cls.from_ledger(ledger if ledger is not None else CompactLedger.from_frame(df))
+
+    @classmethod
+    def from_ledger(cls, ledger: CompactLedger):
+        times, codes, debit, credit = _arrays(ledger)
+        return cls(times, codes, ledger.dictionaries.get("Account", pd.Index([])), debit, credit)
+
+    def extend(self, ledger: CompactLedger):
+        """Index of ``ledger``, which is this index's ledger with rows appended (see ``CompactLedger.append``).
+
+        Only the new rows are sorted, plus any segments they are merged with.
+        """
+        if len(ledger) == self.size:
+            return self
+        arrays = _arrays(ledger)
+        segments = self.segments + [_Segment.over(arrays, self.size, len(ledger))]
+        while len(segments) > 1 and segments[-2].size <= 2 * segments[-1].size:
+            last = segments.pop()
+            first = segments.pop()
+            segments.append(_Segment.over(arrays, first.offset, last.offset + last.size))
+        index = BalanceIndex.__new__(BalanceIndex)
+        index.accounts = ledger.dictionaries.get("Account", pd.Index([]))
+        index.segments = segments
+        index.size = len(ledger)
+        return index
+
+    # ---------- Date ranges ----------
+    def date_range_positions(self, start=None, end=None):
+        """Row positions with ``start <= Date <= end``, in original row order."""
+        # Segments cover consecutive row ranges, so their sorted positions concatenate in order
+        return np.concatenate([s.date_range_positions(start, end) for s in self.segments])
+
+    # ---------- Balances ----------
+    def balances(self, start=None, end=None) -> pd.DataFrame:
+        """Debit/Credit movement per account (minor units) for ``start <= Date <= end``."""
+        codes = np.arange(len(self.accounts))
+        debit = np.zeros(len(codes), dtype="int64")
+        credit = np.zeros(len(codes), dtype="int64")
+        present = np.zeros(len(codes), dtype=bool)
+        for segment in self.segments:
+            lo, hi = segment.slices(codes, start, end)
+            debit += segment.cum_debit[hi] - segment.cum_debit[lo]
+            credit += segment.cum_credit[hi] - segment.cum_credit[lo]
+            if len(segment.keys):
+                present[np.unique(segment.keys >> 32)] = True
+        out = pd.DataFrame({"Debit": debit, "Credit": credit}, index=self.accounts)
+        out.index.name = "Account"
+        return out[present]
+
+    def account_balance(self, account, start=None, end=None):
+        """(debit, credit) movement of one account in minor units."""
+        code = self.accounts.get_indexer([account])[0]
+        if code < 0:
+            return 0, 0
+        debit = credit = 0
+        for segment in self.segments:
+            lo, hi = segment.slices([code], start, end)
+            debit += int(segment.cum_debit[hi[0]] - segment.cum_debit[lo[0]])
+            credit += int(segment.cum_credit[hi[0]] - segment.cum_credit[lo[0]])
+        return debit, credit
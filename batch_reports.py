@@ -0,0 +1,128 @@
+"""Batch close reporting: every entity × month, fanned out over a process pool.
+
+Each entity is one SQLite ledger. Ledgers are loaded once, not pickled per
+task: on platforms with ``fork`` the parent loads them before starting the
+pool and workers share the pages copy-on-write; elsewhere each worker loads
+an entity the first time it needs it and keeps it for later tasks.
+
+Usage:
+    python batch_reports.py --entity acme=acme.db --entity beta=beta.db \\
+        --start 2025-01 --end 2025-06 --out close_2025H1
+"""
+import argparse
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from accounting_analytics import AccountingAnalytics
+from db_io import fetch_versioned
+
+REPORTS = ("trial_balance", "income_statement", "balance_sheet", "cash_flow")
+
+# Per-process state: entity -> db path, entity -> loaded AccountingAnalytics
+_ENTITY_PATHS = {}
+_LEDGERS = {}
+
+
+def month_periods(start, end):
+    """[(label, first day, last day)] for every month from ``start`` to ``end``."""
+    months = pd.period_range(pd.Period(start, "M"), pd.Period(end, "M"), freq="M")
+    return [(str(m), m.start_time.normalize(), m.end_time.normalize()) for m in months]
+
+
+def _ledger(entity):
+    if entity not in _LEDGERS:
+        db_path = _ENTITY_PATHS[entity]
+        version, df = fetch_versioned(db_path)
+        _LEDGERS[entity] = AccountingAnalytics(df, data_version=version)
+    return _LEDGERS[entity]
+
+
+def _init_worker(entity_paths):
+    _ENTITY_PATHS.update(entity_paths)
+
+
+def _run_task(task):
+    """Compute all close reports for one (entity, period)."""
+    entity, label, start, end = task
+    t0 = time.perf_counter()
+    analytics = _ledger(entity)
+    period = analytics.filter(start_date=start, end_date=end)
+    to_date = analytics.filter(end_date=end)
+    results = {
+        "trial_balance": analytics.trial_balance_as_of(end),
+        "income_statement": period.income_statement(),
+        "balance_sheet": to_date.balance_sheet(),
+        "cash_flow": period.cash_flow(),
+    }
+    return {
+        "Entity": entity, "Period": label, "results": results,
+        "Rows": len(period.compact), "Seconds": time.perf_counter() - t0, "PID": os.getpid(),
+    }
+
+
+def run_batch(entities, periods, max_workers=None):
+    """Run every report for every entity × period.
+
+    ``entities`` maps entity name -> db path; ``periods`` is a list from
+    ``month_periods``. Returns ``(reports, timings)`` where ``reports`` maps
+    report name -> one DataFrame with leading Entity/Period columns.
+    """
+    _ENTITY_PATHS.clear()
+    _ENTITY_PATHS.update(entities)
+    tasks = [(entity, label, start, end) for entity in entities for label, start, end in periods]
+
+    if "fork" in mp.get_all_start_methods():
+        # Load once in the parent; forked workers inherit the ledgers
+        for entity in entities:
+            _ledger(entity)
+        ctx = mp.get_context("fork")
+    else:
+        ctx = mp.get_context()
+
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx,
+                             initializer=_init_worker, initargs=(dict(entities),)) as pool:
+        outputs = list(pool.map(_run_task, tasks, chunksize=max(1, len(tasks) // (4 * (max_workers or os.cpu_count() or 1)))))
+    wall = time.perf_counter() - started
+
+    reports = {}
+    for name in REPORTS:
+        frames = [out["results"][name].assign(Entity=out["Entity"], Period=out["Period"]) for out in outputs]
+        frame = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        lead = ["Entity", "Period"]
+        reports[name] = frame[lead + [c for c in frame.columns if c not in lead]] if not frame.empty else frame
+    timings = pd.DataFrame([{k: out[k] for k in ("Entity", "Period", "Rows", "Seconds", "PID")} for out in outputs])
+    timings.attrs["wall_seconds"] = wall
+    return reports, timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Batch close reports per entity and month")
+    parser.add_argument("--entity", action="append", required=True, metavar="NAME=DB_PATH",
+                        help="Entity ledger, repeatable")
+    parser.add_argument("--start", required=True, help="First month, e.g. 2025-01")
+    parser.add_argument("--end", required=True, help="Last month, e.g. 2025-12")
+    parser.add_argument("--workers", type=int, default=None, help="Process pool size (default: CPU count)")
+    parser.add_argument("--out", default="batch_reports", help="Output directory for CSV files")
+    args = parser.parse_args(argv)
+
+    entities = dict(item.split("=", 1) for item in args.entity)
+    reports, timings = run_batch(entities, month_periods(args.start, args.end), max_workers=args.workers)
+
+    os.makedirs(args.out, exist_ok=True)
+    for name, frame in reports.items():
+        frame.to_csv(os.path.join(args.out, f"{name}.csv"), index=False)
+    timings.to_csv(os.path.join(args.out, "timings.csv"), index=False)
+
+    print(f"✅ {len(timings)} entity-periods in {timings.attrs['wall_seconds']:.2f}s "
+          f"(task total {timings['Seconds'].sum():.2f}s)")
+    print(timings.groupby("Entity")["Seconds"].agg(["count", "sum", "mean", "max"]).round(4))
+    print(f"📁 Reports written to {args.out}/")
+
+
+if __name__ == "__main__":
+    main()
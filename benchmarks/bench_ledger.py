@@ -0,0 +1,169 @@
+"""End-to-end ledger benchmark: ingest, load, construction, filtering and every report.
+
+For each ledger size a synthetic ledger is generated (see
+``synthetic_ledger.py``) and each stage is timed on its own. Reports run
+with caching disabled (no data version) on one analytics object, the way a
+dashboard rerun uses it. Peak traced memory per stage is measured in a
+second, tracemalloc-enabled pass so it does not inflate the timings; lazily
+built structures (e.g. the period cube) already exist in that pass, so
+their memory is not included.
+Results go to a JSON file tagged with the git commit, and ``--compare``
+prints per-stage ratios against an earlier results file.
+
+Usage:
+    python benchmarks/bench_ledger.py --lines 10000 100000 1000000
+    python benchmarks/bench_ledger.py --lines 100000 --compare benchmarks/results/<old>.json
+"""
+import argparse
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from accounting_analytics import AccountingAnalytics  # noqa: E402
+from db_io import insert_entries, fetch_entries  # noqa: E402
+from db_utils import insert_dataframe_to_db  # noqa: E402
+from synthetic_ledger import synthetic_ledger  # noqa: E402
+
+RESULTS_DIR = os.path.join(ROOT, "benchmarks", "results")
+
+
+def _git(*args):
+    try:
+        return subprocess.run(["git", *args], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _run(fn, memory):
+    """``(seconds, peak MB or None)`` for one call of ``fn``."""
+    gc.collect()
+    t0 = time.perf_counter()
+    fn()
+    seconds = time.perf_counter() - t0
+    peak = None
+    if memory:
+        gc.collect()
+        tracemalloc.start()
+        fn()
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+    return seconds, peak
+
+
+def _stages(df, workdir):
+    """``[(stage name, rows processed, callable)]`` in execution order."""
+    n = len(df)
+    records = df.to_dict(orient="records")
+    counter = iter(range(10**9))
+    fresh_db = lambda: os.path.join(workdir, f"bench_{next(counter)}.db")
+    loaded_db = fresh_db()
+    insert_entries(records, db_path=loaded_db)
+    loaded = fetch_entries(loaded_db)
+    analytics = AccountingAnalytics(loaded)
+
+    dates = pd.to_datetime(loaded["Date"])
+    mid = dates.min() + (dates.max() - dates.min()) / 2
+    quarter = dict(start_date=mid, end_date=mid + pd.Timedelta(days=90))
+    accounts = ["Cash", "Accounts Receivable"]
+
+    stages = [
+        ("insert_entries", n, lambda: insert_entries(records, db_path=fresh_db())),
+        ("insert_dataframe_to_db", n, lambda: insert_dataframe_to_db(df.drop(columns="JE_ID"), db_path=fresh_db())),
+        ("fetch_entries", n, lambda: fetch_entries(loaded_db)),
+        ("construct", n, lambda: AccountingAnalytics(loaded)),
+        ("filter", n, lambda: analytics.filter(accounts=accounts, **quarter)),
+    ]
+    reports = [
+        ("trial_balance", lambda: analytics.trial_balance()),
+        ("trial_balance_as_of", lambda: analytics.trial_balance_as_of(mid)),
+        ("account_balance", lambda: analytics.account_balance("Cash", end_date=mid)),
+        ("income_statement", lambda: analytics.income_statement()),
+        ("balance_sheet", lambda: analytics.balance_sheet()),
+        ("cash_flow", lambda: analytics.cash_flow()),
+        ("open_items", lambda: analytics.open_items("Accounts Receivable")),
+        ("aging_report", lambda: analytics.aging_report("Accounts Receivable")),
+        ("drill_down", lambda: analytics.drill_down(account="Cash", date_from=mid)),
+        ("error_checks", lambda: analytics.error_checks()),
+        ("duplicate_entries", lambda: analytics.duplicate_entries()),
+        ("income_statement_trend", lambda: analytics.income_statement_trend("M")),
+        ("balance_sheet_trend", lambda: analytics.balance_sheet_trend("Q")),
+        ("cash_flow_trend", lambda: analytics.cash_flow_trend("Y")),
+        ("bank_reconciliation", lambda: analytics.bank_reconciliation()),
+        ("filtered_income_statement", lambda: analytics.filter(**quarter).income_statement()),
+    ]
+    return stages + [(name, n, fn) for name, fn in reports]
+
+
+def run(sizes, memory=True, skip=()):
+    results = []
+    for size in sizes:
+        df = synthetic_ledger(size)
+        with tempfile.TemporaryDirectory() as workdir:
+            for stage, rows, fn in _stages(df, workdir):
+                if stage in skip:
+                    continue
+                seconds, peak = _run(fn, memory)
+                results.append({"lines": len(df), "stage": stage, "seconds": round(seconds, 6),
+                                "rows_per_sec": round(rows / seconds) if seconds else None,
+                                "peak_mb": round(peak, 2) if peak is not None else None})
+                print(f"{len(df):>10,}  {stage:<26}{seconds:>10.4f}s  {rows / seconds if seconds else 0:>14,.0f} rows/s"
+                      + (f"  {peak:>9.1f} MB" if peak is not None else ""))
+    return results
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {(r["lines"], r["stage"]): r["seconds"] for r in json.load(f)["results"]}
+    print(f"\nvs {baseline_path} (ratio < 1 is faster)")
+    for r in results:
+        old = baseline.get((r["lines"], r["stage"]))
+        if old:
+            print(f"{r['lines']:>10,}  {r['stage']:<26}{r['seconds'] / old:>8.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark ingest, load and reports on synthetic ledgers")
+    parser.add_argument("--lines", type=int, nargs="+", default=[10_000, 100_000], help="Ledger sizes")
+    parser.add_argument("--out", default=None, help="Results JSON (default benchmarks/results/<commit>.json)")
+    parser.add_argument("--no-memory", action="store_true", help="Skip the tracemalloc pass")
+    parser.add_argument("--skip", nargs="*", default=[], help="Stage names to skip (e.g. insert_entries)")
+    parser.add_argument("--compare", default=None, help="Earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    commit = _git("rev-parse", "--short", "HEAD")
+    results = run(args.lines, memory=not args.no_memory, skip=set(args.skip))
+    payload = {
+        "commit": commit,
+        "dirty": bool(_git("status", "--porcelain", "--untracked-files=no")),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "results": results,
+    }
+    out = args.out or os.path.join(RESULTS_DIR, f"{commit or 'unknown'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(payload, f, indent=2)
+    print(f"📁 Results written to {out}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
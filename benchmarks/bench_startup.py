@@ -0,0 +1,117 @@
+"""Startup-time benchmark: cold import time per entry module and schema init cost.
+
+Each module is imported in a fresh interpreter (median of ``--repeat`` runs),
+and the heavy optional dependencies that must stay lazy are checked to be
+absent after the import. Exits non-zero on a violation or when a module
+exceeds ``--budget`` seconds, so it can run in CI.
+
+Usage:
+    python benchmarks/bench_startup.py --repeat 5 --budget 1.5 --json startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Module -> dependencies that importing it must not load
+MODULES = {
+    "metrics": ["pandas", "openai", "pdfplumber", "dotenv", "streamlit"],
+    "db_io": ["openai", "pdfplumber", "dotenv", "streamlit"],
+    "accounting_analytics": ["openai", "pdfplumber", "dotenv", "streamlit"],
+    "ocr": ["openai", "pdfplumber"],
+    "pipeline": ["openai", "pdfplumber", "dotenv"],
+    "ingest_jobs": ["openai", "pdfplumber", "dotenv"],
+    "report_service": ["openai", "pdfplumber", "dotenv", "streamlit"],
+    "batch_reports": ["openai", "pdfplumber", "dotenv", "streamlit"],
+}
+
+IMPORT_PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - t,
+                  "loaded": [m for m in {lazy!r} if m in sys.modules]}}))
+"""
+
+INIT_PROBE = """
+import json, os, time
+os.chdir({tmp!r})
+t = time.perf_counter()
+from db_io import init_db
+from db_utils import init_database
+imported = time.perf_counter()
+init_db(); init_database()
+first = time.perf_counter()
+init_db(); init_database()
+again = time.perf_counter()
+print(json.dumps({{"first": first - imported, "repeat": again - first}}))
+"""
+
+
+def _probe(code):
+    out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True,
+                         env={**os.environ, "PYTHONPATH": ROOT})
+    if out.returncode != 0:
+        return {"error": out.stderr.strip().splitlines()[-1] if out.stderr.strip() else "failed"}
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def measure_imports(repeat=5):
+    results = {}
+    for module, lazy in MODULES.items():
+        runs = [_probe(IMPORT_PROBE.format(module=module, lazy=lazy)) for _ in range(repeat)]
+        if "error" in runs[0]:
+            results[module] = {"error": runs[0]["error"]}
+            continue
+        results[module] = {"seconds": statistics.median(r["seconds"] for r in runs),
+                           "eagerly_loaded": runs[0]["loaded"]}
+    return results
+
+
+def measure_init():
+    with tempfile.TemporaryDirectory() as tmp:
+        return _probe(INIT_PROBE.format(tmp=tmp))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure cold import and schema init time")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--budget", type=float, default=None, help="Max seconds per module import")
+    parser.add_argument("--json", default=None, help="Write results to this JSON file")
+    args = parser.parse_args(argv)
+
+    imports = measure_imports(args.repeat)
+    init = measure_init()
+    failures = []
+    print(f"{'module':<24}{'import (s)':>12}  eagerly loaded")
+    for module, r in imports.items():
+        if "error" in r:
+            print(f"{module:<24}{'-':>12}  ⚠️ {r['error']}")
+            failures.append(f"{module} failed to import: {r['error']}")
+            continue
+        print(f"{module:<24}{r['seconds']:>12.3f}  {', '.join(r['eagerly_loaded']) or '-'}")
+        if r["eagerly_loaded"]:
+            failures.append(f"{module} imports {', '.join(r['eagerly_loaded'])} at startup")
+        if args.budget is not None and r["seconds"] > args.budget:
+            failures.append(f"{module} import took {r['seconds']:.3f}s (budget {args.budget}s)")
+    if "error" in init:
+        print(f"schema init: ⚠️ {init['error']}")
+        failures.append(f"schema init failed: {init['error']}")
+    else:
+        print(f"schema init: first {init['first']:.4f}s, repeat {init['repeat']:.6f}s")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"imports": imports, "init": init, "failures": failures}, f, indent=2)
+    for failure in failures:
+        print(f"❌ {failure}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
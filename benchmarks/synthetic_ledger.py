@@ -0,0 +1,192 @@
+"""Synthetic, balanced journal entries in the ``db_io`` line-level schema.
+
+Every journal entry is two lines (one debit, one credit, equal amounts)
+drawn from a mix of everyday templates: invoices and receipts against
+Accounts Receivable, bills and payments against Accounts Payable, cash sales,
+bank fees and owner capital. Receipts and payments reference earlier
+invoices/bills, so aging, open-item matching and reconciliation have real
+work to do. Generation is vectorized and chunked, so 50M lines can be
+streamed to SQLite without holding them in memory.
+
+Usage:
+    python benchmarks/synthetic_ledger.py --lines 1000000 --db synthetic.db
+    python benchmarks/synthetic_ledger.py --lines 100000 --csv synthetic.csv
+    python benchmarks/synthetic_ledger.py --lines 100000 --db synthetic.db \
+        --accounts "Cash=Operating Bank,Sales Revenue=Product Sales" --expense-accounts "Rent,Fuel,Wages"
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from db_io import init_db, max_rowid, sync_search_index, bump_data_version  # noqa: E402
+
+COLUMNS = ["JE_ID", "Date", "Account", "Description", "Debit", "Credit", "Category", "Transaction_Type",
+           "Customer_Vendor", "Payment_Method", "Reference", "Currency"]
+
+# name: (debit account, debit category, credit account, credit category, transaction type,
+#        party kind, reference prefix, payment method)
+TEMPLATES = {
+    "sales_invoice": ("Accounts Receivable", "Asset", "Sales Revenue", "Revenue", "Invoice", "customer", "INV", None),
+    "customer_receipt": ("Cash", "Asset", "Accounts Receivable", "Asset", "Receipt", "customer", "INV", "Bank Transfer"),
+    "cash_sale": ("Cash", "Asset", "Sales Revenue", "Revenue", "Cash Receipt", "customer", "RCPT", "Cash"),
+    "purchase_invoice": (None, "Expense", "Accounts Payable", "Liability", "Purchase Order", "vendor", "BILL", None),
+    "supplier_payment": ("Accounts Payable", "Liability", "Cash", "Asset", "Check", "vendor", "BILL", "Check"),
+    "bank_fee": ("Bank Charges", "Expense", "Cash", "Asset", "Bank Statement", None, "BNK", "Bank Transfer"),
+    "owner_capital": ("Cash", "Asset", "Owner's Equity", "Equity", "Deposit", None, "CAP", "Bank Transfer"),
+}
+DEFAULT_MIX = {"sales_invoice": 0.30, "customer_receipt": 0.25, "cash_sale": 0.10, "purchase_invoice": 0.15,
+               "supplier_payment": 0.12, "bank_fee": 0.07, "owner_capital": 0.01}
+EXPENSE_ACCOUNTS = ["Rent Expense", "Utilities Expense", "Office Supplies", "Salaries Expense", "Travel Expense"]
+# Median amount per template (log-normal spread around it)
+MEDIAN_AMOUNT = {"sales_invoice": 1200.0, "customer_receipt": 1200.0, "cash_sale": 150.0, "purchase_invoice": 800.0,
+                 "supplier_payment": 800.0, "bank_fee": 15.0, "owner_capital": 25000.0}
+
+
+def _labels(prefix, numbers):
+    return np.char.add(prefix, numbers.astype(str)).astype(object)
+
+
+def generate_chunk(n_entries, first_entry=0, total_entries=None, start="2023-01-01", days=730, customers=500,
+                   vendors=200, mix=None, currencies=("USD",), accounts=None, expense_accounts=None, seed=0):
+    """DataFrame of ``2 * n_entries`` lines for entries ``first_entry .. first_entry + n_entries - 1``.
+
+    The chunk is reproducible on its own: the generator is seeded by
+    ``(seed, first_entry)``. Dates increase with the entry number over
+    ``total_entries`` entries, so a chunked ledger is in date order.
+
+    ``accounts`` renames template accounts (``{"Cash": "Operating Bank"}``);
+    ``expense_accounts`` replaces ``EXPENSE_ACCOUNTS``, the accounts purchase
+    invoices are spread over.
+    """
+    mix = mix or DEFAULT_MIX
+    rng = np.random.default_rng([seed, first_entry])
+    names = list(mix)
+    kind = rng.choice(len(names), size=n_entries, p=np.asarray([mix[k] for k in names]) / sum(mix.values()))
+    entry_no = np.arange(first_entry, first_entry + n_entries)
+
+    # Spread entries evenly over the date span (sorted by entry number)
+    total = max(total_entries or first_entry + n_entries, 1)
+    day = (entry_no * days) // total
+    dates = (pd.Timestamp(start) + pd.to_timedelta(day, unit="D")).strftime("%Y-%m-%d").to_numpy(dtype=object)
+
+    median = np.asarray([MEDIAN_AMOUNT[k] for k in names])[kind]
+    amount = np.round(median * rng.lognormal(0.0, 0.6, n_entries), 2)
+
+    accounts = accounts or {}
+    rename = lambda account: accounts.get(account, account) if account is not None else None
+    tmpl = [(rename(t[0]),) + t[1:2] + (rename(t[2]),) + t[3:] for t in (TEMPLATES[k] for k in names)]
+    expense_accounts = [rename(a) for a in (expense_accounts or EXPENSE_ACCOUNTS)]
+    pick = lambda i: np.asarray([t[i] for t in tmpl], dtype=object)[kind]
+    debit_account, credit_account = pick(0), pick(2)
+    expense = np.asarray(expense_accounts, dtype=object)[rng.integers(0, len(expense_accounts), n_entries)]
+    debit_account = np.where(pd.isna(debit_account), expense, debit_account)
+
+    party_kind = pick(5)
+    party = np.full(n_entries, None, dtype=object)
+    is_customer, is_vendor = party_kind == "customer", party_kind == "vendor"
+    party[is_customer] = _labels("Customer ", rng.integers(1, customers + 1, is_customer.sum()))
+    party[is_vendor] = _labels("Vendor ", rng.integers(1, vendors + 1, is_vendor.sum()))
+
+    # Settlements point back at an earlier document number; everything else gets its own
+    settles = np.isin(kind, [names.index(k) for k in ("customer_receipt", "supplier_payment") if k in names])
+    doc_no = np.where(settles, np.maximum(entry_no - rng.integers(1, 200, n_entries), 0), entry_no)
+    reference = np.char.add(np.char.add(pick(6).astype(str), "-"), doc_no.astype(str)).astype(object)
+    currency = np.asarray(currencies, dtype=object)[rng.integers(0, len(currencies), n_entries)]
+
+    je = _labels("JE-", entry_no)
+    txn_type = pick(4)
+    description = np.char.add(txn_type.astype(str), np.where(pd.isna(party), "", np.char.add(" - ", party.astype(str)))).astype(object)
+    zeros = np.zeros(n_entries)
+
+    def lines(account, category, debit, credit):
+        return {"JE_ID": je, "Date": dates, "Account": account, "Description": description, "Debit": debit,
+                "Credit": credit, "Category": category, "Transaction_Type": txn_type, "Customer_Vendor": party,
+                "Payment_Method": pick(7), "Reference": reference, "Currency": currency}
+
+    debit_lines = pd.DataFrame(lines(debit_account, pick(1), amount, zeros))
+    credit_lines = pd.DataFrame(lines(credit_account, pick(3), zeros, amount))
+    # Interleave so both lines of an entry are adjacent
+    df = pd.concat([debit_lines, credit_lines]).sort_index(kind="stable").reset_index(drop=True)
+    return df[COLUMNS]
+
+
+def generate_ledger(n_lines, chunk_lines=1_000_000, **kwargs):
+    """Yield DataFrame chunks totalling ``n_lines`` lines (rounded up to whole entries)."""
+    n_entries = -(-n_lines // 2)
+    per_chunk = max(1, chunk_lines // 2)
+    for first in range(0, n_entries, per_chunk):
+        yield generate_chunk(min(per_chunk, n_entries - first), first_entry=first, total_entries=n_entries, **kwargs)
+
+
+def synthetic_ledger(n_lines, **kwargs) -> pd.DataFrame:
+    """Whole synthetic ledger as one DataFrame (for sizes that fit in memory)."""
+    return pd.concat(generate_ledger(n_lines, **kwargs), ignore_index=True)
+
+
+def write_ledger(db_path, n_lines, chunk_lines=1_000_000, **kwargs):
+    """Stream a synthetic ledger into ``journal_entries`` of ``db_path``; returns lines written.
+
+    Bulk path for large benchmark databases: rows go straight in with
+    executemany per chunk (no per-row validation), then the search index and
+    data version are updated once.
+    """
+    init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    written = 0
+    try:
+        last_rowid = max_rowid(conn)
+        placeholders = ", ".join("?" * len(COLUMNS))
+        for chunk in generate_ledger(n_lines, chunk_lines=chunk_lines, **kwargs):
+            conn.executemany(f"INSERT OR IGNORE INTO journal_entries ({', '.join(COLUMNS)}) VALUES ({placeholders})",
+                             chunk.itertuples(index=False, name=None))
+            written += len(chunk)
+        sync_search_index(conn, after_rowid=last_rowid)
+        bump_data_version(conn)
+        conn.commit()
+    finally:
+        conn.close()
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a synthetic balanced ledger")
+    parser.add_argument("--lines", type=int, default=100_000, help="Number of ledger lines (10K-50M)")
+    parser.add_argument("--db", default=None, help="Write to journal_entries in this SQLite DB")
+    parser.add_argument("--csv", default=None, help="Write to this CSV file")
+    parser.add_argument("--start", default="2023-01-01", help="First date")
+    parser.add_argument("--days", type=int, default=730, help="Date span in days")
+    parser.add_argument("--customers", type=int, default=500)
+    parser.add_argument("--vendors", type=int, default=200)
+    parser.add_argument("--currencies", default="USD", help="Comma-separated currency codes")
+    parser.add_argument("--accounts", default="", help='Comma-separated renames, e.g. "Cash=Operating Bank"')
+    parser.add_argument("--expense-accounts", default="", help="Comma-separated expense accounts for purchases")
+    parser.add_argument("--chunk-lines", type=int, default=1_000_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    if not args.db and not args.csv:
+        parser.error("give --db and/or --csv")
+
+    kwargs = dict(start=args.start, days=args.days, customers=args.customers, vendors=args.vendors,
+                  currencies=tuple(args.currencies.split(",")), seed=args.seed,
+                  accounts=dict(pair.split("=", 1) for pair in args.accounts.split(",") if pair),
+                  expense_accounts=[a for a in args.expense_accounts.split(",") if a] or None)
+    t0 = time.perf_counter()
+    if args.db:
+        written = write_ledger(args.db, args.lines, chunk_lines=args.chunk_lines, **kwargs)
+        print(f"✅ {written:,} lines written to {args.db} in {time.perf_counter() - t0:.1f}s")
+    if args.csv:
+        t0 = time.perf_counter()
+        for i, chunk in enumerate(generate_ledger(args.lines, chunk_lines=args.chunk_lines, **kwargs)):
+            chunk.to_csv(args.csv, mode="w" if i == 0 else "a", header=i == 0, index=False)
+        print(f"✅ {args.lines:,} lines written to {args.csv} in {time.perf_counter() - t0:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
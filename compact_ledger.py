@@ -0,0 +1,172 @@
+import numpy as np
+import pandas as pd
+
+# Dimension columns stored as dictionary-encoded int32 codes (-1 = missing)
+DIMENSION_COLUMNS = ["Account", "Category", "Customer_Vendor", "Payment_Method", "Transaction_Type"]
+# Free-text columns, also dictionary-encoded (unsorted: high cardinality, never grouped on)
+TEXT_COLUMNS = ["JE_ID", "Description", "Reference", "Currency"]
+# Amount columns stored as int64 minor units (cents)
+AMOUNT_COLUMNS = ["Debit", "Credit"]
+MINOR_UNITS = 100
+
+
+def to_minor_units(values, scale=MINOR_UNITS):
+    """Convert float amounts to exact int64 minor units (NaN -> 0)."""
+    arr = np.asarray(pd.to_numeric(values, errors="coerce"), dtype="float64")
+    arr = np.nan_to_num(arr, nan=0.0, posinf=0.0, neginf=0.0)
+    return np.rint(arr * scale).astype("int64")
+
+
+def from_minor_units(values, scale=MINOR_UNITS):
+    """Convert int64 minor units back to float amounts."""
+    return np.asarray(values, dtype="int64") / scale
+
+
+class CompactLedger:
+    """Columnar, integer-coded journal-entry ledger.
+
+    Dimension and text columns become int32 codes into per-column
+    dictionaries and Debit/Credit become int64 minor units, so sums are exact,
+    group-bys run on small integer arrays instead of Python strings and each
+    distinct label is stored once. Row subsets (``take``) share the
+    dictionaries of the ledger they came from.
+
+    ``append`` encodes only the new rows: existing codes never change, labels
+    not seen before go to the end of a dimension dictionary (which is then no
+    longer sorted), and text labels are appended per batch, so a text
+    dictionary may repeat a label (text columns are decoded, never looked up).
+    """
+
+    def __init__(self, codes, dictionaries, amounts, other, scale=MINOR_UNITS, columns=None):
+        self.codes = codes                # column -> int32 ndarray
+        self.dictionaries = dictionaries  # column -> pd.Index of labels
+        self.amounts = amounts            # column -> int64 ndarray
+        self.other = other                # remaining columns as a DataFrame
+        self.scale = scale
+        self.columns = list(columns) if columns is not None else (
+            list(other.columns) + list(codes) + list(amounts))
+
+    # ---------- Conversion ----------
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, scale=MINOR_UNITS):
+        codes, dictionaries, amounts = {}, {}, {}
+        for col in DIMENSION_COLUMNS + TEXT_COLUMNS:
+            if col in df.columns:
+                c, uniques = pd.factorize(df[col], sort=col in DIMENSION_COLUMNS)
+                codes[col] = c.astype("int32")
+                dictionaries[col] = pd.Index(uniques)
+        for col in AMOUNT_COLUMNS:
+            if col in df.columns:
+                amounts[col] = to_minor_units(df[col], scale)
+        rest = [c for c in df.columns if c not in codes and c not in amounts]
+        other = df[rest].reset_index(drop=True)
+        return cls(codes, dictionaries, amounts, other, scale, df.columns)
+
+    def append(self, df: pd.DataFrame):
+        """New CompactLedger with ``df``'s rows added after this ledger's rows."""
+        if df.empty:
+            return self
+        n, k = len(self), len(df)
+        codes, dictionaries, amounts = {}, {}, {}
+        for col in DIMENSION_COLUMNS + TEXT_COLUMNS:
+            if col not in self.codes and col not in df.columns:
+                continue
+            labels = self.dictionaries.get(col, pd.Index([]))
+            new = np.full(k, -1, dtype="int64")
+            if col in df.columns:
+                values = df[col].to_numpy(dtype=object)
+                # Dimension labels reuse their code; new and text labels are added
+                unseen = pd.notna(values)
+                if col in DIMENSION_COLUMNS and len(labels):
+                    new = labels.get_indexer(values)
+                    unseen &= new < 0
+                if unseen.any():
+                    c, uniques = pd.factorize(values[unseen])
+                    new[unseen] = len(labels) + c
+                    labels = labels.append(pd.Index(uniques))
+            codes[col] = np.concatenate([self.codes.get(col, np.full(n, -1, dtype="int32")), new.astype("int32")])
+            dictionaries[col] = labels
+        for col in AMOUNT_COLUMNS:
+            if col in self.amounts or col in df.columns:
+                added = to_minor_units(df[col], self.scale) if col in df.columns else np.zeros(k, dtype="int64")
+                amounts[col] = np.concatenate([self.amounts.get(col, np.zeros(n, dtype="int64")), added])
+        rest = [c for c in df.columns if c not in codes and c not in amounts]
+        other = pd.concat([self.other, df[rest]], ignore_index=True)
+        columns = self.columns + [c for c in df.columns if c not in self.columns]
+        return CompactLedger(codes, dictionaries, amounts, other, self.scale, columns)
+
+    def to_frame(self, columns=None) -> pd.DataFrame:
+        """Rebuild a DataFrame in the original (object/float) shape; only ``columns`` if given."""
+        columns = [c for c in (self.columns if columns is None else columns) if c in self.columns]
+        data = {}
+        for col in columns:
+            if col in self.codes:
+                labels = np.append(self.dictionaries[col].to_numpy(dtype=object), None)
+                data[col] = labels[self.codes[col]]  # code -1 -> None
+            elif col in self.amounts:
+                data[col] = from_minor_units(self.amounts[col], self.scale)
+            else:
+                data[col] = self.other[col].to_numpy()
+        return pd.DataFrame(data, columns=columns, index=pd.RangeIndex(len(self)))
+
+    # ---------- Basics ----------
+    def __len__(self):
+        return len(self.other)
+
+    def times(self):
+        """Date column as int64 nanoseconds (NaT -> int64 min), or None without dates."""
+        if "Date" not in self.other.columns:
+            return None
+        return self.other["Date"].to_numpy(dtype="datetime64[ns]").view("int64")
+
+    def memory_usage(self) -> int:
+        """Approximate bytes held, including dictionaries."""
+        total = sum(c.nbytes for c in self.codes.values())
+        total += sum(a.nbytes for a in self.amounts.values())
+        total += sum(int(d.memory_usage(deep=True)) for d in self.dictionaries.values())
+        total += int(self.other.memory_usage(index=False, deep=True).sum())
+        return total
+
+    def take(self, indexer):
+        """Return a new CompactLedger with the selected rows (mask or positions)."""
+        indexer = np.asarray(indexer)
+        codes = {k: v[indexer] for k, v in self.codes.items()}
+        amounts = {k: v[indexer] for k, v in self.amounts.items()}
+        other = self.other.iloc[indexer].reset_index(drop=True)
+        return CompactLedger(codes, self.dictionaries, amounts, other, self.scale, self.columns)
+
+    def code_of(self, column, label):
+        """Code for a label in a dimension column, or -2 if unknown."""
+        idx = self.dictionaries[column].get_indexer([label])[0]
+        return int(idx) if idx >= 0 else -2
+
+    def mask(self, column, labels):
+        """Boolean mask of rows whose dimension value is in ``labels``."""
+        if column not in self.codes:
+            return np.zeros(len(self), dtype=bool)
+        wanted = self.dictionaries[column].get_indexer(list(labels))
+        wanted = wanted[wanted >= 0]
+        return np.isin(self.codes[column], wanted)
+
+    # ---------- Aggregation ----------
+    def total(self, amount, mask=None) -> int:
+        """Exact sum of an amount column in minor units."""
+        values = self.amounts[amount]
+        if mask is not None:
+            values = values[mask]
+        return int(values.sum())
+
+    def sum_by(self, column, amounts=AMOUNT_COLUMNS) -> pd.DataFrame:
+        """Exact per-label sums (minor units) of ``amounts`` grouped by ``column``."""
+        codes = self.codes[column]
+        valid = codes >= 0
+        n = len(self.dictionaries[column])
+        out = {}
+        for amount in amounts:
+            # float64 weights are exact while per-label totals stay below 2**53 cents
+            sums = np.bincount(codes[valid], weights=self.amounts[amount][valid], minlength=n)
+            out[amount] = np.rint(sums).astype("int64")
+        present = np.bincount(codes[valid], minlength=n) > 0
+        frame = pd.DataFrame(out, index=self.dictionaries[column])
+        frame.index.name = column
+        return frame[present]
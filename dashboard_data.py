@@ -0,0 +1,127 @@
+"""Cached data access for the Streamlit dashboards.
+
+Every cached function takes a ``token`` from ``change_token`` as its first
+argument, so results are reused across reruns until the database changes and
+are recomputed on the first rerun after a write. Filter widgets are fed from
+DISTINCT / MIN / MAX queries and transaction grids fetch one page at a time,
+so a rerun never scans or renders the whole ledger. The analytics ledger is
+kept warm per table and extended with new rows after an insert.
+"""
+import contextlib
+import os
+import sqlite3
+
+import pandas as pd
+import streamlit as st
+
+from db_io import get_data_version, build_filter_clause
+from fx import BASE_CURRENCY
+from report_service import LedgerState
+
+FILTER_COLUMNS = ["Account", "Customer_Vendor", "Transaction_Type", "Payment_Method", "Currency"]
+PAGE_SIZE = 100
+
+
+def change_token(db_path="accounting.db", table_name="transactions"):
+    """Cheap per-rerun token: the table's data version (rows and FX rates).
+
+    Writes to other tables (ingest job progress, exceptions) leave it alone,
+    so they do not invalidate the dashboard caches.
+    """
+    return get_data_version(db_path, table_name)
+
+
+def _columns(conn, table_name):
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table_name})")]
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def table_summary(token, db_path="accounting.db", table_name="transactions"):
+    """``(row count, min date, max date)`` of the table; dates are None when empty."""
+    conn = sqlite3.connect(db_path)
+    try:
+        if not _columns(conn, table_name):
+            return 0, None, None
+        rows, min_date, max_date = conn.execute(
+            f"SELECT COUNT(*), MIN(NULLIF(Date, '')), MAX(NULLIF(Date, '')) FROM {table_name}"
+        ).fetchone()
+    finally:
+        conn.close()
+    to_date = lambda v: pd.to_datetime(v, errors="coerce").date() if v else None
+    return rows, to_date(min_date), to_date(max_date)
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def filter_options(token, db_path="accounting.db", table_name="transactions"):
+    """Sorted distinct non-empty values for each of ``FILTER_COLUMNS``."""
+    conn = sqlite3.connect(db_path)
+    try:
+        present = set(_columns(conn, table_name))
+        options = {}
+        for col in FILTER_COLUMNS:
+            if col not in present:
+                options[col] = []
+                continue
+            options[col] = [row[0] for row in conn.execute(
+                f"SELECT DISTINCT {col} FROM {table_name} WHERE {col} IS NOT NULL AND {col} != '' ORDER BY {col}"
+            )]
+    finally:
+        conn.close()
+    return options
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def count_rows(token, db_path="accounting.db", table_name="transactions", **filters):
+    """Number of rows matching ``filters`` (keyword filters of ``AccountingAnalytics.filter``)."""
+    where, params = build_filter_clause(**filters)
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table_name} WHERE 1=1{where}", params).fetchone()[0]
+    finally:
+        conn.close()
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def fetch_page(token, db_path="accounting.db", table_name="transactions", limit=PAGE_SIZE, offset=0, **filters):
+    """One page of rows matching ``filters``, ordered by Date (served by the Date index)."""
+    where, params = build_filter_clause(**filters)
+    conn = sqlite3.connect(db_path)
+    try:
+        return pd.read_sql(
+            f"SELECT * FROM {table_name} WHERE 1=1{where} ORDER BY Date, rowid LIMIT ? OFFSET ?",
+            conn, params=params + [int(limit), int(offset)],
+        )
+    finally:
+        conn.close()
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _ledger_state(db_path, table_name, reporting_currency, base_currency):
+    return LedgerState(db_path, table_name, reporting_currency=reporting_currency, warm=(),
+                       base_currency=base_currency)
+
+
+def load_analytics(db_path="accounting.db", table_name="transactions", reporting_currency=None,
+                   base_currency=BASE_CURRENCY):
+    """Parsed, indexed ``AccountingAnalytics`` for the table, shared across reruns and sessions.
+
+    The ledger is a cached ``report_service.LedgerState``: after an append it
+    is extended with the new rows only (period cube included); other changes
+    reload it. The data version is read together with the rows. Lines without
+    a Currency are taken to be in ``base_currency``.
+    """
+    state = _ledger_state(os.path.abspath(db_path), table_name, reporting_currency, base_currency)
+    with st.spinner("Loading ledger...") if state.analytics is None else contextlib.nullcontext():
+        state.refresh()
+    return state.analytics
+
+
+def paginated_table(token, db_path="accounting.db", table_name="transactions", key="rows", page_size=PAGE_SIZE,
+                    **filters):
+    """Render a server-side paginated grid with a page selector."""
+    total = count_rows(token, db_path, table_name, **filters)
+    pages = max(1, -(-total // page_size))
+    page = st.number_input("Page", min_value=1, max_value=pages, value=1, step=1, key=f"{key}_page")
+    rows = fetch_page(token, db_path, table_name, limit=page_size, offset=(page - 1) * page_size, **filters)
+    st.caption(f"{total:,} rows · page {page} of {pages}")
+    st.dataframe(rows, use_container_width=True)
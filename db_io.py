@@ -1,12 +1,81 @@
 # db_io.py
+import os
 import sqlite3
+import time
+import uuid
 import pandas as pd
 from datetime import datetime
 
+import metrics
+from validation import validate_entries, assign_document_ids
+
 DB_PATH = "journal_entries.db"
+# ledger_meta row versioning the fx_rates table; converted ledgers depend on it
+FX_VERSION_KEY = "fx_rates"
+
+# ---------- Data version ----------
+def bump_data_version(conn, table_name="journal_entries"):
+    """Increment the change counter for ``table_name`` (caller commits)."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS ledger_meta (
+        Table_Name TEXT PRIMARY KEY,
+        Version INTEGER NOT NULL DEFAULT 0
+    )
+    """)
+    conn.execute("""
+        INSERT INTO ledger_meta (Table_Name, Version) VALUES (?, 1)
+        ON CONFLICT(Table_Name) DO UPDATE SET Version = Version + 1
+    """, (table_name,))
+
+def get_data_version(db_path="accounting.db", table_name="journal_entries"):
+    """Hashable token ``(db file, table, counter, fx counter)`` identifying the table contents.
+
+    The counters are bumped by every write that changes the table's rows or the
+    FX rates, so equal tokens mean cached results computed from that table
+    (converted or not) are still valid.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        return read_data_version(conn, db_path, table_name)
+    finally:
+        conn.close()
+
+def read_data_version(conn, db_path, table_name="journal_entries"):
+    """``get_data_version`` on an open connection (e.g. inside a read transaction)."""
+    try:
+        versions = dict(conn.execute(
+            "SELECT Table_Name, Version FROM ledger_meta WHERE Table_Name IN (?, ?)", (table_name, FX_VERSION_KEY)
+        ).fetchall())
+    except sqlite3.OperationalError:
+        versions = {}
+    return (os.path.abspath(db_path), table_name, versions.get(table_name, 0), versions.get(FX_VERSION_KEY, 0))
+
+def fetch_versioned(db_path="accounting.db", table_name="journal_entries"):
+    """``(data version, rows)`` read in one transaction.
 
-def init_db():
-    conn = sqlite3.connect("accounting.db")
+    Both reads see the same snapshot, so a write landing between them cannot
+    leave new rows cached under an old version (or the reverse).
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("BEGIN")
+        version = read_data_version(conn, db_path, table_name)
+        exists = conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (table_name,)).fetchone()
+        df = pd.read_sql(f"SELECT * FROM {table_name}", conn) if exists else pd.DataFrame()
+        conn.rollback()
+    finally:
+        conn.close()
+    return version, df
+
+# Databases whose schema this process has already ensured
+_INITIALIZED = set()
+
+def init_db(db_path="accounting.db"):
+    """Create/migrate the journal_entries schema; runs once per process per database."""
+    key = (os.path.abspath(db_path), "journal_entries")
+    if key in _INITIALIZED and os.path.exists(db_path):
+        return
+    conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
 
     cursor.execute("""
@@ -22,43 +91,238 @@ def init_db():
         Customer_Vendor TEXT,
         Payment_Method TEXT,
         Reference TEXT,
+        Currency TEXT,
         PRIMARY KEY (JE_ID, Date, Account, Debit, Credit)
     )
     """)
+    ensure_column(conn, "journal_entries", "Currency", "TEXT")
+    ensure_search_index(conn)
+    ensure_filter_indexes(conn)
+    ensure_fx_table(conn)
     
     conn.commit()
     conn.close()
+    _INITIALIZED.add(key)
 
-# ---------- Insert ----------
-def insert_entries(entries, db_path="accounting.db"):
+def ensure_column(conn, table_name, column, col_type="TEXT"):
+    """Add ``column`` to an existing table created before it was introduced."""
+    existing = {row[1] for row in conn.execute(f"PRAGMA table_info({table_name})")}
+    if existing and column not in existing:
+        conn.execute(f"ALTER TABLE {table_name} ADD COLUMN {column} {col_type}")
+
+def ensure_filter_indexes(conn, table_name="journal_entries"):
+    """Indexes backing dashboard date ordering, range filters and distinct-value lists."""
+    for col in ("Date", "Account", "Customer_Vendor"):
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table_name}_{col.lower()} ON {table_name}({col})")
+
+# ---------- FX rates ----------
+def ensure_fx_table(conn):
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS fx_rates (
+        Date TEXT,
+        From_Currency TEXT,
+        To_Currency TEXT,
+        Rate REAL,
+        PRIMARY KEY (Date, From_Currency, To_Currency)
+    )
+    """)
+
+def insert_fx_rates(rates, db_path="accounting.db"):
+    """Upsert rates (1 From_Currency = Rate To_Currency, effective from Date)."""
+    rates = pd.DataFrame(rates)
+    rows = [
+        (pd.to_datetime(date).strftime("%Y-%m-%d"), str(src).strip().upper(), str(dst).strip().upper(), float(rate))
+        for date, src, dst, rate in rates[["Date", "From_Currency", "To_Currency", "Rate"]].itertuples(index=False)
+    ]
     conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    ensure_fx_table(conn)
+    conn.executemany("INSERT OR REPLACE INTO fx_rates (Date, From_Currency, To_Currency, Rate) VALUES (?, ?, ?, ?)", rows)
+    bump_data_version(conn, FX_VERSION_KEY)
+    conn.commit()
+    conn.close()
+    return len(rows)
 
-    # Create table if it doesn't exist with correct schema
-    cursor.execute("""
-    CREATE TABLE IF NOT EXISTS journal_entries (
+def fetch_fx_rates(db_path="accounting.db"):
+    conn = sqlite3.connect(db_path)
+    ensure_fx_table(conn)
+    df = pd.read_sql("SELECT * FROM fx_rates ORDER BY Date", conn)
+    conn.close()
+    return df
+
+# ---------- Full-text search ----------
+SEARCH_COLUMNS = ["Description", "Customer_Vendor", "Reference", "Account"]
+
+def ensure_search_index(conn, table_name="journal_entries"):
+    """Create the FTS5 index for ``table_name`` and its sync triggers if missing.
+
+    The index is an external-content FTS5 table (``<table>_fts``) over
+    ``SEARCH_COLUMNS``. Triggers handle updates and deletes; inserts are
+    indexed in bulk by ``sync_search_index`` from the write paths, which is
+    several times faster than a per-row trigger. Existing rows are indexed
+    once when the index is first created.
+    """
+    fts = f"{table_name}_fts"
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name=?", (fts,)).fetchone():
+        return
+    cols = ", ".join(SEARCH_COLUMNS)
+    new_cols = ", ".join(f"new.{c}" for c in SEARCH_COLUMNS)
+    old_cols = ", ".join(f"old.{c}" for c in SEARCH_COLUMNS)
+    conn.executescript(f"""
+    CREATE VIRTUAL TABLE {fts} USING fts5(
+        {cols}, content='{table_name}', content_rowid='rowid'
+    );
+    CREATE TRIGGER {fts}_ad AFTER DELETE ON {table_name} BEGIN
+        INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_cols});
+    END;
+    CREATE TRIGGER {fts}_au AFTER UPDATE ON {table_name} BEGIN
+        INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.rowid, {old_cols});
+        INSERT INTO {fts}(rowid, {cols}) VALUES (new.rowid, {new_cols});
+    END;
+    INSERT INTO {fts}({fts}) VALUES ('rebuild');
+    """)
+
+def max_rowid(conn, table_name="journal_entries"):
+    return conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table_name}").fetchone()[0]
+
+def sync_search_index(conn, table_name="journal_entries", after_rowid=0):
+    """Index rows inserted since ``after_rowid`` (caller commits)."""
+    cols = ", ".join(SEARCH_COLUMNS)
+    conn.execute(
+        f"INSERT INTO {table_name}_fts(rowid, {cols}) SELECT rowid, {cols} FROM {table_name} WHERE rowid > ?",
+        (after_rowid,),
+    )
+
+def build_match_query(text):
+    """Turn search-box text into an FTS5 MATCH expression.
+
+    ``"quoted text"`` becomes a phrase query; every other word becomes a prefix
+    query (``inv`` matches ``INV-001``). All parts must match.
+    """
+    parts = []
+    for i, chunk in enumerate(str(text).split('"')):
+        if i % 2:  # inside quotes
+            if chunk.strip():
+                parts.append('"' + chunk.strip() + '"')
+        else:
+            parts.extend('"' + word.replace('"', '') + '"*' for word in chunk.split() if word.replace('"', ''))
+    return " ".join(parts)
+
+def build_filter_clause(start_date=None, end_date=None, accounts=None, customers=None,
+                        txn_types=None, payment_methods=None, alias=""):
+    """SQL WHERE fragment (starting with AND) and params matching ``AccountingAnalytics.filter``."""
+    prefix = f"{alias}." if alias else ""
+    sql, params = "", []
+    if start_date is not None:
+        sql += f" AND {prefix}Date >= ?"
+        params.append(pd.to_datetime(start_date).strftime("%Y-%m-%d"))
+    if end_date is not None:
+        sql += f" AND {prefix}Date <= ?"
+        params.append(pd.to_datetime(end_date).strftime("%Y-%m-%d"))
+    for col, values in (("Account", accounts), ("Customer_Vendor", customers),
+                        ("Transaction_Type", txn_types), ("Payment_Method", payment_methods)):
+        if values:
+            values = list(values)
+            sql += f" AND {prefix}{col} IN ({', '.join('?' * len(values))})"
+            params.extend(values)
+    return sql, params
+
+def search_entries(text, db_path="accounting.db", table_name="journal_entries", limit=50, offset=0, **filters):
+    """Full-text search over ``SEARCH_COLUMNS``; returns ``(page DataFrame, total matches)``.
+
+    Results are ranked by relevance and paginated with ``limit``/``offset``;
+    ``filters`` are the same keyword filters as ``AccountingAnalytics.filter``.
+    """
+    match = build_match_query(text)
+    if not match:
+        return pd.DataFrame(), 0
+    fts = f"{table_name}_fts"
+    where, params = build_filter_clause(alias="t", **filters)
+    base = f"""
+        FROM {fts} JOIN {table_name} t ON t.rowid = {fts}.rowid
+        WHERE {fts} MATCH ?{where}
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        ensure_search_index(conn, table_name)
+        total = conn.execute(f"SELECT COUNT(*) {base}", [match] + params).fetchone()[0]
+        page = pd.read_sql(f"SELECT t.* {base} ORDER BY rank LIMIT ? OFFSET ?", conn,
+                           params=[match] + params + [int(limit), int(offset)])
+    finally:
+        conn.close()
+    return page, total
+
+# ---------- Ingest exceptions ----------
+def record_exceptions(conn, exceptions, batch_id, table_name="journal_entries"):
+    """Store validation exceptions for a rejected batch (caller commits)."""
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS journal_exceptions (
+        Batch_ID TEXT,
+        Table_Name TEXT,
         JE_ID TEXT,
-        Date TEXT,
-        Account TEXT,
-        Description TEXT,
-        Debit REAL,
-        Credit REAL,
-        Category TEXT,
-        Transaction_Type TEXT,
-        Customer_Vendor TEXT,
-        Payment_Method TEXT,
-        Reference TEXT,
-        PRIMARY KEY (JE_ID, Date, Account, Debit, Credit)
+        Rule TEXT,
+        Detail TEXT,
+        Created_At DATETIME DEFAULT CURRENT_TIMESTAMP
     )
     """)
+    # Re-submitting the same batch replaces its earlier exceptions
+    conn.execute("DELETE FROM journal_exceptions WHERE Batch_ID = ?", (batch_id,))
+    conn.executemany(
+        "INSERT INTO journal_exceptions (Batch_ID, Table_Name, JE_ID, Rule, Detail) VALUES (?, ?, ?, ?, ?)",
+        [(batch_id, table_name, je, rule, detail) for je, rule, detail in
+         exceptions[["JE_ID", "Rule", "Detail"]].itertuples(index=False)],
+    )
+
+def fetch_exceptions(db_path="accounting.db", batch_id=None, table_name=None):
+    """Exceptions recorded for rejected batches, newest first."""
+    conn = sqlite3.connect(db_path)
+    query = "SELECT * FROM journal_exceptions WHERE 1=1"
+    params = []
+    if batch_id is not None:
+        query += " AND Batch_ID = ?"
+        params.append(batch_id)
+    if table_name is not None:
+        query += " AND Table_Name = ?"
+        params.append(table_name)
+    try:
+        return pd.read_sql(query + " ORDER BY Created_At DESC", conn, params=params)
+    except Exception:
+        return pd.DataFrame(columns=["Batch_ID", "Table_Name", "JE_ID", "Rule", "Detail", "Created_At"])
+    finally:
+        conn.close()
+
+# ---------- Insert ----------
+def insert_entries(entries, db_path="accounting.db", validate=True, batch_id=None):
+    """Insert line-level entries; returns False if the batch fails validation.
+
+    With ``validate`` the whole batch is checked per JE_ID (see
+    ``validation.validate_entries``) before anything is written; a failing batch
+    is not inserted and its exceptions go to ``journal_exceptions`` under
+    ``batch_id``. Lines without a JE_ID share one generated ID for the batch
+    (see ``validation.assign_document_ids``), so they are balance-checked and
+    stored as one entry.
+    """
+    started = time.perf_counter()
+    # Create/migrate the schema (once per process)
+    init_db(db_path)
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    entries = list(entries)
+    frame = assign_document_ids(pd.DataFrame(entries))
+    if "JE_ID" in frame.columns:
+        entries = [dict(e, JE_ID=je) for e, je in zip(entries, frame["JE_ID"])]
+    if validate:
+        exceptions = validate_entries(frame)
+        if not exceptions.empty:
+            record_exceptions(conn, exceptions, batch_id or f"B-{uuid.uuid4().hex[:8]}")
+            conn.commit()
+            conn.close()
+            metrics.inc("accounting_db_batches_rejected_total", table="journal_entries")
+            return False
 
     rows_to_insert = []
     for e in entries:
-        # Handle JE_ID - generate if not present
         je_id = e.get("JE_ID")
-        if not je_id:
-            import uuid
-            je_id = f"JE-{uuid.uuid4().hex[:8]}"
         
         # Convert date to string format - FIX FOR TIMESTAMP ISSUE
         date_value = e.get("Date")
@@ -73,6 +337,10 @@ def insert_entries(entries, db_path="accounting.db"):
         debit = pd.to_numeric(e.get("Debit", 0), errors='coerce') or 0
         credit = pd.to_numeric(e.get("Credit", 0), errors='coerce') or 0
 
+        # ISO code as extracted; NaN/blank means the ledger's own currency
+        currency = e.get("Currency")
+        currency = (currency.strip().upper() or None) if isinstance(currency, str) else None
+
         rows_to_insert.append((
             je_id,
             date_value,  # Now properly converted to string
@@ -84,20 +352,28 @@ def insert_entries(entries, db_path="accounting.db"):
             e.get("Transaction_Type"),
             e.get("Customer_Vendor"),
             e.get("Payment_Method"),
-            e.get("Reference")
+            e.get("Reference"),
+            currency
         ))
 
     # Insert new rows with conflict handling
+    inserted = 0
     if rows_to_insert:
+        last_rowid = max_rowid(conn)
         cursor.executemany("""
             INSERT OR IGNORE INTO journal_entries (
                 JE_ID, Date, Account, Description, Debit, Credit, 
-                Category, Transaction_Type, Customer_Vendor, Payment_Method, Reference
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                Category, Transaction_Type, Customer_Vendor, Payment_Method, Reference, Currency
+            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         """, rows_to_insert)
+        inserted = cursor.rowcount
+        if inserted:
+            sync_search_index(conn, after_rowid=last_rowid)
+            bump_data_version(conn)
         conn.commit()
 
     conn.close()
+    metrics.record_insert("journal_entries", inserted, time.perf_counter() - started)
     return True
 
 # ---------- Fetch ----------
@@ -132,6 +408,7 @@ def reset_db(db_path=DB_PATH):
     """Clear the journal_entries table (useful for testing)."""
     conn = sqlite3.connect(db_path)
     conn.execute("DELETE FROM journal_entries")
+    bump_data_version(conn)
     conn.commit()
     conn.close()
     print("🗑️ Cleared journal_entries table")
@@ -140,14 +417,26 @@ if __name__ == "__main__":
     # Example test
     dummy_entries = [
         {
+            "JE_ID": "JE-001",
+            "Date": "2025-09-25",
+            "Account": "Accounts Receivable",
+            "Description": "Invoice 001",
+            "Debit": 1000,
+            "Credit": 0,
+            "Category": "Asset",
+            "Transaction_Type": "Invoice",
+            "Customer_Vendor": "Client A",
+            "Payment_Method": None,
+            "Reference": "INV-001"
+        },
+        {
+            "JE_ID": "JE-001",
             "Date": "2025-09-25",
+            "Account": "Revenue",
             "Description": "Invoice 001",
-            "Debit_Account": "Accounts Receivable",
-            "Debit_Category": "Asset",
-            "Debit_Amount": 1000,
-            "Credit_Account": "Revenue",
-            "Credit_Category": "Revenue",
-            "Credit_Amount": 1000,
+            "Debit": 0,
+            "Credit": 1000,
+            "Category": "Revenue",
             "Transaction_Type": "Invoice",
             "Customer_Vendor": "Client A",
             "Payment_Method": None,
@@ -1,9 +1,23 @@
+import os
 import sqlite3
+import time
+import uuid
 import pandas as pd
 from pathlib import Path
 
+import metrics
+from db_io import bump_data_version, record_exceptions, ensure_search_index, max_rowid, sync_search_index, ensure_column, \
+    ensure_filter_indexes
+from validation import validate_entries, assign_document_ids
+
+# Databases whose schema this process has already ensured
+_INITIALIZED = set()
+
 def init_database(db_path="accounting.db"):
-    """Initialize database with required tables"""
+    """Initialize database with required tables (once per process per database)"""
+    key = os.path.abspath(db_path)
+    if key in _INITIALIZED and os.path.exists(db_path):
+        return True
     conn = sqlite3.connect(db_path)
     cursor = conn.cursor()
     
@@ -11,6 +25,7 @@ def init_database(db_path="accounting.db"):
     cursor.execute('''
     CREATE TABLE IF NOT EXISTS transactions (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
+        JE_ID TEXT,
         Date TEXT,
         Account TEXT,
         Description TEXT,
@@ -21,21 +36,48 @@ def init_database(db_path="accounting.db"):
         Customer_Vendor TEXT,
         Payment_Method TEXT,
         Reference TEXT,
+        Currency TEXT,
         upload_timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
     )
     ''')
+    ensure_column(conn, "transactions", "Currency", "TEXT")
+    ensure_column(conn, "transactions", "JE_ID", "TEXT")
+    ensure_search_index(cursor.connection, "transactions")
+    ensure_filter_indexes(conn, "transactions")
     
     conn.commit()
     conn.close()
+    _INITIALIZED.add(key)
     return True
 
-def insert_dataframe_to_db(df, db_path="accounting.db", table_name="transactions"):
-    """Insert a DataFrame into the database"""
+def insert_dataframe_to_db(df, db_path="accounting.db", table_name="transactions", validate=True, batch_id=None):
+    """Insert a DataFrame into the database.
+
+    The batch is validated first (see ``validation.validate_entries``); if it
+    fails, nothing is inserted, exceptions are recorded and False is returned.
+    Lines without a JE_ID are checked and stored as one entry per uploaded
+    file (see ``validation.assign_document_ids``).
+    """
+    started = time.perf_counter()
     init_database(db_path)
     
+    df = assign_document_ids(df)
     conn = sqlite3.connect(db_path)
     try:
+        if validate:
+            exceptions = validate_entries(df)
+            if not exceptions.empty:
+                record_exceptions(conn, exceptions, batch_id or f"B-{uuid.uuid4().hex[:8]}", table_name)
+                conn.commit()
+                print(f"Batch rejected: {len(exceptions)} validation exception(s)")
+                metrics.inc("accounting_db_batches_rejected_total", table=table_name)
+                return False
+        last_rowid = max_rowid(conn, table_name)
         df.to_sql(table_name, conn, if_exists="append", index=False)
+        sync_search_index(conn, table_name, last_rowid)
+        bump_data_version(conn, table_name)
+        conn.commit()
+        metrics.record_insert(table_name, len(df), time.perf_counter() - started)
         return True
     except Exception as e:
         print(f"Error inserting data: {e}")
@@ -0,0 +1,278 @@
+import numpy as np
+import pandas as pd
+
+from compact_ledger import to_minor_units, from_minor_units
+
+# Columns whose values make up a line's fingerprint for exact duplicates
+SIGNATURE_COLUMNS = ["Date", "Account", "Debit", "Credit", "Customer_Vendor", "Reference"]
+# Columns the duplicate check reads
+DOCUMENT_COLUMNS = ["JE_ID"] + SIGNATURE_COLUMNS
+# Blocking keys use amounts rounded to whole currency units and dates bucketed by week
+AMOUNT_BLOCK = 100
+DATE_BUCKET_DAYS = 7
+NO_DATE = np.iinfo("int64").min // 2
+# Near-duplicate score weights (sum to 1.0)
+WEIGHTS = {"amount": 0.35, "party": 0.25, "reference": 0.25, "date": 0.15}
+DUPLICATE_COLUMNS = ["JE_ID_A", "JE_ID_B", "Match_Type", "Score", "Customer_Vendor",
+                     "Amount_A", "Amount_B", "Date_A", "Date_B", "Reference_A", "Reference_B"]
+
+
+def _normalized(values):
+    """Case/punctuation-insensitive text ("" for missing/blank)."""
+    codes, uniques = pd.factorize(values)
+    clean = pd.Index(uniques.astype(str)).str.lower().str.replace(r"[^0-9a-z]", "", regex=True)
+    return np.append(clean.to_numpy(dtype=object), "")[codes]  # code -1 -> ""
+
+
+def _normalized_codes(values):
+    """Codes for case/punctuation-insensitive text (-1 for missing/blank)."""
+    clean = _normalized(values)
+    codes, _ = pd.factorize(clean)
+    return np.where(clean == "", -1, codes).astype("int64")
+
+
+def _days(docs):
+    days = docs["Date"].to_numpy(dtype="datetime64[D]").astype("int64")
+    return np.where(pd.isna(docs["Date"]).to_numpy(), NO_DATE, days)
+
+
+def _rounded(amount):
+    return (amount + AMOUNT_BLOCK // 2) // AMOUNT_BLOCK
+
+
+def _documents(df):
+    """One row per journal entry; a line without a JE_ID is a document of its own (``Line:<index>``)."""
+    n = len(df)
+    if "JE_ID" in df.columns:
+        je = df["JE_ID"].astype(object)
+        doc_id = je.where(je.notna() & (je.astype(str).str.strip() != ""), None).to_numpy(dtype=object)
+    else:
+        doc_id = np.full(n, None, dtype=object)
+    doc, doc_labels = pd.factorize(doc_id)  # missing -> -1
+    alone = np.flatnonzero(doc < 0)
+    doc[alone] = len(doc_labels) + np.arange(len(alone))
+    doc_labels = np.concatenate([np.asarray(doc_labels, dtype=object),
+                                 np.array([f"Line:{i}" for i in df.index[alone]], dtype=object)])
+    # Normalize types so a raw upload and a parsed ledger hash the same way; a
+    # missing column hashes like an empty one
+    sig = {}
+    for col in SIGNATURE_COLUMNS:
+        values = df[col] if col in df.columns else pd.Series(None, index=df.index, dtype=object)
+        if col == "Date":
+            sig[col] = pd.to_datetime(values, errors="coerce").to_numpy(dtype="datetime64[ns]")
+        elif col in ("Debit", "Credit"):
+            sig[col] = to_minor_units(values)
+        else:
+            sig[col] = values.astype(object).where(values.notna(), "").to_numpy(dtype=object)
+    line_hash = pd.util.hash_pandas_object(pd.DataFrame(sig), index=False).to_numpy()
+
+    signature = np.zeros(len(doc_labels), dtype="uint64")
+    np.add.at(signature, doc, line_hash)  # order-independent, wraps on overflow
+    amount = np.zeros(len(doc_labels), dtype="int64")
+    np.add.at(amount, doc, sig["Debit"])
+
+    lines = pd.DataFrame({
+        "Doc": doc,
+        "Date": sig["Date"],
+        "Party": df["Customer_Vendor"].to_numpy(dtype=object) if "Customer_Vendor" in df.columns else None,
+        "Reference": df["Reference"].to_numpy(dtype=object) if "Reference" in df.columns else None,
+    })
+    docs = lines.groupby("Doc", sort=True).agg(Date=("Date", "min"), Party=("Party", "first"),
+                                                Reference=("Reference", "first"))
+    docs["JE_ID"] = np.asarray(doc_labels, dtype=object)
+    docs["Amount"] = amount
+    docs["Signature"] = signature
+    return docs.reset_index(drop=True)
+
+
+def _neighbour_pairs(block, days, window, max_neighbors):
+    """Pairs (i, j) sharing ``block`` (>= 0) within ``window`` days.
+
+    Sorted-neighbourhood: sort by (block, date) and compare each document with
+    the next ``max_neighbors`` ones only, instead of every pair in the block.
+    """
+    valid = np.flatnonzero(block >= 0)
+    order = valid[np.lexsort((days[valid], block[valid]))]
+    b, d = block[order], days[order]
+    left, right = [], []
+    for k in range(1, max_neighbors + 1):
+        if k >= len(order):
+            break
+        hit = (b[:-k] == b[k:]) & (d[k:] - d[:-k] <= window)
+        left.append(order[:-k][hit])
+        right.append(order[k:][hit])
+    if not left:
+        return np.empty(0, dtype="int64"), np.empty(0, dtype="int64")
+    return np.concatenate(left), np.concatenate(right)
+
+
+def _report(docs, is_new=None, date_window=7, max_neighbors=5):
+    """Scored pairs among ``docs``; with ``is_new`` only pairs involving a new document."""
+    party = _normalized_codes(docs["Party"].to_numpy(dtype=object))
+    reference = _normalized_codes(docs["Reference"].to_numpy(dtype=object))
+    amount = docs["Amount"].to_numpy()
+    rounded = _rounded(amount)
+    days = _days(docs)
+    # Blocking keys: (vendor, rounded amount) and Reference
+    vendor_amount = pd.DataFrame({"P": party, "A": rounded}).groupby(["P", "A"], sort=False).ngroup().to_numpy(dtype="int64")
+    vendor_amount = np.where((party >= 0) & (amount > 0), vendor_amount, -1)
+    signature = docs["Signature"].to_numpy()
+
+    # Exact: same signature -> pair every copy with the first one
+    sig_codes = pd.factorize(signature)[0].astype("int64")
+    order = np.lexsort((days, sig_codes))
+    first = np.r_[True, sig_codes[order][1:] != sig_codes[order][:-1]]
+    head = np.maximum.accumulate(np.where(first, np.arange(len(order)), 0))
+    exact_a, exact_b = order[head][~first], order[~first]
+
+    # Near: sorted neighbourhood inside each blocking key
+    pairs = [_neighbour_pairs(vendor_amount, days, date_window, max_neighbors),
+             _neighbour_pairs(reference, days, date_window, max_neighbors)]
+    near_a = np.concatenate([p[0] for p in pairs])
+    near_b = np.concatenate([p[1] for p in pairs])
+
+    a = np.concatenate([exact_a, near_a])
+    b = np.concatenate([exact_b, near_b])
+    exact = np.r_[np.ones(len(exact_a), dtype=bool), np.zeros(len(near_a), dtype=bool)]
+    if is_new is not None:
+        involves_new = is_new[a] | is_new[b]
+        a, b, exact = a[involves_new], b[involves_new], exact[involves_new]
+    if not len(a):
+        return pd.DataFrame(columns=DUPLICATE_COLUMNS)
+
+    gap = np.abs(days[a] - days[b])
+    # Same rounded amount but different cents earns half the amount weight
+    amount_match = np.where(amount[a] == amount[b], 1.0, np.where(rounded[a] == rounded[b], 0.5, 0.0))
+    score = (WEIGHTS["amount"] * amount_match
+             + WEIGHTS["party"] * ((party[a] == party[b]) & (party[a] >= 0))
+             + WEIGHTS["reference"] * ((reference[a] == reference[b]) & (reference[a] >= 0))
+             + WEIGHTS["date"] * np.clip(1 - gap / (date_window + 1), 0, 1))
+    score = np.where(exact, 1.0, score)
+
+    lo, hi = np.minimum(a, b), np.maximum(a, b)
+    out = pd.DataFrame({
+        "A": lo, "B": hi, "Match_Type": np.where(exact, "Exact", "Near"), "Score": score.round(3),
+    }).sort_values("Score", ascending=False).drop_duplicates(["A", "B"])
+    ia, ib = out["A"].to_numpy(), out["B"].to_numpy()
+    report = pd.DataFrame({
+        "JE_ID_A": docs["JE_ID"].to_numpy()[ia],
+        "JE_ID_B": docs["JE_ID"].to_numpy()[ib],
+        "Match_Type": out["Match_Type"].to_numpy(),
+        "Score": out["Score"].to_numpy(),
+        "Customer_Vendor": docs["Party"].to_numpy()[ia],
+        "Amount_A": from_minor_units(amount[ia]),
+        "Amount_B": from_minor_units(amount[ib]),
+        "Date_A": docs["Date"].to_numpy()[ia],
+        "Date_B": docs["Date"].to_numpy()[ib],
+        "Reference_A": docs["Reference"].to_numpy()[ia],
+        "Reference_B": docs["Reference"].to_numpy()[ib],
+    })
+    return report.reset_index(drop=True)
+
+
+def _block_keys(docs, spread=0):
+    """``{block: (key hashes, document positions)}`` for the signature and the
+    (vendor, rounded amount, date bucket) and (Reference, date bucket) blocks.
+
+    With ``spread`` each document also gets the keys of the ``spread`` date
+    buckets on either side, so a lookup finds neighbours across a bucket edge.
+    """
+    party = _normalized(docs["Party"].to_numpy(dtype=object))
+    reference = _normalized(docs["Reference"].to_numpy(dtype=object))
+    amount = docs["Amount"].to_numpy()
+    bucket = _days(docs) // DATE_BUCKET_DAYS
+    keys = {"signature": (docs["Signature"].to_numpy(), np.arange(len(docs)))}
+    shifts = np.arange(-spread, spread + 1)
+    for name, text, extra, valid in (("vendor", party, _rounded(amount), (party != "") & (amount > 0)),
+                                     ("reference", reference, np.zeros(len(docs), dtype="int64"), reference != "")):
+        rows = np.repeat(np.flatnonzero(valid), len(shifts))
+        hashed = pd.util.hash_pandas_object(pd.DataFrame({
+            "Text": text[rows], "Extra": extra[rows], "Bucket": bucket[rows] + np.tile(shifts, len(rows) // len(shifts)),
+        }), index=False).to_numpy()
+        keys[name] = (hashed, rows)
+    return keys
+
+
+def _ranges(lo, hi):
+    """Concatenated ``arange(lo[i], hi[i])``."""
+    lengths = hi - lo
+    starts = np.repeat(lo - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+    return starts + np.arange(lengths.sum())
+
+
+class DocumentIndex:
+    """Per-document signatures and blocking keys of a ledger, to check new batches against it.
+
+    Each block keeps its key hashes sorted, so a batch looks up only the ledger
+    documents in its own blocks (and the neighbouring date buckets) instead of
+    scanning the ledger. ``extend`` adds the documents of appended rows; a
+    JE_ID whose lines arrive in different appends counts once per append.
+    """
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.blocks = {}
+        for name, (keys, rows) in _block_keys(docs).items():
+            order = np.argsort(keys, kind="stable")
+            self.blocks[name] = (keys[order], rows[order])
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame):
+        return cls(_documents(df if not df.empty else pd.DataFrame(columns=DOCUMENT_COLUMNS)))
+
+    def __len__(self):
+        return len(self.docs)
+
+    def extend(self, df: pd.DataFrame):
+        """Index of this ledger with the rows of ``df`` appended; only the new documents are hashed."""
+        if df.empty:
+            return self
+        new_docs = _documents(df)
+        index = DocumentIndex.__new__(DocumentIndex)
+        index.docs = pd.concat([self.docs, new_docs], ignore_index=True)
+        index.blocks = {}
+        for name, (keys, rows) in _block_keys(new_docs).items():
+            order = np.argsort(keys, kind="stable")
+            old_keys, old_rows = self.blocks[name]
+            at = np.searchsorted(old_keys, keys[order], side="right")
+            index.blocks[name] = (np.insert(old_keys, at, keys[order]),
+                                  np.insert(old_rows, at, rows[order] + len(self.docs)))
+        return index
+
+    def find(self, new_entries: pd.DataFrame, date_window=7, max_neighbors=5):
+        """``find_duplicates(ledger, new_entries)`` over the ledger documents sharing a block with the batch."""
+        if new_entries.empty:
+            return pd.DataFrame(columns=DUPLICATE_COLUMNS)
+        new_docs = _documents(new_entries)
+        spread = -(-date_window // DATE_BUCKET_DAYS)
+        hits = []
+        for name, (keys, _) in _block_keys(new_docs, spread).items():
+            sorted_keys, rows = self.blocks[name]
+            lo = np.searchsorted(sorted_keys, keys, side="left")
+            hi = np.searchsorted(sorted_keys, keys, side="right")
+            hits.append(rows[_ranges(lo, hi)])
+        candidates = np.unique(np.concatenate(hits))
+        docs = pd.concat([self.docs.iloc[candidates], new_docs], ignore_index=True)
+        is_new = np.r_[np.zeros(len(candidates), dtype=bool), np.ones(len(new_docs), dtype=bool)]
+        return _report(docs, is_new, date_window, max_neighbors)
+
+
+def find_duplicates(df: pd.DataFrame, new_entries: pd.DataFrame = None, date_window=7, max_neighbors=5):
+    """Scored report of duplicate and near-duplicate journal entries.
+
+    Exact duplicates are entries whose lines hash identically (ignoring JE_ID),
+    e.g. an OCR re-run or CSV re-upload. Near duplicates share a blocking key,
+    either (vendor, rounded amount) or Reference, and are dated within
+    ``date_window`` days; only neighbours inside a block are compared. Score is
+    1.0 for exact duplicates, otherwise a weighted match of amount, vendor,
+    reference and date proximity.
+
+    With ``new_entries`` only pairs involving at least one new entry are
+    reported, and only ledger entries in the batch's blocks are compared (see
+    ``DocumentIndex``; keep one per ledger to avoid re-hashing it per batch).
+    """
+    if new_entries is not None:
+        return DocumentIndex.from_frame(df).find(new_entries, date_window, max_neighbors)
+    if df.empty:
+        return pd.DataFrame(columns=DUPLICATE_COLUMNS)
+    return _report(_documents(df), None, date_window, max_neighbors)
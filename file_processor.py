@@ -34,10 +34,9 @@ def process_uploaded_file(uploaded_file):
             if col in df.columns:
                 df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
         
-        # Generate JE_ID if not present
-        if "JE_ID" not in df.columns:
-            import uuid
-            df["JE_ID"] = [f"JE-{uuid.uuid4().hex[:8]}" for _ in range(len(df))]
+        # JE_ID is left as supplied; both ledger tables store it, and lines sharing
+        # one are validated as one balanced entry at insert time (lines without
+        # one get a shared ID per file)
                 
         return df
         
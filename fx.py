@@ -0,0 +1,116 @@
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+
+from metrics import log_event
+
+# fx_rates rows: 1 From_Currency = Rate To_Currency, effective from Date
+FX_COLUMNS = ["Date", "From_Currency", "To_Currency", "Rate"]
+
+# The ledger's own currency: lines stored without a Currency are in this one
+BASE_CURRENCY = os.environ.get("ACCOUNTING_BASE_CURRENCY", "USD").strip().upper()
+
+
+def normalize_currency(values, default=None):
+    """Upper-cased ISO codes; missing/blank become ``default``."""
+    values = pd.Series(values, dtype=object)
+    # Clean the distinct codes only, then map back
+    codes, uniques = pd.factorize(values)
+    clean = pd.Series(uniques, dtype=object).str.strip().str.upper()
+    clean = clean.where(clean.notna() & (clean != ""), default)
+    return pd.Series(np.append(clean.to_numpy(dtype=object), default)[codes], index=values.index, dtype=object)
+
+
+def rates_to(rates: pd.DataFrame, reporting_currency):
+    """Rates into ``reporting_currency`` as ``Date, Currency, Rate``, sorted by Date.
+
+    Direct quotes (X -> reporting) are used as-is; reverse quotes
+    (reporting -> X) are inverted. A direct quote wins on the same date.
+    """
+    if rates is None or rates.empty:
+        return pd.DataFrame({"Date": pd.Series(dtype="datetime64[ns]"), "Currency": pd.Series(dtype=object),
+                             "Rate": pd.Series(dtype="float64")})
+    r = pd.DataFrame({
+        "Date": pd.to_datetime(rates["Date"], errors="coerce"),
+        "From": normalize_currency(rates["From_Currency"]).to_numpy(),
+        "To": normalize_currency(rates["To_Currency"]).to_numpy(),
+        "Rate": pd.to_numeric(rates["Rate"], errors="coerce"),
+    })
+    r = r[r["Date"].notna() & (r["Rate"] > 0)]
+    direct = r[r["To"] == reporting_currency]
+    inverse = r[(r["From"] == reporting_currency) & (r["To"] != reporting_currency)]
+    out = pd.concat([
+        pd.DataFrame({"Date": direct["Date"], "Currency": direct["From"], "Rate": direct["Rate"], "Direct": 1}),
+        pd.DataFrame({"Date": inverse["Date"], "Currency": inverse["To"], "Rate": 1 / inverse["Rate"], "Direct": 0}),
+    ], ignore_index=True)
+    out = out.sort_values(["Date", "Currency", "Direct"]).drop_duplicates(["Date", "Currency"], keep="last")
+    return out[["Date", "Currency", "Rate"]].reset_index(drop=True)
+
+
+def _allocate_cents(amount, rate, groups):
+    """``amount * rate`` rounded to cents so each group's total is its converted total rounded.
+
+    Lines are floored to cents and the leftover cents of a group go to the
+    lines with the largest remainders, so a group that balanced before
+    conversion (same cents on both sides, one rate) still balances after.
+    """
+    cents = np.rint(amount * 100)
+    exact = cents * rate
+    floor = np.floor(exact)
+    totals = pd.DataFrame({"g": groups, "cents": cents, "floor": floor}).groupby("g", sort=False)
+    target = np.rint(totals["cents"].transform("sum").to_numpy() * rate)
+    short = target - totals["floor"].transform("sum").to_numpy()
+    # Rank lines within their group by remainder, largest first
+    order = np.lexsort((-(exact - floor), groups))
+    rank = np.empty(len(order), dtype=np.int64)
+    rank[order] = pd.Series(groups[order]).groupby(groups[order], sort=False).cumcount().to_numpy()
+    return (floor + (rank < short)) / 100
+
+
+def convert_currency(df: pd.DataFrame, rates: pd.DataFrame, reporting_currency, default_currency=BASE_CURRENCY):
+    """Copy of ``df`` with Debit/Credit converted to ``reporting_currency``.
+
+    Each line takes the latest rate dated on or before its Date (one as-of
+    merge by Currency, no per-row lookups). Original amounts are kept in
+    Debit_Original/Credit_Original and the rate in FX_Rate. Lines without a
+    Currency are in ``default_currency`` (the ledger's base currency). Lines
+    with no rate available keep their original amounts and FX_Rate NaN.
+
+    Converted amounts are rounded to cents per journal entry (JE_ID) and rate,
+    not per line, so balanced entries stay balanced.
+    """
+    reporting_currency = str(reporting_currency).upper()
+    out = df.copy()
+    n = len(out)
+    currency = normalize_currency(out["Currency"] if "Currency" in out.columns else [None] * n,
+                                  default_currency.upper() if default_currency else reporting_currency)
+    dates = pd.to_datetime(out["Date"], errors="coerce") if "Date" in out.columns else pd.Series(pd.NaT, index=range(n))
+    rate = np.where((currency == reporting_currency).to_numpy(), 1.0, np.nan)
+
+    foreign = np.flatnonzero(np.isnan(rate) & dates.notna().to_numpy())
+    table = rates_to(rates, reporting_currency)
+    if len(foreign) and not table.empty:
+        left = pd.DataFrame({"Pos": foreign, "Date": dates.to_numpy()[foreign],
+                             "Currency": currency.to_numpy()[foreign]}).sort_values("Date", kind="stable")
+        looked_up = pd.merge_asof(left, table, on="Date", by="Currency", direction="backward")
+        rate[looked_up["Pos"].to_numpy()] = looked_up["Rate"].to_numpy()
+
+    missing = np.isnan(rate)
+    if missing.any():
+        log_event("fx_rate_missing", level=logging.WARNING, reporting_currency=reporting_currency,
+                  lines=int(missing.sum()), currencies=sorted(map(str, set(currency[missing]))))
+    factor = np.where(missing, 1.0, rate)
+    # Rounding groups: one per (JE_ID, rate); lines without a JE_ID round alone
+    je = pd.factorize(out["JE_ID"])[0] if "JE_ID" in out.columns else np.full(n, -1)
+    je = np.where(je >= 0, je, n + np.arange(n))
+    rate_codes, rate_values = pd.factorize(factor)
+    groups = pd.factorize(je.astype(np.int64) * max(len(rate_values), 1) + rate_codes)[0]
+    for col in ["Debit", "Credit"]:
+        if col in out.columns:
+            out[f"{col}_Original"] = out[col]
+            out[col] = _allocate_cents(out[col].to_numpy(dtype="float64"), factor, groups)
+    out["Currency"] = currency.to_numpy()
+    out["FX_Rate"] = rate
+    return out
@@ -0,0 +1,213 @@
+"""Local background queue for OCR ingestion.
+
+Uploads are written to ``JOB_DIR`` and recorded in the ``ingest_jobs`` table
+of a job database kept next to the ledger (see ``jobs_db_path``), so progress
+writes never touch the ledger file. A thread pool runs OCR + LLM extraction
+page by page, updating progress in the table, then validates and inserts the
+entries into the ledger. The UI only submits jobs and polls the table, so a
+rerun or closed browser tab never loses work, and several uploads are
+processed concurrently. Jobs left queued/running by a process that has exited
+are picked up again by the next one; an upload is deleted once its job ends.
+"""
+import contextlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+import metrics
+from db_io import insert_entries
+from ocr import OCRExtractor
+from report_service import ledger_documents
+
+JOB_DIR = "ingest_jobs"
+MAX_WORKERS = 4
+ACTIVE_STATES = ("queued", "running")
+# Final states: done (inserted), rejected (failed validation), failed (error)
+
+_executor = None
+_lock = threading.Lock()
+
+
+# ---------- Job table ----------
+def jobs_db_path(db_path):
+    """Job database for the ledger at ``db_path`` (``accounting.db`` -> ``accounting.jobs.db``)."""
+    return f"{os.path.splitext(db_path)[0]}.jobs.db"
+
+
+def _connect(db_path):
+    conn = sqlite3.connect(jobs_db_path(db_path), timeout=30)
+    conn.execute("""
+    CREATE TABLE IF NOT EXISTS ingest_jobs (
+        Job_ID TEXT PRIMARY KEY,
+        Batch_ID TEXT UNIQUE,
+        File_Name TEXT,
+        File_Path TEXT,
+        Status TEXT,
+        Pages_Done INTEGER DEFAULT 0,
+        Pages_Total INTEGER DEFAULT 0,
+        Entries INTEGER DEFAULT 0,
+        Duplicates INTEGER DEFAULT 0,
+        Result TEXT,
+        Error TEXT,
+        Worker_PID INTEGER,
+        Created_At DATETIME DEFAULT CURRENT_TIMESTAMP,
+        Updated_At DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    """)
+    return conn
+
+
+def _update(db_path, job_id, **fields):
+    sets = ", ".join(f"{k} = ?" for k in fields)
+    conn = _connect(db_path)
+    try:
+        conn.execute(f"UPDATE ingest_jobs SET {sets}, Updated_At = CURRENT_TIMESTAMP WHERE Job_ID = ?",
+                     list(fields.values()) + [job_id])
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def list_jobs(db_path="accounting.db", limit=20):
+    """Most recent jobs (without the Result payload), newest first."""
+    conn = _connect(db_path)
+    try:
+        return pd.read_sql(
+            "SELECT Job_ID, Batch_ID, File_Name, Status, Pages_Done, Pages_Total, Entries, Duplicates, Error, "
+            "Created_At, Updated_At FROM ingest_jobs ORDER BY Created_At DESC, rowid DESC LIMIT ?",
+            conn, params=[int(limit)],
+        )
+    finally:
+        conn.close()
+
+
+def job_result(job_id, db_path="accounting.db"):
+    """Extracted entries of a finished job as a DataFrame (empty if none)."""
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT Result FROM ingest_jobs WHERE Job_ID = ?", (job_id,)).fetchone()
+    finally:
+        conn.close()
+    return pd.DataFrame(json.loads(row[0])) if row and row[0] else pd.DataFrame()
+
+
+# ---------- Cleaning ----------
+def clean_entries(entries) -> pd.DataFrame:
+    """LLM output -> DataFrame with numeric Debit/Credit (symbols, commas stripped; blanks -> 0)."""
+    with metrics.timed("accounting_clean_seconds"):
+        df = pd.DataFrame(entries)
+        for col in ['Debit', 'Credit']:
+            if col in df.columns:
+                df[col] = df[col].astype(str).str.strip().str.replace(r'[^0-9.\-]', '', regex=True)
+                df[col] = pd.to_numeric(df[col], errors='coerce').fillna(0)
+    return df
+
+
+# ---------- Worker ----------
+def _run_job(job_id, file_path, batch_id, db_path, api_key):
+    _update(db_path, job_id, Status="running", Worker_PID=os.getpid())
+    status = "failed"
+    with metrics.timed("accounting_ingest_job_seconds") as timer:
+        try:
+            extractor = OCRExtractor(api_key=api_key)
+            entries = extractor.extract_all_entries(
+                file_path,
+                progress_callback=lambda done, total: _update(db_path, job_id, Pages_Done=done, Pages_Total=total),
+            )
+            df = clean_entries(entries)
+            duplicates = len(ledger_documents(db_path).find_duplicates(df)) if not df.empty else 0
+            inserted = insert_entries(df.to_dict(orient="records"), db_path=db_path, batch_id=batch_id)
+            status = "done" if inserted else "rejected"
+            _update(db_path, job_id, Status=status, Entries=len(df),
+                    Duplicates=duplicates, Result=df.to_json(orient="records", date_format="iso"))
+        except Exception as e:
+            _update(db_path, job_id, Status="failed", Error=str(e))
+            metrics.log_event("ingest_job_failed", level=logging.ERROR, job_id=job_id, batch_id=batch_id,
+                              error=repr(e))
+        finally:
+            # The job is final either way; its result is kept in the table
+            with contextlib.suppress(OSError):
+                os.remove(file_path)
+    metrics.inc("accounting_ingest_jobs_total", status=status)
+    metrics.log_event("ingest_job_finished", job_id=job_id, batch_id=batch_id, status=status, seconds=timer.seconds)
+    metrics.write_prometheus()
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except (ProcessLookupError, PermissionError, OSError):
+        return False
+    return True
+
+
+def _pool(db_path, api_key):
+    """Process-wide worker pool; the first call also resumes orphaned jobs."""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="ingest")
+            recover_jobs(db_path, api_key)
+        return _executor
+
+
+def recover_jobs(db_path="accounting.db", api_key=None):
+    """Requeue jobs left queued/running by a process that is no longer alive."""
+    conn = _connect(db_path)
+    try:
+        rows = conn.execute(
+            f"SELECT Job_ID, File_Path, Batch_ID, Worker_PID FROM ingest_jobs "
+            f"WHERE Status IN ({', '.join('?' * len(ACTIVE_STATES))})", ACTIVE_STATES
+        ).fetchall()
+    finally:
+        conn.close()
+    resumed = 0
+    for job_id, file_path, batch_id, pid in rows:
+        if pid == os.getpid() or _pid_alive(pid) or not os.path.exists(file_path):
+            continue
+        _update(db_path, job_id, Status="queued", Pages_Done=0, Worker_PID=os.getpid())
+        _executor.submit(_run_job, job_id, file_path, batch_id, db_path, api_key)
+        resumed += 1
+    return resumed
+
+
+def submit_ocr_job(file_bytes, file_name, batch_id, db_path="accounting.db", api_key=None):
+    """Queue a document for OCR ingestion and return its Job_ID.
+
+    Idempotent per ``batch_id``: resubmitting the same upload (e.g. on a
+    Streamlit rerun, or from two sessions at once) returns the existing job
+    instead of running it again.
+    """
+    pool = _pool(db_path, api_key)
+    conn = _connect(db_path)
+    try:
+        row = conn.execute("SELECT Job_ID FROM ingest_jobs WHERE Batch_ID = ?", (batch_id,)).fetchone()
+        if row:
+            return row[0]
+        job_id = f"J-{uuid.uuid4().hex[:8]}"
+        os.makedirs(JOB_DIR, exist_ok=True)
+        file_path = os.path.join(JOB_DIR, f"{job_id}{os.path.splitext(file_name)[1] or '.pdf'}")
+        with open(file_path, "wb") as f:
+            f.write(file_bytes)
+        try:
+            conn.execute(
+                "INSERT INTO ingest_jobs (Job_ID, Batch_ID, File_Name, File_Path, Status, Worker_PID) VALUES (?, ?, ?, ?, 'queued', ?)",
+                (job_id, batch_id, file_name, file_path, os.getpid()),
+            )
+            conn.commit()
+        except sqlite3.IntegrityError:
+            # Another submit of the same batch won the race
+            os.remove(file_path)
+            return conn.execute("SELECT Job_ID FROM ingest_jobs WHERE Batch_ID = ?", (batch_id,)).fetchone()[0]
+    finally:
+        conn.close()
+    pool.submit(_run_job, job_id, file_path, batch_id, db_path, api_key)
+    return job_id
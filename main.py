@@ -2,9 +2,12 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime
 
-from accounting_analytics import AccountingAnalytics
-from db_utils import init_database, insert_dataframe_to_db, get_all_data
+from db_utils import init_database, insert_dataframe_to_db
 from file_processor import process_uploaded_file
+from db_io import fetch_exceptions, search_entries
+from dashboard_data import change_token, table_summary, filter_options, load_analytics, paginated_table
+from fx import BASE_CURRENCY
+import metrics
 
 # Page configuration
 st.set_page_config(
@@ -15,6 +18,9 @@ st.set_page_config(
 
 # Initialize database
 init_database()
+# Stage events (ingest, refresh, FX) as JSON lines on stderr; reruns keep the handler
+if not metrics.logger.handlers:
+    metrics.configure_logging()
 
 # Custom CSS for better styling
 st.markdown("""
@@ -74,23 +80,27 @@ with st.sidebar:
             processed_df = process_uploaded_file(uploaded_file)
             
             if processed_df is not None:
-                success = insert_dataframe_to_db(processed_df)
+                batch_id = f"B-{uploaded_file.file_id}"
+                success = insert_dataframe_to_db(processed_df, batch_id=batch_id)
                 if success:
                     st.success("Data successfully uploaded to database!")
                 else:
                     st.error("Failed to upload data to database.")
+                    rejected = fetch_exceptions(batch_id=batch_id)
+                    if not rejected.empty:
+                        st.dataframe(rejected[["JE_ID", "Rule", "Detail"]], use_container_width=True)
     
     st.divider()
     
     # Filters section
     st.header("🔍 Filters")
     
-    # Load data from database
-    df = get_all_data()
+    # Filter widgets come from cached summary / distinct-value queries
+    token = change_token(table_name="transactions")
+    row_count, min_date, max_date = table_summary(token)
     
-    if not df.empty:
-        min_date = pd.to_datetime(df["Date"]).min()
-        max_date = pd.to_datetime(df["Date"]).max()
+    if row_count:
+        options = filter_options(token)
         
         date_range = st.date_input(
             "Date Range",
@@ -99,28 +109,28 @@ with st.sidebar:
             max_value=max_date
         )
         
-        accounts = sorted([a for a in df["Account"].dropna().unique() if a])
-        customers = sorted([c for c in df["Customer_Vendor"].dropna().unique() if c])
-        txn_types = sorted([t for t in df["Transaction_Type"].dropna().unique() if t])
-        pay_methods = sorted([p for p in df["Payment_Method"].dropna().unique() if p])
-        
-        sel_accounts = st.multiselect("Accounts", accounts, default=[])
-        sel_customers = st.multiselect("Customers/Vendors", customers, default=[])
-        sel_txn_types = st.multiselect("Transaction Types", txn_types, default=[])
-        sel_pay_methods = st.multiselect("Payment Methods", pay_methods, default=[])
+        sel_accounts = st.multiselect("Accounts", options["Account"], default=[])
+        sel_customers = st.multiselect("Customers/Vendors", options["Customer_Vendor"], default=[])
+        sel_txn_types = st.multiselect("Transaction Types", options["Transaction_Type"], default=[])
+        sel_pay_methods = st.multiselect("Payment Methods", options["Payment_Method"], default=[])
+
+        # Untagged lines are in the base currency, which is also the default report currency
+        currencies = sorted(set(options["Currency"]) | {BASE_CURRENCY}) if options["Currency"] else []
+        reporting_currency = st.selectbox("Reporting Currency", currencies, index=currencies.index(BASE_CURRENCY)) \
+            if currencies else None
     else:
         st.info("Upload data to enable filters")
         date_range = None
         sel_accounts = sel_customers = sel_txn_types = sel_pay_methods = None
-        df = pd.DataFrame()
+        reporting_currency = None
 
 # Main content area
-if df.empty:
+if not row_count:
     # Show welcome message and instructions if no data
     st.info("👆 Upload an Excel or CSV file to get started")
     
     with st.expander("📋 Expected File Format"):
-        st.markdown("""
+        st.markdown(f"""
         Your file should include these columns (case-sensitive):
         
         - **Date**: Transaction date
@@ -133,6 +143,7 @@ if df.empty:
         - **Customer_Vendor**: Customer or vendor name
         - **Payment_Method**: Payment method used
         - **Reference**: Transaction reference number
+        - **Currency** (optional): ISO currency code, e.g. "EUR"; blank means the base currency ({BASE_CURRENCY}). Converted with the FX rates table
         """)
         
     st.divider()
@@ -153,17 +164,15 @@ if df.empty:
     
 else:
     # Apply filters using the analytics class
-    analytics = AccountingAnalytics(df)
-    analytics = analytics.filter(
+    filters = dict(
         start_date=date_range[0] if date_range else None,
-        end_date=date_range[1] if date_range else None,
+        end_date=date_range[1] if len(date_range or ()) > 1 else None,
         accounts=sel_accounts or None,
         customers=sel_customers or None,
         txn_types=sel_txn_types or None,
         payment_methods=sel_pay_methods or None
     )
-
-    filtered = analytics.df
+    analytics = load_analytics(reporting_currency=reporting_currency, base_currency=BASE_CURRENCY).filter(**filters)
 
     # KPI Metrics
     st.markdown("## 📈 Key Performance Indicators")
@@ -171,12 +180,12 @@ else:
     
     with col1:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("Total Debits", f"${filtered['Debit'].sum():,.2f}")
+        st.metric("Total Debits", f"${analytics.total('Debit'):,.2f}")
         st.markdown('</div>', unsafe_allow_html=True)
         
     with col2:
         st.markdown('<div class="metric-card">', unsafe_allow_html=True)
-        st.metric("Total Credits", f"${filtered['Credit'].sum():,.2f}")
+        st.metric("Total Credits", f"${analytics.total('Credit'):,.2f}")
         st.markdown('</div>', unsafe_allow_html=True)
         
     is_df = analytics.income_statement()
@@ -195,9 +204,9 @@ else:
     st.divider()
 
     # Tabs for different reports
-    tab1, tab2, tab3, tab4, tab5, tab6, tab7 = st.tabs([
+    tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8, tab9 = st.tabs([
         "📋 Trial Balance", "💰 Income Statement", "🏦 Balance Sheet", 
-        "💵 Cash Flow", "⏰ Aging", "🔍 Transactions", "✅ Error Checks"
+        "💵 Cash Flow", "⏰ Aging", "🔍 Transactions", "✅ Error Checks", "📆 Trends", "🏧 Bank Rec"
     ])
 
     with tab1:
@@ -249,26 +258,40 @@ else:
         
         if not aging_df.empty:
             st.dataframe(aging_df, use_container_width=True)
-            st.bar_chart(aging_df.set_index('Aging_Bucket')['Debit'])
+            st.bar_chart(aging_df.set_index('Aging_Bucket')['Amount'])
+
+            st.markdown("#### Open Items")
+            st.dataframe(analytics.open_items(aging_account), use_container_width=True)
         else:
             st.info(f"No data available for {aging_account}")
 
     with tab6:
         st.markdown("### Transaction Details")
-        st.dataframe(filtered, use_container_width=True)
+        paginated_table(token, key="transactions", **filters)
         
-        # Add search functionality
-        search_term = st.text_input("Search transactions...")
+        # Full-text search (FTS5 index over Description, Customer_Vendor, Reference, Account)
+        search_term = st.text_input("Search transactions...", help='Words match as prefixes; use "quotes" for phrases')
         if search_term:
-            search_results = filtered[filtered.apply(lambda row: row.astype(str).str.contains(search_term, case=False).any(), axis=1)]
+            page_size = 50
+            page = st.number_input("Search Page", min_value=1, value=1, step=1)
+            search_results, total = search_entries(
+                search_term,
+                table_name="transactions",
+                limit=page_size,
+                offset=(page - 1) * page_size,
+                **filters
+            )
+            st.caption(f"{total:,} matches · page {page} of {max(1, -(-total // page_size))}")
             st.dataframe(search_results, use_container_width=True)
         
-        st.download_button(
-            "Download Filtered Transactions as CSV",
-            data=filtered.to_csv(index=False),
-            file_name="filtered_transactions.csv",
-            mime="text/csv"
-        )
+        # Serializing every filtered row is only done on request
+        if st.button("Prepare CSV Export"):
+            st.download_button(
+                "Download Filtered Transactions as CSV",
+                data=analytics.df.to_csv(index=False),
+                file_name="filtered_transactions.csv",
+                mime="text/csv"
+            )
 
     with tab7:
         st.markdown("### Error Checks")
@@ -303,6 +326,68 @@ else:
         st.markdown("#### Anomalies")
         st.dataframe(ec["anomalies"], use_container_width=True)
 
+        st.markdown("#### Possible Duplicates")
+        dupes = analytics.duplicate_entries()
+        if dupes.empty:
+            st.success("✅ No duplicate entries detected")
+        else:
+            st.warning(f"⚠️ {len(dupes)} possible duplicate pairs ({(dupes['Match_Type'] == 'Exact').sum()} exact)")
+            st.dataframe(dupes, use_container_width=True)
+
+        st.markdown("#### Rejected at Ingest")
+        rejected = fetch_exceptions(table_name="transactions")
+        if rejected.empty:
+            st.success("✅ No batches rejected")
+        else:
+            st.dataframe(rejected, use_container_width=True)
+
+    with tab8:
+        st.markdown("### Period Trends")
+        freq_label = st.radio("Period", ["Month", "Quarter", "Year"], horizontal=True)
+        freq = {"Month": "M", "Quarter": "Q", "Year": "Y"}[freq_label]
+
+        st.markdown("#### Income Statement")
+        is_trend = analytics.income_statement_trend(freq)
+        st.line_chart(is_trend.set_index("Period"))
+        st.dataframe(is_trend, use_container_width=True)
+
+        st.markdown("#### Balance Sheet")
+        bs_trend = analytics.balance_sheet_trend(freq)
+        st.line_chart(bs_trend.set_index("Period"))
+        st.dataframe(bs_trend, use_container_width=True)
+
+        st.markdown("#### Cash Flow")
+        cf_trend = analytics.cash_flow_trend(freq)
+        st.bar_chart(cf_trend.set_index("Period")[["Cash Inflows", "Cash Outflows"]])
+        st.dataframe(cf_trend, use_container_width=True)
+
+    with tab9:
+        st.markdown("### Bank Reconciliation")
+        col1, col2 = st.columns(2)
+        with col1:
+            rec_account = st.selectbox("Bank Account", options["Account"],
+                                       index=None, placeholder="Cash")
+        with col2:
+            window = st.number_input("Date Window (days)", min_value=0, max_value=30, value=3)
+        rec = analytics.bank_reconciliation(rec_account or "Cash", date_window=int(window))
+
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Matched", len(rec["matched"]))
+        col2.metric("Unmatched Statement Lines", len(rec["unmatched_statement"]))
+        col3.metric("Unmatched Book Lines", len(rec["unmatched_ledger"]))
+
+        st.markdown("#### Matched")
+        st.dataframe(rec["matched"], use_container_width=True)
+        st.markdown("#### Suggested Matches")
+        st.dataframe(rec["suggested"], use_container_width=True)
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown("#### Unmatched Statement Lines")
+            st.dataframe(rec["unmatched_statement"], use_container_width=True)
+        with col2:
+            st.markdown("#### Unmatched Book Lines")
+            st.dataframe(rec["unmatched_ledger"], use_container_width=True)
+
 # Footer
 st.divider()
 st.caption("Accounting Analytics Dashboard | Built with Streamlit")
\ No newline at end of file
@@ -0,0 +1,240 @@
+"""In-process metrics and structured logs for the ingest and report paths.
+
+Counters and fixed-bucket histograms are kept in one process-wide registry and
+exported in the Prometheus text format, either as a file (for node_exporter's
+textfile collector or a scheduled scrape) or from ``report_service``'s
+``/metrics`` endpoint. Stage events are logged as JSON lines on the
+``accounting`` logger.
+
+Set ``ACCOUNTING_METRICS=0`` to switch collection off: ``inc``/``observe``
+return immediately and ``timed`` hands back a shared no-op context, so
+instrumented code pays one flag check. ``ACCOUNTING_METRICS_FILE`` names a
+file that ingest jobs rewrite after they finish.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from datetime import datetime, timezone
+
+ENABLED = os.environ.get("ACCOUNTING_METRICS", "1").strip().lower() not in ("0", "false", "off", "no")
+METRICS_FILE = os.environ.get("ACCOUNTING_METRICS_FILE")
+
+# Seconds; spans a cached report (ms) to a slow LLM call (tens of seconds)
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+HELP = {
+    "accounting_ocr_pages_total": "PDF pages with extractable text",
+    "accounting_ocr_pdf_seconds": "pdfplumber text extraction time per document",
+    "accounting_llm_request_seconds": "LLM chat completion latency per page",
+    "accounting_llm_tokens_total": "LLM tokens by direction (prompt, completion)",
+    "accounting_llm_parse_seconds": "JSON parsing time of the LLM output",
+    "accounting_llm_parse_failures_total": "LLM outputs that were not valid JSON",
+    "accounting_clean_seconds": "Cleaning of extracted entries",
+    "accounting_db_insert_seconds": "Validation plus write time per inserted batch",
+    "accounting_db_rows_inserted_total": "Rows written to the ledger tables",
+    "accounting_db_batches_rejected_total": "Batches rejected by validation",
+    "accounting_ingest_job_seconds": "End-to-end OCR ingest job time",
+    "accounting_ingest_jobs_total": "Finished OCR ingest jobs by status",
+    "accounting_report_seconds": "Report computation time (cache misses and uncached calls)",
+    "accounting_report_cache_total": "Report calls by cache result (hit, miss, uncached)",
+    "accounting_ledger_refresh_seconds": "Report service ledger refresh time by mode",
+    "accounting_duplicate_check_seconds": "Duplicate check of a new batch against the ledger",
+    "accounting_http_request_seconds": "Report service request time by route",
+}
+
+logger = logging.getLogger("accounting")
+
+
+# ---------- Registry ----------
+class Registry:
+    """Counters and histograms keyed by ``(name, sorted label items)``."""
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counters = {}
+        self._histograms = {}  # key -> [bucket counts..., +Inf count], sum
+        self._lock = threading.Lock()
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            hist = self._histograms.get(key)
+            if hist is None:
+                hist = self._histograms[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            hist[0][slot] += 1
+            hist[1] += value
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """Plain-dict copy: ``{"counters": {...}, "histograms": {...}}`` keyed by ``name{labels}``."""
+        with self._lock:
+            counters = {_series(n, l): v for (n, l), v in self._counters.items()}
+            histograms = {_series(n, l): {"count": sum(h[0]), "sum": h[1],
+                                          "buckets": dict(zip(self.buckets + (float("inf"),), h[0]))}
+                          for (n, l), h in self._histograms.items()}
+        return {"counters": counters, "histograms": histograms}
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)."""
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted((k, (list(h[0]), h[1])) for k, h in self._histograms.items())
+        lines, typed = [], set()
+
+        def header(name, kind):
+            if name not in typed:
+                typed.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in counters:
+            header(name, "counter")
+            lines.append(f"{_series(name, labels)} {_number(value)}")
+        for (name, labels), (counts, total) in histograms:
+            header(name, "histogram")
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else _number(bound)
+                lines.append(f"{_series(name + '_bucket', labels + (('le', le),))} {cumulative}")
+            lines.append(f"{_series(name + '_sum', labels)} {_number(total)}")
+            lines.append(f"{_series(name + '_count', labels)} {cumulative}")
+        return "\n".join(lines) + "\n"
+
+
+def _series(name, labels):
+    if not labels:
+        return name
+    escape = lambda v: str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+    return name + "{" + ",".join(f'{k}="{escape(v)}"' for k, v in labels) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+REGISTRY = Registry()
+
+
+# ---------- Recording ----------
+def inc(name, value=1, **labels):
+    if ENABLED:
+        REGISTRY.inc(name, value, **labels)
+
+
+def observe(name, value, **labels):
+    if ENABLED:
+        REGISTRY.observe(name, value, **labels)
+
+
+class _Timer:
+    __slots__ = ("name", "labels", "started", "seconds")
+
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+        self.seconds = None
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.started
+        REGISTRY.observe(self.name, self.seconds, **self.labels)
+        return False
+
+
+class _NullTimer:
+    __slots__ = ()
+    seconds = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+def timed(name, **labels):
+    """Context manager observing the block's wall time (seconds) into histogram ``name``.
+
+    The timer's ``seconds`` attribute is set on exit (None when metrics are off).
+    """
+    return _Timer(name, labels) if ENABLED else _NULL_TIMER
+
+
+def record_insert(table, rows, seconds):
+    """One ledger write; rows/sec over time is ``rows_inserted_total / insert_seconds_sum``."""
+    inc("accounting_db_rows_inserted_total", rows, table=table)
+    observe("accounting_db_insert_seconds", seconds, table=table)
+    log_event("rows_inserted", table=table, rows=rows, seconds=round(seconds, 6),
+              rows_per_sec=round(rows / seconds) if seconds else None)
+
+
+# ---------- Structured logs ----------
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: timestamp, level, logger, message and any ``fields``."""
+
+    def format(self, record):
+        payload = {"ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+                   "level": record.levelname, "logger": record.name, "event": record.getMessage()}
+        payload.update(getattr(record, "fields", {}))
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
+
+
+def log_event(event, level=logging.INFO, **fields):
+    """Log ``event`` with structured ``fields``; skipped cheaply when nothing listens at ``level``.
+
+    Until ``configure_logging`` runs, warnings reach logging's last-resort
+    handler, which prints only the message, so the fields are put in it.
+    """
+    if logger.isEnabledFor(level):
+        message = event if logger.hasHandlers() else f"{event} {json.dumps(fields, default=str)}"
+        logger.log(level, message, extra={"fields": fields})
+
+
+def configure_logging(level=logging.INFO, stream=None):
+    """Send ``accounting`` logs to ``stream`` (stderr by default) as JSON lines."""
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(JsonFormatter())
+    logger.handlers[:] = [handler]
+    logger.setLevel(level)
+    logger.propagate = False
+    return handler
+
+
+# ---------- Export ----------
+def render_prometheus():
+    return REGISTRY.render()
+
+
+def write_prometheus(path=None):
+    """Atomically write the Prometheus text to ``path`` (default ``ACCOUNTING_METRICS_FILE``)."""
+    path = path or METRICS_FILE
+    if not path or not ENABLED:
+        return None
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w") as f:
+        f.write(render_prometheus())
+    os.replace(tmp, path)
+    return path
@@ -1,21 +1,29 @@
-import pdfplumber
 import json
-from openai import OpenAI
+import logging
+
+import metrics
 
 class OCRExtractor:
+    # pdfplumber and openai are imported on first use: importing this module
+    # stays cheap for callers that only reference the class
     def __init__(self, api_key, model="gpt-4o-mini", temperature=0.2):
+        from openai import OpenAI
         self.client = OpenAI(api_key=api_key)
         self.model = model
         self.temperature = temperature
 
     # 1. Extract text from PDF
     def extract_text_from_pdf(self, pdf_path):
+        import pdfplumber
         texts = []
-        with pdfplumber.open(pdf_path) as pdf:
-            for page_num, page in enumerate(pdf.pages, start=1):
-                page_text = page.extract_text()
-                if page_text:
-                    texts.append((page_num, page_text))
+        with metrics.timed("accounting_ocr_pdf_seconds") as timer:
+            with pdfplumber.open(pdf_path) as pdf:
+                for page_num, page in enumerate(pdf.pages, start=1):
+                    page_text = page.extract_text()
+                    if page_text:
+                        texts.append((page_num, page_text))
+        metrics.inc("accounting_ocr_pages_total", len(texts))
+        metrics.log_event("pdf_text_extracted", file=str(pdf_path), pages=len(texts), seconds=timer.seconds)
         return texts   # list of (page_num, text)
 
     # 2. Build prompt
@@ -60,6 +68,7 @@ class OCRExtractor:
         - Customer_Vendor: (name of customer/vendor/party, if available)  
         - Payment_Method: (Cash, Bank Transfer, Credit Card, Check, etc., if available)  
         - Reference: (Invoice number, receipt number, check number, transaction ID, etc.)  
+        - Currency: (ISO 4217 code of the amounts, e.g. USD, EUR, KES; infer from symbols like $, €, KSh)  
 
         5. If the document contains multiple transactions (e.g., a bank statement), 
         generate a separate JE_ID for each transaction.
@@ -72,19 +81,30 @@ class OCRExtractor:
     # 3. Call LLM for a single page
     def extract_journal_entries_from_page(self, page_text):
         prompt = self.prompt_source_document(page_text)
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=self.temperature,
-        )
+        with metrics.timed("accounting_llm_request_seconds", model=self.model) as llm:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=self.temperature,
+            )
+        usage = getattr(response, "usage", None)
+        prompt_tokens = getattr(usage, "prompt_tokens", 0) or 0
+        completion_tokens = getattr(usage, "completion_tokens", 0) or 0
+        metrics.inc("accounting_llm_tokens_total", prompt_tokens, model=self.model, direction="prompt")
+        metrics.inc("accounting_llm_tokens_total", completion_tokens, model=self.model, direction="completion")
         raw_output = response.choices[0].message.content.strip()
 
         try:
-            entries = json.loads(raw_output)
+            with metrics.timed("accounting_llm_parse_seconds") as parse:
+                entries = json.loads(raw_output)
         except json.JSONDecodeError:
-            print("⚠️ JSON decode failed, raw output was:")
-            print(raw_output)
+            metrics.inc("accounting_llm_parse_failures_total", model=self.model)
+            metrics.log_event("llm_json_decode_failed", level=logging.WARNING, model=self.model,
+                              raw_output=raw_output[:2000])
             return []
+        metrics.log_event("llm_page_extracted", model=self.model, llm_seconds=llm.seconds,
+                          parse_seconds=parse.seconds, prompt_tokens=prompt_tokens,
+                          completion_tokens=completion_tokens)
 
         if isinstance(entries, dict):
             entries = [entries]
@@ -92,11 +112,16 @@ class OCRExtractor:
         return entries
 
     # 4. Multi-page extractor
-    def extract_all_entries(self, pdf_path):
+    def extract_all_entries(self, pdf_path, progress_callback=None):
+        """Entries from every page; ``progress_callback(pages_done, pages_total)`` after each page."""
         all_entries = []
         texts = self.extract_text_from_pdf(pdf_path)
-        for page_num, text in texts:
-            print(f"📄 Processing page {page_num}...")
+        if progress_callback:
+            progress_callback(0, len(texts))
+        for done, (page_num, text) in enumerate(texts, start=1):
+            metrics.log_event("page_processing", file=str(pdf_path), page=page_num, of=len(texts))
             page_entries = self.extract_journal_entries_from_page(text)
             all_entries.extend(page_entries)
+            if progress_callback:
+                progress_callback(done, len(texts))
         return all_entries
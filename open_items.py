@@ -0,0 +1,148 @@
+import numpy as np
+import pandas as pd
+
+from compact_ledger import to_minor_units, from_minor_units
+
+DEFAULT_BUCKETS = (30, 60, 90, 120)
+# Side on which documents (invoices / bills) are posted for each control account;
+# the opposite side holds payments, credit notes and other settlements.
+DOCUMENT_SIDE = {"Accounts Receivable": "Debit", "Accounts Payable": "Credit"}
+UNAPPLIED = "Unapplied"
+# Ledger columns open-item matching reads
+OPEN_ITEM_COLUMNS = ["JE_ID", "Date", "Account", "Debit", "Credit", "Customer_Vendor", "Reference"]
+
+
+def bucket_labels(buckets=DEFAULT_BUCKETS):
+    """["0-30", "31-60", ..., "120+"] for day boundaries ``buckets``."""
+    labels, lower = [], 0
+    for upper in buckets:
+        labels.append(f"{lower}-{upper}")
+        lower = upper + 1
+    labels.append(f"{buckets[-1]}+")
+    return labels
+
+
+def _codes(df, col):
+    """Integer codes for a text column (-1 for missing/blank) plus the labels."""
+    if col not in df.columns:
+        return np.full(len(df), -1, dtype="int64"), pd.Index([], dtype=object)
+    codes, uniques = pd.factorize(df[col])
+    # Normalize whitespace on the (small) dictionary, not on every row
+    clean = pd.Index(uniques.astype(str)).str.strip()
+    recode, labels = pd.factorize(clean)
+    recode = np.append(np.where(clean == "", -1, recode), -1)  # code -1 stays -1
+    codes = recode[codes].astype("int64")
+    return codes, pd.Index(labels)
+
+
+def open_items(df: pd.DataFrame, account_name="Accounts Receivable", as_of=None, document_side=None):
+    """Remaining open balance per document on an AR/AP control account.
+
+    Settlements are matched to documents of the same Customer_Vendor by
+    Reference first; whatever is left is applied FIFO by document date. All
+    matching is done on integer codes and cents with group-by / cumulative
+    sums, never row by row.
+
+    Returns columns Customer_Vendor, Document, Date, Amount, Applied, Open.
+    Documents without a Reference are identified by their JE_ID ("JE:<id>"),
+    or by their row label ("Line:<label>") when there is no JE_ID. Settlements
+    exceeding a party's documents are returned as a Document named
+    "Unapplied" with a negative Open amount.
+    """
+    columns = ["Customer_Vendor", "Document", "Date", "Amount", "Applied", "Open"]
+    if df.empty or "Account" not in df.columns:
+        return pd.DataFrame(columns=columns)
+    d = df[df["Account"] == account_name]
+    if as_of is not None:
+        d = d[d["Date"] <= pd.to_datetime(as_of)]
+    if d.empty:
+        return pd.DataFrame(columns=columns)
+
+    side = document_side or DOCUMENT_SIDE.get(account_name, "Debit")
+    other = "Credit" if side == "Debit" else "Debit"
+    doc_amt = to_minor_units(d[side]) if side in d.columns else np.zeros(len(d), dtype="int64")
+    pay_amt = to_minor_units(d[other]) if other in d.columns else np.zeros(len(d), dtype="int64")
+
+    party, party_labels = _codes(d, "Customer_Vendor")
+    ref, ref_labels = _codes(d, "Reference")
+    # Documents without a Reference: one code per JE_ID, or per line without one
+    je = np.full(len(d), -1, dtype="int64")
+    no_ref = (ref < 0) & (doc_amt > 0)
+    je_labels = pd.Index([], dtype=object)
+    if no_ref.any():
+        ids = d.loc[no_ref, "JE_ID"] if "JE_ID" in d.columns else pd.Series(None, index=d.index[no_ref], dtype=object)
+        ids = ids.astype(object).where(ids.notna(), "").astype(str).str.strip()
+        names = ("JE:" + ids).where(ids != "", "Line:" + ids.index.astype(str))
+        je_codes, je_labels = pd.factorize(names.to_numpy(dtype=object))
+        je[no_ref] = je_codes
+    # Document code: the Reference if present, otherwise the JE_ID/line (offset past refs); -1 for none
+    doc = np.where(ref >= 0, ref, np.where(je >= 0, len(ref_labels) + je, -1))
+    width = len(ref_labels) + len(je_labels) + 2
+    key = (party + 1) * width + (doc + 1)
+    dates = d["Date"].to_numpy(dtype="datetime64[ns]")
+
+    # Documents: one row per (party, document)
+    is_doc = doc_amt > 0
+    inv = (pd.DataFrame({"Key": key[is_doc], "Party": party[is_doc], "Doc": doc[is_doc],
+                         "Date": dates[is_doc], "Amount": doc_amt[is_doc]})
+           .groupby("Key", sort=False)
+           .agg(Party=("Party", "first"), Doc=("Doc", "first"), Date=("Date", "min"), Amount=("Amount", "sum")))
+
+    # Step 1: settlements quoting a document reference of the same party
+    is_pay = pay_amt > 0
+    pays = pd.DataFrame({"Key": key[is_pay], "Party": party[is_pay], "Ref": ref[is_pay],
+                         "Date": dates[is_pay], "Amount": pay_amt[is_pay]})
+    ref_paid = pays[pays["Ref"] >= 0].groupby("Key", sort=False)["Amount"].sum()
+    inv["Ref_Applied"] = np.minimum(inv["Amount"], ref_paid.reindex(inv.index, fill_value=0))
+
+    # Step 2: everything not applied by reference is pooled per party, FIFO by date
+    paid = pays.groupby("Party", sort=False)["Amount"].sum()
+    pool = paid.sub(inv.groupby("Party", sort=False)["Ref_Applied"].sum(), fill_value=0)
+    inv = inv.reset_index(drop=True)
+    inv = inv.iloc[np.lexsort((inv["Doc"].to_numpy(), inv["Date"].to_numpy(), inv["Party"].to_numpy()))]
+    remaining = inv["Amount"] - inv["Ref_Applied"]
+    before = remaining.groupby(inv["Party"], sort=False).cumsum() - remaining
+    party_pool = inv["Party"].map(pool).fillna(0).astype("int64")
+    fifo = np.clip(party_pool - before, 0, remaining)
+    inv["Applied"] = inv["Ref_Applied"] + fifo
+    inv["Open"] = inv["Amount"] - inv["Applied"]
+
+    # Settlements left over after all of a party's documents are covered
+    covered = remaining.groupby(inv["Party"], sort=False).sum()
+    leftover = pool.sub(covered, fill_value=0)
+    leftover = leftover[leftover > 0].astype("int64")
+    last_paid = pays.groupby("Party", sort=False)["Date"].max()
+
+    docs = inv[inv["Open"] > 0]
+    doc_labels = np.concatenate([ref_labels.to_numpy(dtype=object), np.asarray(je_labels, dtype=object)])
+    party_names = np.append(party_labels.to_numpy(dtype=object), None)  # code -1 -> None
+    out = pd.DataFrame({
+        "Customer_Vendor": np.concatenate([party_names[docs["Party"].to_numpy()],
+                                           party_names[leftover.index.to_numpy(dtype="int64")]]),
+        "Document": np.concatenate([doc_labels[docs["Doc"].to_numpy()],
+                                    np.full(len(leftover), UNAPPLIED, dtype=object)]),
+        "Date": np.concatenate([docs["Date"].to_numpy(),
+                                last_paid.reindex(leftover.index).to_numpy(dtype="datetime64[ns]")]),
+        "Amount": from_minor_units(np.concatenate([docs["Amount"].to_numpy(), np.zeros(len(leftover), "int64")])),
+        "Applied": from_minor_units(np.concatenate([docs["Applied"].to_numpy(), leftover.to_numpy()])),
+        "Open": from_minor_units(np.concatenate([docs["Open"].to_numpy(), -leftover.to_numpy()])),
+    })
+    return out[columns]
+
+
+def age_open_items(items: pd.DataFrame, as_of=None, buckets=DEFAULT_BUCKETS):
+    """Sum open balances into day buckets (plus an "Unapplied" row if any)."""
+    labels = bucket_labels(buckets)
+    as_of = pd.Timestamp.today().normalize() if as_of is None else pd.to_datetime(as_of)
+    docs = items[items["Document"] != UNAPPLIED]
+    days = (as_of - pd.to_datetime(docs["Date"])).dt.days.clip(lower=0)
+    bins = [-1, *buckets, np.inf]
+    bucket = pd.cut(days, bins=bins, labels=labels, right=True)
+    out = docs["Open"].groupby(bucket, observed=False).sum().reindex(labels, fill_value=0.0)
+    out = out.rename_axis("Aging_Bucket").rename("Amount").reset_index()
+    out["Aging_Bucket"] = out["Aging_Bucket"].astype(str)
+    unapplied = items.loc[items["Document"] == UNAPPLIED, "Open"].sum()
+    if unapplied:
+        out = pd.concat([out, pd.DataFrame({"Aging_Bucket": [UNAPPLIED], "Amount": [unapplied]})],
+                        ignore_index=True)
+    return out
@@ -1,24 +1,18 @@
 from ocr import OCRExtractor
 from db_io import insert_entries, fetch_entries
 from accounting_analytics import AccountingAnalytics
+import metrics
 import os
-import openai
-from openai import OpenAIError, RateLimitError
-from openai import OpenAI
 
-import io
-import sys
 
-from dotenv import load_dotenv
-
-# Load environment variables
-load_dotenv()
-
-
-api_key = os.getenv("OPENAI_API_KEY")
+if __name__ == "__main__":
+    from dotenv import load_dotenv
 
+    # Load environment variables
+    load_dotenv()
+    metrics.configure_logging()
+    api_key = os.getenv("OPENAI_API_KEY")
 
-if __name__ == "__main__":
     pdf_file = "invoice_dummy.pdf"
 
     # Step 1 + 2: OCR + LLM
@@ -40,3 +34,6 @@ if __name__ == "__main__":
 
     print("\nBalance Sheet")
     print(analytics.balance_sheet())
+
+    # Prometheus text file when ACCOUNTING_METRICS_FILE is set
+    metrics.write_prometheus()
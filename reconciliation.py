@@ -0,0 +1,254 @@
+import numpy as np
+import pandas as pd
+
+from compact_ledger import to_minor_units, from_minor_units
+
+STATEMENT_TYPE = "Bank Statement"
+MATCH_COLUMNS = ["Match_ID", "Match_Type", "Statement_Rows", "Ledger_Rows", "Amount",
+                 "Statement_Date", "Ledger_Date", "Days_Apart"]
+PAIR_COLUMNS = ["Row_S", "Row_L", "Amount", "Day_S", "Day_L"]
+# Ledger columns statement_from_ledger reads
+RECONCILIATION_COLUMNS = ["JE_ID", "Date", "Account", "Description", "Debit", "Credit", "Transaction_Type", "Reference"]
+SUGGESTION_COLUMNS = ["Statement_Row", "Ledger_Row", "Statement_Amount", "Ledger_Amount", "Days_Apart", "Reason"]
+# Bounds of the subset-sum search for lines left after the same-day grouping
+MAX_GROUP_LINES = 5
+MAX_GROUP_CANDIDATES = 16
+
+
+def statement_from_ledger(df: pd.DataFrame, account="Cash"):
+    """Split ledger lines on ``account`` into (statement lines, book lines).
+
+    Lines with Transaction_Type "Bank Statement" (as extracted by OCR) are the
+    statement side; all other lines on the account are the book side. Amounts
+    are signed: Debit - Credit, i.e. deposits positive.
+    """
+    cash = df[df["Account"] == account] if "Account" in df.columns else df.iloc[0:0]
+    is_statement = (cash["Transaction_Type"] == STATEMENT_TYPE) if "Transaction_Type" in cash.columns \
+        else pd.Series(False, index=cash.index)
+    signed = cash.assign(Amount=cash["Debit"] - cash["Credit"])
+    cols = [c for c in ["Date", "Amount", "Description", "Reference", "JE_ID"] if c in signed.columns]
+    return signed.loc[is_statement, cols], signed.loc[~is_statement, cols]
+
+
+def _prepare(lines):
+    """Row label, day number and signed cents for one side."""
+    dates = pd.to_datetime(lines["Date"])
+    keep = dates.notna().to_numpy()
+    return pd.DataFrame({
+        "Row": lines.index.to_numpy()[keep],
+        "Day": dates.to_numpy(dtype="datetime64[D]")[keep].astype("int64"),
+        "Amount": to_minor_units(lines["Amount"])[keep],
+    })
+
+
+def _one_to_one_by_occurrence(s, l, window):
+    """Pair the k-th statement line of an amount with the k-th book line of that amount."""
+    s = s.sort_values(["Amount", "Day"], kind="stable")
+    l = l.sort_values(["Amount", "Day"], kind="stable")
+    s = s.assign(K=s.groupby("Amount").cumcount())
+    l = l.assign(K=l.groupby("Amount").cumcount())
+    pairs = s.merge(l, on=["Amount", "K"], suffixes=("_S", "_L"))
+    return pairs[(pairs["Day_S"] - pairs["Day_L"]).abs() <= window][PAIR_COLUMNS]
+
+
+def _one_to_one_nearest(s, l, window):
+    """Nearest-date book line of the same amount within the window, one use per line."""
+    if s.empty or l.empty:
+        return pd.DataFrame(columns=PAIR_COLUMNS)
+    pairs = pd.merge_asof(s.sort_values("Day"), l.sort_values("Day").rename(columns={"Row": "Row_L"}).assign(Day_L=lambda x: x["Day"]),
+                          on="Day", by="Amount", direction="nearest", tolerance=window)
+    pairs = pairs.dropna(subset=["Row_L"]).rename(columns={"Row": "Row_S", "Day": "Day_S"})
+    pairs["Row_L"] = pairs["Row_L"].astype(l["Row"].dtype)
+    pairs["Day_L"] = pairs["Day_L"].astype("int64")
+    pairs["Gap"] = (pairs["Day_S"] - pairs["Day_L"]).abs()
+    return pairs.sort_values("Gap", kind="stable").drop_duplicates("Row_L")[PAIR_COLUMNS]
+
+
+def _grouped(many, one, window, many_side):
+    """Match same-day groups of ``many`` (summed) against single lines of ``one``."""
+    if many.empty or one.empty:
+        return []
+    sign = np.sign(many["Amount"])
+    groups = many.assign(Sign=sign).groupby(["Day", "Sign"], sort=False).agg(
+        Amount=("Amount", "sum"), Rows=("Row", list), Count=("Row", "size")).reset_index()
+    groups = groups[groups["Count"] > 1]
+    if groups.empty:
+        return []
+    pairs = pd.merge_asof(groups.sort_values("Day"),
+                          one.sort_values("Day").rename(columns={"Row": "One_Row"}).assign(One_Day=lambda x: x["Day"]),
+                          on="Day", by="Amount", direction="nearest", tolerance=window)
+    pairs = pairs.dropna(subset=["One_Row"])
+    pairs["One_Row"] = pairs["One_Row"].astype(one["Row"].dtype)
+    pairs["One_Day"] = pairs["One_Day"].astype("int64")
+    pairs["Gap"] = (pairs["Day"] - pairs["One_Day"]).abs()
+    pairs = pairs.sort_values("Gap", kind="stable").drop_duplicates("One_Row")
+    ones = [[r] for r in pairs["One_Row"]]
+    if many_side == "statement":
+        return list(zip(["One-to-Many"] * len(pairs), pairs["Rows"], ones, pairs["Amount"], pairs["Day"], pairs["One_Day"]))
+    return list(zip(["Many-to-One"] * len(pairs), ones, pairs["Rows"], pairs["Amount"], pairs["One_Day"], pairs["Day"]))
+
+
+def _subset(target, amounts, max_lines):
+    """Positions of 2..``max_lines`` of ``amounts`` (same sign as ``target``) summing to it, or None."""
+    target = abs(int(target))
+    values = [abs(int(a)) for a in amounts]
+    # Cents reachable by any subset, as bits of one int: most lines have no match, and this says so fast
+    reachable = 1
+    for value in values:
+        reachable |= reachable << value
+    if not reachable >> target & 1:
+        return None
+    order = sorted(range(len(values)), key=lambda i: -values[i])
+    values = [values[i] for i in order]
+    rest = np.cumsum(values[::-1])[::-1].tolist() + [0]  # sum of values[j:]
+
+    def search(start, remaining, picked):
+        if remaining == 0:
+            return picked if len(picked) > 1 else None
+        if len(picked) == max_lines:
+            return None
+        for j in range(start, len(values)):
+            # Values are sorted descending: stop once the rest, or the lines left, cannot reach it
+            if rest[j] < remaining or values[j] * (max_lines - len(picked)) < remaining:
+                return None
+            if values[j] <= remaining:
+                found = search(j + 1, remaining - values[j], picked + [order[j]])
+                if found:
+                    return found
+        return None
+
+    return search(0, target, [])
+
+
+def _subset_groups(many, one, window, many_side):
+    """Match lines of ``one`` to a subset of ``many`` lines within the window that sums to them.
+
+    Catches what the same-day grouping cannot: groups spanning days, and groups
+    sharing a day with unrelated lines. Only the ``MAX_GROUP_CANDIDATES``
+    nearest-dated same-sign lines are searched, for up to ``MAX_GROUP_LINES``
+    lines per group; lines whose window holds too little to reach their amount
+    are skipped up front.
+    """
+    found = []
+    for sign in (1, -1):
+        side = many[np.sign(many["Amount"]) == sign].sort_values("Day", kind="stable")
+        targets = one[np.sign(one["Amount"]) == sign].sort_values("Day", kind="stable")
+        if len(side) < 2 or targets.empty:
+            continue
+        days, rows = side["Day"].to_numpy(), side["Row"].to_numpy()
+        amounts = np.abs(side["Amount"].to_numpy())
+        cum = np.concatenate([[0], np.cumsum(amounts)])
+        t_days, t_amounts = targets["Day"].to_numpy(), np.abs(targets["Amount"].to_numpy())
+        lo = np.searchsorted(days, t_days - window, side="left")
+        hi = np.searchsorted(days, t_days + window, side="right")
+        possible = np.flatnonzero((hi - lo >= 2) & (cum[hi] - cum[lo] >= t_amounts))
+        free = np.ones(len(side), dtype=bool)
+        for i in possible:
+            day, target = t_days[i], t_amounts[i]
+            near = lo[i] + np.flatnonzero(free[lo[i]:hi[i]] & (amounts[lo[i]:hi[i]] <= target))
+            near = near[np.argsort(np.abs(days[near] - day), kind="stable")[:MAX_GROUP_CANDIDATES]]
+            picked = _subset(target, amounts[near].tolist(), MAX_GROUP_LINES) if len(near) >= 2 else None
+            if not picked:
+                continue
+            group = np.sort(near[picked])
+            free[group] = False
+            # Date of the group's line farthest from the single line
+            far = int(days[group][np.argmax(np.abs(days[group] - day))])
+            row, amount, group_rows = targets["Row"].iat[i], sign * int(target), rows[group].tolist()
+            if many_side == "statement":
+                found.append(("One-to-Many", group_rows, [row], amount, far, int(day)))
+            else:
+                found.append(("Many-to-One", [row], group_rows, amount, int(day), far))
+    return found
+
+
+def reconcile(statement: pd.DataFrame, ledger: pd.DataFrame, date_window=3, suggest_window=None,
+              amount_tolerance=0.01):
+    """Match bank statement lines to ledger (book) lines.
+
+    Both frames need Date and a signed Amount (deposits positive) and are
+    identified by their index. Steps 1-4 use sorted indexes and as-of joins,
+    never nested loops; only lines still unmatched after them reach the
+    bounded search of step 5. In order:
+
+    1. One-to-one on exact amount, pairing the k-th occurrence of each amount
+       on both sides, within ``date_window`` days
+    2. One-to-one on exact amount, nearest date within ``date_window``
+    3. Many-to-one: several same-day book lines summing to one statement line
+    4. One-to-many: several same-day statement lines summing to one book line
+    5. Many-to-one, then one-to-many, on a bounded subset sum: any few lines
+       within ``date_window`` days whose amounts add up to one line
+
+    Returns a dict with ``matched`` (one row per match, row labels in lists),
+    ``unmatched_statement``, ``unmatched_ledger`` and ``suggested`` (same
+    amount within ``suggest_window`` days, or amount within
+    ``amount_tolerance`` relative difference inside the date window).
+    """
+    suggest_window = 3 * date_window if suggest_window is None else suggest_window
+    s, l = _prepare(statement), _prepare(ledger)
+    matches = []
+
+    # Nearest-date pass runs twice: lines freed by conflicts get a second chance
+    for finder in (_one_to_one_by_occurrence, _one_to_one_nearest, _one_to_one_nearest):
+        pairs = finder(s, l, date_window)
+        matches.extend(zip(["One-to-One"] * len(pairs), [[r] for r in pairs["Row_S"]], [[r] for r in pairs["Row_L"]],
+                           pairs["Amount"], pairs["Day_S"], pairs["Day_L"]))
+        s = s[~s["Row"].isin(pairs["Row_S"])]
+        l = l[~l["Row"].isin(pairs["Row_L"])]
+
+    for finder, side in ((_grouped, "ledger"), (_grouped, "statement"),
+                         (_subset_groups, "ledger"), (_subset_groups, "statement")):
+        many, one = (l, s) if side == "ledger" else (s, l)
+        found = finder(many, one, date_window, side)
+        matches.extend(found)
+        used_s = {r for m in found for r in m[1]}
+        used_l = {r for m in found for r in m[2]}
+        s = s[~s["Row"].isin(used_s)]
+        l = l[~l["Row"].isin(used_l)]
+
+    matched = pd.DataFrame(matches, columns=["Match_Type", "Statement_Rows", "Ledger_Rows", "Amount",
+                                             "Statement_Date", "Ledger_Date"])
+    matched.insert(0, "Match_ID", np.arange(1, len(matched) + 1))
+    matched["Amount"] = from_minor_units(matched["Amount"].astype("int64"))
+    matched["Days_Apart"] = (matched["Statement_Date"] - matched["Ledger_Date"]).abs().astype("int64")
+    for col in ("Statement_Date", "Ledger_Date"):
+        matched[col] = pd.to_datetime(matched[col].astype("int64"), unit="D")
+
+    return {
+        "matched": matched[MATCH_COLUMNS],
+        "unmatched_statement": statement.loc[statement.index.difference(_matched_rows(matched, "Statement_Rows"), sort=False)],
+        "unmatched_ledger": ledger.loc[ledger.index.difference(_matched_rows(matched, "Ledger_Rows"), sort=False)],
+        "suggested": _suggestions(s, l, date_window, suggest_window, amount_tolerance),
+    }
+
+
+def _matched_rows(matched, column):
+    return pd.Index([r for rows in matched[column] for r in rows])
+
+
+def _suggestions(s, l, date_window, suggest_window, amount_tolerance):
+    if s.empty or l.empty:
+        return pd.DataFrame(columns=SUGGESTION_COLUMNS)
+    book = l.rename(columns={"Row": "Ledger_Row"}).assign(Ledger_Day=lambda x: x["Day"], Ledger_Amount=lambda x: x["Amount"])
+    # Same amount, date outside the match window
+    by_date = pd.merge_asof(s.sort_values("Day"), book.sort_values("Day").drop(columns="Ledger_Amount"),
+                            on="Day", by="Amount", direction="nearest", tolerance=suggest_window)
+    by_date = by_date.dropna(subset=["Ledger_Row"]).assign(Ledger_Amount=lambda x: x["Amount"],
+                                                           Reason="Same amount, date outside window")
+    # Close amount, date inside the match window
+    by_amount = pd.merge_asof(s.sort_values("Amount"), book.sort_values("Amount").drop(columns=["Day", "Amount"]),
+                              left_on="Amount", right_on="Ledger_Amount", direction="nearest")
+    by_amount = by_amount.dropna(subset=["Ledger_Row"])
+    close = ((by_amount["Amount"] - by_amount["Ledger_Amount"]).abs()
+             <= amount_tolerance * by_amount["Amount"].abs()) & ((by_amount["Day"] - by_amount["Ledger_Day"]).abs() <= date_window)
+    by_amount = by_amount[close].assign(Reason="Amount within tolerance")
+
+    out = pd.concat([by_date, by_amount], ignore_index=True)
+    return pd.DataFrame({
+        "Statement_Row": out["Row"].to_numpy(),
+        "Ledger_Row": out["Ledger_Row"].astype(l["Row"].dtype).to_numpy(),
+        "Statement_Amount": from_minor_units(out["Amount"].astype("int64").to_numpy()),
+        "Ledger_Amount": from_minor_units(out["Ledger_Amount"].astype("int64").to_numpy()),
+        "Days_Apart": (out["Day"] - out["Ledger_Day"]).abs().astype("int64").to_numpy(),
+        "Reason": out["Reason"].to_numpy(),
+    })
@@ -0,0 +1,127 @@
+import functools
+import inspect
+import sys
+import threading
+from collections import OrderedDict
+from datetime import date
+
+import pandas as pd
+
+import metrics
+
+
+def _sizeof(value) -> int:
+    """Rough size in bytes of a cached report result."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value.values())
+    return sys.getsizeof(value)
+
+
+def _copy(value):
+    """Defensive copy so callers can't mutate cached results."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, dict):
+        return {k: _copy(v) for k, v in value.items()}
+    return value
+
+
+class ReportCache:
+    """LRU cache of report results bounded by entry count and memory."""
+
+    def __init__(self, max_entries=256, max_bytes=256 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return _copy(item[0])
+
+    def put(self, key, value):
+        size = _sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (_copy(value), size)
+            self._bytes += size
+            while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "bytes": self._bytes,
+                    "hits": self.hits, "misses": self.misses}
+
+
+# Shared across AccountingAnalytics instances (Streamlit reruns rebuild them)
+REPORT_CACHE = ReportCache()
+
+
+def cached_report(daily=False):
+    """Memoize an AccountingAnalytics report method.
+
+    The key is the instance's data version, its normalized filter tuple, the
+    method name and call arguments bound to the signature with defaults
+    applied (so positional, keyword and omitted-default forms of the same call
+    share an entry); ``daily`` adds today's date for reports that depend on
+    it. Instances without a data version are never cached.
+    Calls are counted by cache result and computations timed (see ``metrics``).
+    """
+    def decorator(method):
+        name = method.__name__
+        signature = inspect.signature(method)
+
+        def compute(self, args, kwargs, outcome):
+            metrics.inc("accounting_report_cache_total", report=name, result=outcome)
+            with metrics.timed("accounting_report_seconds", report=name):
+                return method(self, *args, **kwargs)
+
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            if self.data_version is None:
+                return compute(self, args, kwargs, "uncached")
+            try:
+                bound = signature.bind(self, *args, **kwargs)
+            except TypeError:
+                return compute(self, args, kwargs, "uncached")  # let the method raise its own error
+            bound.apply_defaults()
+            arguments = tuple(bound.arguments.items())[1:]  # drop self
+            key = (self.data_version, self.cache_key, name, arguments, date.today() if daily else None)
+            try:
+                hash(key)
+            except TypeError:
+                return compute(self, args, kwargs, "uncached")
+            result = REPORT_CACHE.get(key)
+            if result is None:
+                result = compute(self, args, kwargs, "miss")
+                REPORT_CACHE.put(key, result)
+                result = _copy(result)
+            else:
+                metrics.inc("accounting_report_cache_total", report=name, result="hit")
+            return result
+        return wrapper
+    return decorator
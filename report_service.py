@@ -0,0 +1,345 @@
+"""Headless reporting service: a warm in-memory ledger behind a local HTTP/JSON API.
+
+The ledger is loaded and indexed once. A background thread polls the table's
+data version and appends new rows incrementally (only new rows are parsed);
+a full reload happens only when rows were changed or deleted. Requests read
+the current ledger without locking and standard reports are pre-computed
+after every refresh, so repeated queries are served from the report cache.
+
+Endpoints (GET, JSON unless noted):
+    /health
+    /trial-balance     ?as_of=&start_date=
+    /income-statement, /balance-sheet, /cash-flow
+                       ?start_date=&end_date=&account=&customer=&txn_type=&payment_method=
+    /aging, /open-items ?account=&as_of=
+    /drill-down        same filters; streamed as NDJSON, one row per line
+    /metrics           Prometheus text format (see ``metrics``)
+
+Usage:
+    python report_service.py --db accounting.db --port 8765 --log-json
+"""
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+import metrics
+from accounting_analytics import AccountingAnalytics
+from db_io import get_data_version, read_data_version, fetch_fx_rates
+from duplicates import DocumentIndex, DOCUMENT_COLUMNS
+from fx import BASE_CURRENCY
+
+STREAM_CHUNK_ROWS = 1000
+MAX_VIEWS = 64
+ROUTES = ("/health", "/trial-balance", "/income-statement", "/balance-sheet", "/cash-flow", "/aging",
+          "/open-items", "/drill-down")
+WARM_REPORTS = ("trial_balance", "income_statement", "balance_sheet", "cash_flow", "aging_report")
+
+
+def _read_rows(db_path, table_name, after_rowid=0, columns=None):
+    """``(rows after after_rowid, last rowid, row count, data version)`` from one read transaction.
+
+    ``columns`` limits the read to those of the columns the table has.
+    """
+    conn = sqlite3.connect(db_path)
+    try:
+        conn.execute("BEGIN")
+        version = read_data_version(conn, db_path, table_name)
+        present = [row[1] for row in conn.execute(f"PRAGMA table_info({table_name})")]
+        if not present:
+            return pd.DataFrame(), 0, 0, version
+        selected = "*" if columns is None else ", ".join(c for c in columns if c in present) or "rowid"
+        df = pd.read_sql(f"SELECT rowid AS _rowid, {selected} FROM {table_name} WHERE rowid > ? ORDER BY rowid",
+                         conn, params=[after_rowid])
+        total = conn.execute(f"SELECT COUNT(*) FROM {table_name}").fetchone()[0]
+        conn.rollback()
+    finally:
+        conn.close()
+    last = int(df["_rowid"].max()) if not df.empty else after_rowid
+    return df.drop(columns="_rowid"), last, total, version
+
+
+class LedgerState:
+    """Current ``AccountingAnalytics`` for one table, refreshed from the DB.
+
+    Also backs the dashboards (see ``dashboard_data.load_analytics``), so an
+    insert there extends the warm ledger and its period cube instead of
+    reloading it.
+    """
+
+    def __init__(self, db_path="accounting.db", table_name="journal_entries", reporting_currency=None,
+                 warm=WARM_REPORTS, base_currency=BASE_CURRENCY):
+        self.db_path = db_path
+        self.table_name = table_name
+        self.reporting_currency = reporting_currency
+        self.base_currency = base_currency
+        self.warm = tuple(warm)
+        self.analytics = None
+        self.version = None
+        self.last_rowid = 0
+        self.rows = 0
+        self.refreshed_at = None
+        self._lock = threading.Lock()
+        self._views = OrderedDict()  # (version, normalized filters) -> filtered view
+        self._views_lock = threading.Lock()
+
+    def _read(self, after_rowid=0):
+        return _read_rows(self.db_path, self.table_name, after_rowid)
+
+    def refresh(self, force=False):
+        """Apply changes since the last refresh; returns True if the ledger changed."""
+        with self._lock:
+            version = get_data_version(self.db_path, self.table_name)
+            if version == self.version and not force:
+                return False
+            started = time.perf_counter()
+            # The version stored with the ledger is the one read with the rows
+            new_rows, last, total, version = self._read(0 if self.analytics is None or force else self.last_rowid)
+            # New FX rates change the converted amounts of every row, not just the new ones
+            same_fx = self.version is not None and version[3] == self.version[3]
+            if self.analytics is not None and not force and same_fx and len(new_rows) \
+                    and total == self.rows + len(new_rows):
+                analytics = self.analytics.extend(new_rows, data_version=version)
+                mode = "appended"
+            else:
+                if self.analytics is not None and not force:
+                    # Rows were changed or deleted, or the FX rates changed: start over
+                    new_rows, last, total, version = self._read(0)
+                fx_rates = fetch_fx_rates(self.db_path) if self.reporting_currency else None
+                analytics = AccountingAnalytics(new_rows, data_version=version, fx_rates=fx_rates,
+                                                reporting_currency=self.reporting_currency,
+                                                base_currency=self.base_currency)
+                mode = "loaded"
+            for name in self.warm:
+                getattr(analytics, name)()
+            self.analytics, self.version, self.last_rowid, self.rows = analytics, version, last, total
+            with self._views_lock:
+                self._views.clear()
+            self.refreshed_at = time.time()
+            seconds = time.perf_counter() - started
+            metrics.observe("accounting_ledger_refresh_seconds", seconds, mode=mode)
+            metrics.log_event("ledger_refreshed", table=self.table_name, mode=mode, rows=len(new_rows),
+                              total=total, seconds=round(seconds, 6))
+            return True
+
+    def view(self, filters):
+        """Filtered view of the current ledger, reused across requests with the same filters."""
+        analytics = self.analytics
+        if not any(v for v in filters.values()):
+            return analytics
+        key = (analytics.data_version, AccountingAnalytics._normalize_filters(**filters))
+        with self._views_lock:
+            if key in self._views:
+                self._views.move_to_end(key)
+                return self._views[key]
+        view = analytics.filter(**filters)
+        with self._views_lock:
+            self._views[key] = view
+            while len(self._views) > MAX_VIEWS:
+                self._views.popitem(last=False)
+        return view
+
+    def poll(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.refresh()
+            except Exception as e:
+                metrics.log_event("ledger_refresh_failed", level=logging.ERROR, table=self.table_name, error=repr(e))
+
+
+class LedgerDocuments:
+    """``DocumentIndex`` of one table for the duplicate check, refreshed like ``LedgerState``.
+
+    Reads only ``DOCUMENT_COLUMNS`` with unconverted amounts (uploads are not
+    converted either), hashes only appended rows, and is shared per table by
+    the dashboards and ingest workers (see ``ledger_documents``).
+    """
+
+    def __init__(self, db_path="accounting.db", table_name="journal_entries"):
+        self.db_path = db_path
+        self.table_name = table_name
+        self.index = None
+        self.version = None
+        self.last_rowid = 0
+        self.rows = 0
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        with self._lock:
+            version = get_data_version(self.db_path, self.table_name)
+            # Only the table counter matters: FX rates do not change unconverted amounts
+            if self.version is not None and version[:3] == self.version[:3]:
+                return self.index
+            new_rows, last, total, version = _read_rows(self.db_path, self.table_name,
+                                                        self.last_rowid if self.index is not None else 0,
+                                                        DOCUMENT_COLUMNS)
+            if self.index is not None and len(new_rows) and total == self.rows + len(new_rows):
+                index = self.index.extend(new_rows)
+            else:
+                if self.index is not None:
+                    new_rows, last, total, version = _read_rows(self.db_path, self.table_name, 0, DOCUMENT_COLUMNS)
+                index = DocumentIndex.from_frame(new_rows)
+            self.index, self.version, self.last_rowid, self.rows = index, version, last, total
+            return index
+
+    def find_duplicates(self, new_entries, date_window=7, max_neighbors=5):
+        """``duplicates.find_duplicates`` of ``new_entries`` against the current table."""
+        with metrics.timed("accounting_duplicate_check_seconds"):
+            return self.refresh().find(new_entries, date_window, max_neighbors)
+
+
+_documents = {}
+_documents_lock = threading.Lock()
+
+
+def ledger_documents(db_path="accounting.db", table_name="journal_entries") -> LedgerDocuments:
+    """The process-wide ``LedgerDocuments`` of a table."""
+    key = (os.path.abspath(db_path), table_name)
+    with _documents_lock:
+        if key not in _documents:
+            _documents[key] = LedgerDocuments(db_path, table_name)
+        return _documents[key]
+
+
+# ---------- Request handling ----------
+def _filters(params):
+    one = lambda k: params.get(k, [None])[0]
+    return dict(start_date=one("start_date"), end_date=one("end_date"),
+                accounts=params.get("account"), customers=params.get("customer"),
+                txn_types=params.get("txn_type"), payment_methods=params.get("payment_method"))
+
+
+def _report(state, route, params):
+    one = lambda k, default=None: params.get(k, [default])[0]
+    analytics = state.analytics
+    if route == "/trial-balance":
+        as_of = one("as_of")
+        return analytics.trial_balance_as_of(as_of, start_date=one("start_date")) if as_of else analytics.trial_balance()
+    if route == "/income-statement":
+        return state.view(_filters(params)).income_statement()
+    if route == "/balance-sheet":
+        return state.view(_filters(params)).balance_sheet()
+    if route == "/cash-flow":
+        return state.view(_filters(params)).cash_flow()
+    if route == "/aging":
+        return analytics.aging_report(one("account", "Accounts Receivable"), as_of=one("as_of"))
+    if route == "/open-items":
+        return analytics.open_items(one("account", "Accounts Receivable"), as_of=one("as_of"))
+    return None
+
+
+def _records(df):
+    """JSON-ready rows; report tables are small, so shortest float repr beats to_json speed."""
+    return df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+
+def make_handler(state: LedgerState):
+    class ReportHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, format, *args):  # requests are timed through ``metrics`` instead
+            pass
+
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, default=str).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream_ndjson(self, df):
+            """Chunked transfer: the client starts reading before the last row is encoded."""
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for start in range(0, len(df), STREAM_CHUNK_ROWS):
+                chunk = df.iloc[start:start + STREAM_CHUNK_ROWS].to_json(orient="records", lines=True,
+                                                                          date_format="iso").encode()
+                if not chunk.endswith(b"\n"):
+                    chunk += b"\n"
+                self.wfile.write(f"{len(chunk):X}\r\n".encode() + chunk + b"\r\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _send_text(self, status, text, content_type):
+            body = text.encode()
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/metrics":
+                return self._send_text(200, metrics.render_prometheus(), "text/plain; version=0.0.4")
+            route = url.path if url.path in ROUTES else "other"
+            with metrics.timed("accounting_http_request_seconds", route=route):
+                self._handle(url)
+
+        def _handle(self, url):
+            params = parse_qs(url.query)
+            try:
+                if url.path == "/health":
+                    return self._send_json(200, {"status": "ok", "rows": state.rows,
+                                                 "version": list(state.version or ()),
+                                                 "refreshed_at": state.refreshed_at})
+                if url.path == "/drill-down":
+                    # Built per request: .df would keep a full frame on the long-lived ledger
+                    return self._stream_ndjson(state.view(_filters(params))._frame())
+                result = _report(state, url.path, params)
+                if result is None:
+                    return self._send_json(404, {"error": f"Unknown report {url.path}"})
+                self._send_json(200, {"report": url.path.strip("/"), "version": list(state.version or ()),
+                                      "rows": _records(result)})
+            except (ValueError, TypeError, KeyError) as e:
+                self._send_json(400, {"error": str(e)})
+            except ConnectionError:
+                pass  # client went away mid-response
+            except Exception as e:
+                metrics.log_event("report_request_failed", level=logging.ERROR, path=url.path, error=repr(e))
+                self._send_json(500, {"error": f"Internal error: {e}"})
+
+    return ReportHandler
+
+
+def serve(db_path="accounting.db", table_name="journal_entries", host="127.0.0.1", port=8765, poll_interval=1.0):
+    state = LedgerState(db_path, table_name)
+    state.refresh(force=True)
+    threading.Thread(target=state.poll, args=(poll_interval,), daemon=True).start()
+    server = ThreadingHTTPServer((host, port), make_handler(state))
+    print(f"✅ Serving {table_name} from {db_path} on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve accounting reports from a warm in-memory ledger")
+    parser.add_argument("--db", default="accounting.db", help="SQLite database path")
+    parser.add_argument("--table", default="journal_entries", help="Ledger table (journal_entries or transactions)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--poll", type=float, default=1.0, help="Seconds between data-version checks")
+    parser.add_argument("--log-json", action="store_true", help="Log refresh/ingest/report events as JSON lines")
+    args = parser.parse_args(argv)
+    if args.log_json:
+        metrics.configure_logging()
+    serve(args.db, args.table, args.host, args.port, args.poll)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+import numpy as np
+import pandas as pd
+
+from compact_ledger import to_minor_units, from_minor_units
+
+CUBE_DIMENSIONS = ["Period", "Account", "Category", "Customer_Vendor"]
+# Measures in minor units; Cash_* restrict to Payment_Method == "Cash" like cash_flow()
+CUBE_MEASURES = ["Debit", "Credit", "Cash_Debit", "Cash_Credit"]
+# Ledger columns the cube is built from
+CUBE_COLUMNS = ["Date", "Account", "Category", "Customer_Vendor", "Payment_Method", "Debit", "Credit"]
+
+
+class PeriodCube:
+    """Pre-aggregated period × account × category × customer totals.
+
+    Built from raw ledger lines once, then kept current with ``update`` for new
+    lines only. Coarser periods (quarters, years) are rolled up from the cells,
+    so trend statements never re-group raw lines.
+    """
+
+    def __init__(self, freq="M", cells=None):
+        self.freq = freq
+        if cells is None:
+            index = pd.MultiIndex.from_arrays([[] for _ in CUBE_DIMENSIONS], names=CUBE_DIMENSIONS)
+            cells = pd.DataFrame({m: pd.Series(dtype="int64") for m in CUBE_MEASURES}, index=index)
+        self.cells = cells
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, freq="M"):
+        cube = cls(freq)
+        cube.update(df)
+        return cube
+
+    def _aggregate(self, df):
+        d = df[df["Date"].notna()] if "Date" in df.columns else df.iloc[0:0]
+        n = len(d)
+        debit = to_minor_units(d["Debit"]) if "Debit" in d.columns else np.zeros(n, dtype="int64")
+        credit = to_minor_units(d["Credit"]) if "Credit" in d.columns else np.zeros(n, dtype="int64")
+        cash = (d["Payment_Method"] == "Cash").to_numpy() if "Payment_Method" in d.columns else np.zeros(n, dtype=bool)
+
+        # Group on one mixed-radix int64 key instead of four object columns
+        periods = pd.PeriodIndex(pd.to_datetime(d["Date"]), freq=self.freq)
+        codes, labels = [], []
+        for values in [periods] + [d[col] if col in d.columns else pd.Series([None] * n, dtype=object)
+                                   for col in CUBE_DIMENSIONS[1:]]:
+            c, uniques = pd.factorize(values, use_na_sentinel=False)
+            codes.append(c.astype("int64"))
+            labels.append(uniques)
+        key = np.zeros(n, dtype="int64")
+        for c, u in zip(codes, labels):
+            key = key * max(len(u), 1) + c
+        cells, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+        sums = {}
+        for name, values in (("Debit", debit), ("Credit", credit),
+                             ("Cash_Debit", np.where(cash, debit, 0)), ("Cash_Credit", np.where(cash, credit, 0))):
+            total = np.zeros(len(cells), dtype="int64")
+            np.add.at(total, inverse, values)
+            sums[name] = total
+        index = pd.MultiIndex.from_arrays([u.take(c[first]) for c, u in zip(codes, labels)], names=CUBE_DIMENSIONS)
+        return pd.DataFrame(sums, index=index)[CUBE_MEASURES]
+
+    def update(self, df: pd.DataFrame):
+        """Fold new ledger lines into the cube (only ``df`` is scanned)."""
+        new = self._aggregate(df)
+        if self.cells.empty:
+            self.cells = new
+        elif not new.empty:
+            self.cells = pd.concat([self.cells, new]).groupby(level=CUBE_DIMENSIONS, dropna=False, sort=False).sum()
+        return self
+
+    def rollup(self, freq):
+        """Cube at a coarser period (e.g. "Q" or "Y") built from the existing cells."""
+        if freq == self.freq:
+            return self
+        cells = self.cells.reset_index()
+        cells["Period"] = pd.PeriodIndex(cells["Period"]).asfreq(freq) if len(cells) else cells["Period"]
+        cells = cells.groupby(CUBE_DIMENSIONS, dropna=False, sort=False)[CUBE_MEASURES].sum()
+        return PeriodCube(freq, cells)
+
+    # ---------- Trend statements ----------
+    def _by_category(self, measures):
+        """Category columns × periods (full, gap-free period range), minor units."""
+        if self.cells.empty:
+            return pd.DataFrame()
+        sums = self.cells.groupby(level=["Period", "Category"], dropna=False)[measures].sum()
+        periods = sums.index.get_level_values("Period")
+        full = pd.period_range(periods.min(), periods.max(), freq=periods.min().freq)
+        return sums.unstack("Category", fill_value=0).reindex(full, fill_value=0)
+
+    def _measure(self, wide, measure, category):
+        if wide.empty or (measure, category) not in wide.columns:
+            return np.zeros(len(wide), dtype="int64")
+        return wide[(measure, category)].to_numpy()
+
+    def income_statement_trend(self) -> pd.DataFrame:
+        """Revenue, Expenses and Net Profit per period."""
+        wide = self._by_category(["Debit", "Credit"])
+        revenue = self._measure(wide, "Credit", "Revenue")
+        expenses = self._measure(wide, "Debit", "Expense")
+        return pd.DataFrame({
+            "Period": wide.index.astype(str) if len(wide) else [],
+            "Revenue": from_minor_units(revenue),
+            "Expenses": from_minor_units(expenses),
+            "Net Profit": from_minor_units(revenue - expenses),
+        })
+
+    def balance_sheet_trend(self, opening=(0, 0)) -> pd.DataFrame:
+        """Assets, Liabilities and Equity as of each period end (cumulative).
+
+        ``opening`` is the (assets, liabilities) balance in minor units carried
+        into the first period, e.g. from lines before a date filter.
+        """
+        wide = self._by_category(["Debit", "Credit"])
+        assets = opening[0] + np.cumsum(self._measure(wide, "Debit", "Asset") - self._measure(wide, "Credit", "Asset"))
+        liabilities = opening[1] + np.cumsum(self._measure(wide, "Credit", "Liability")
+                                             - self._measure(wide, "Debit", "Liability"))
+        return pd.DataFrame({
+            "Period": wide.index.astype(str) if len(wide) else [],
+            "Assets": from_minor_units(assets),
+            "Liabilities": from_minor_units(liabilities),
+            "Equity": from_minor_units(assets - liabilities),
+        })
+
+    def cash_flow_trend(self) -> pd.DataFrame:
+        """Cash inflows, outflows and net cash flow per period."""
+        if self.cells.empty:
+            return pd.DataFrame(columns=["Period", "Cash Inflows", "Cash Outflows", "Net Cash Flow"])
+        sums = self.cells.groupby(level="Period")[["Cash_Debit", "Cash_Credit"]].sum()
+        full = pd.period_range(sums.index.min(), sums.index.max(), freq=sums.index.min().freq)
+        sums = sums.reindex(full, fill_value=0)
+        return pd.DataFrame({
+            "Period": sums.index.astype(str),
+            "Cash Inflows": from_minor_units(sums["Cash_Debit"].to_numpy()),
+            "Cash Outflows": from_minor_units(sums["Cash_Credit"].to_numpy()),
+            "Net Cash Flow": from_minor_units((sums["Cash_Debit"] - sums["Cash_Credit"]).to_numpy()),
+        })
@@ -0,0 +1,91 @@
+import pandas as pd
+import pytest
+
+from duplicates import DocumentIndex, find_duplicates
+
+
+def entries(rows):
+    # JE, date, account, debit, credit, vendor, reference
+    return pd.DataFrame(rows, columns=["JE_ID", "Date", "Account", "Debit", "Credit", "Customer_Vendor", "Reference"])
+
+
+LEDGER = entries([
+    ("JE-1", "2025-01-10", "Office Supplies", 120, 0, "Staples", "INV-100"),
+    ("JE-1", "2025-01-10", "Cash", 0, 120, "Staples", "INV-100"),
+    ("JE-2", "2025-01-20", "Rent Expense", 900, 0, "Landlord", "R-1"),
+    ("JE-2", "2025-01-20", "Cash", 0, 900, "Landlord", "R-1"),
+])
+
+
+def test_reupload_is_an_exact_duplicate():
+    again = LEDGER[LEDGER["JE_ID"] == "JE-1"].assign(JE_ID="JE-9")
+    report = find_duplicates(LEDGER, new_entries=again)
+    assert report[["JE_ID_A", "JE_ID_B", "Match_Type", "Score", "Amount_A", "Amount_B"]].to_dict("records") == [
+        {"JE_ID_A": "JE-1", "JE_ID_B": "JE-9", "Match_Type": "Exact", "Score": 1.0, "Amount_A": 120.0, "Amount_B": 120.0},
+    ]
+
+
+def test_same_vendor_and_amount_days_apart_is_a_near_duplicate():
+    retyped = entries([
+        ("JE-9", "2025-01-12", "Office Supplies", 120, 0, "STAPLES", "inv 100"),
+        ("JE-9", "2025-01-12", "Cash", 0, 120, "STAPLES", "inv 100"),
+    ])
+    report = find_duplicates(LEDGER, new_entries=retyped)
+    # amount .35 + vendor .25 + reference .25 + date .15 * (1 - 2/8) = 0.9625
+    assert report[["JE_ID_A", "JE_ID_B", "Match_Type"]].to_dict("records") == [
+        {"JE_ID_A": "JE-1", "JE_ID_B": "JE-9", "Match_Type": "Near"},
+    ]
+    assert report["Score"].tolist() == [pytest.approx(0.9625, abs=0.001)]
+
+
+def test_unrelated_batch_has_no_duplicates():
+    other = entries([
+        ("JE-9", "2025-01-12", "Travel", 75, 0, "Airline", "T-1"),
+        ("JE-9", "2025-01-12", "Cash", 0, 75, "Airline", "T-1"),
+    ])
+    assert find_duplicates(LEDGER, new_entries=other).empty
+
+
+def test_pairs_within_the_ledger_are_reported_without_a_batch():
+    copy = LEDGER[LEDGER["JE_ID"] == "JE-2"].assign(JE_ID="JE-3")
+    report = find_duplicates(pd.concat([LEDGER, copy], ignore_index=True))
+    assert report[["JE_ID_A", "JE_ID_B", "Match_Type"]].to_dict("records") == [
+        {"JE_ID_A": "JE-2", "JE_ID_B": "JE-3", "Match_Type": "Exact"},
+    ]
+
+
+def test_lines_without_je_id_are_documents_of_their_own():
+    ledger = LEDGER.assign(JE_ID=["", None, float("nan"), " "])
+    report = find_duplicates(ledger, new_entries=ledger.iloc[[2]].assign(JE_ID="JE-9"))
+    assert report[["JE_ID_A", "JE_ID_B", "Match_Type", "Amount_A"]].to_dict("records") == [
+        {"JE_ID_A": "Line:2", "JE_ID_B": "JE-9", "Match_Type": "Exact", "Amount_A": 900.0},
+        {"JE_ID_A": "Line:3", "JE_ID_B": "JE-9", "Match_Type": "Near", "Amount_A": 0.0},  # same Reference
+    ]
+
+
+def test_batch_without_je_ids():
+    batch = LEDGER.iloc[[0]].assign(JE_ID=None)
+    report = find_duplicates(LEDGER.iloc[[0, 2]].assign(JE_ID=""), new_entries=batch)
+    assert report[["JE_ID_A", "JE_ID_B", "Match_Type"]].to_dict("records") == [
+        {"JE_ID_A": "Line:0", "JE_ID_B": "Line:0", "Match_Type": "Exact"},
+    ]
+
+
+def test_blocks_use_rounded_amounts_and_date_buckets():
+    retyped = entries([
+        ("JE-9", "2025-01-16", "Office Supplies", 120.40, 0, "Staples", "INV-101"),
+        ("JE-9", "2025-01-16", "Cash", 0, 120.40, "Staples", "INV-101"),
+    ])
+    # Next week's bucket, 6 days and 40 cents apart: amount .35 * .5 + vendor .25 + date .15 * (1 - 6/8)
+    report = DocumentIndex.from_frame(LEDGER).find(retyped)
+    assert report[["JE_ID_A", "JE_ID_B", "Match_Type"]].to_dict("records") == [
+        {"JE_ID_A": "JE-1", "JE_ID_B": "JE-9", "Match_Type": "Near"},
+    ]
+    assert report["Score"].tolist() == [pytest.approx(0.4625, abs=0.001)]
+    assert find_duplicates(LEDGER, new_entries=retyped.assign(Date="2025-01-20")).empty
+
+
+def test_extended_index_matches_a_full_one():
+    index = DocumentIndex.from_frame(LEDGER.iloc[:2]).extend(LEDGER.iloc[2:])
+    again = LEDGER.assign(JE_ID=LEDGER["JE_ID"] + "-copy")
+    pd.testing.assert_frame_equal(index.find(again), find_duplicates(LEDGER, new_entries=again))
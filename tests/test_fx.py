@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from fx import convert_currency
+
+RATES = pd.DataFrame({
+    "Date": ["2025-01-01", "2025-02-01", "2025-01-01"],
+    "From_Currency": ["EUR", "EUR", "USD"],
+    "To_Currency": ["USD", "USD", "GBP"],
+    "Rate": [1.5, 2.0, 0.8],
+})
+
+
+def lines(currencies, dates, debits, credits, je_ids=None):
+    df = pd.DataFrame({"Date": dates, "Debit": debits, "Credit": credits, "Currency": currencies})
+    if je_ids is not None:
+        df["JE_ID"] = je_ids
+    return df
+
+
+def test_latest_rate_on_or_before_each_date():
+    df = lines(["EUR", "eur ", "EUR"], ["2025-01-15", "2025-02-01", "2025-03-10"], [10, 10, 10], [0, 0, 0])
+    out = convert_currency(df, RATES, "USD")
+    assert out["FX_Rate"].tolist() == [1.5, 2.0, 2.0]
+    assert out["Debit"].tolist() == [15.0, 20.0, 20.0]
+    assert out["Debit_Original"].tolist() == [10, 10, 10]
+    assert out["Currency"].tolist() == ["EUR", "EUR", "EUR"]
+
+
+def test_reverse_quote_is_inverted():
+    out = convert_currency(lines(["GBP"], ["2025-01-02"], [8], [0]), RATES, "USD")
+    assert out["FX_Rate"].tolist() == [1.25]
+    assert out["Debit"].tolist() == [10.0]
+
+
+def test_untagged_lines_are_in_the_base_currency():
+    df = lines([None, ""], ["2025-01-02", "2025-01-02"], [10, 0], [0, 10])
+    out = convert_currency(df, RATES, "GBP", default_currency="USD")
+    assert out["Currency"].tolist() == ["USD", "USD"]
+    assert out["Debit"].tolist() == [8.0, 0.0]
+    assert out["Credit"].tolist() == [0.0, 8.0]
+
+
+def test_missing_rate_keeps_amounts():
+    df = lines(["JPY", "EUR"], ["2025-01-02", "2024-12-31"], [1000, 10], [0, 0])
+    out = convert_currency(df, RATES, "USD")
+    assert out["Debit"].tolist() == [1000.0, 10.0]
+    assert np.isnan(out["FX_Rate"]).all()
+
+
+def test_rounding_keeps_journal_entries_balanced():
+    # 0.03 * 1.5 = 0.045 against 0.015 + 0.03; rounding each line alone gives 0.04 vs 0.05
+    df = lines(["EUR"] * 3, ["2025-01-02"] * 3, [0.03, 0, 0], [0, 0.01, 0.02], je_ids=["JE-1"] * 3)
+    out = convert_currency(df, RATES, "USD")
+    assert out["Debit"].tolist() == [0.04, 0.0, 0.0]
+    assert out["Credit"].tolist() == [0.0, 0.01, 0.03]
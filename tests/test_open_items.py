@@ -0,0 +1,69 @@
+import pandas as pd
+import pytest
+
+from open_items import open_items, age_open_items
+
+
+def ar_lines(debits, credits, references, dates=None, je_ids=None, party="Acme"):
+    n = len(debits)
+    df = pd.DataFrame({
+        "Date": pd.to_datetime(dates or [f"2025-01-{i + 1:02d}" for i in range(n)]),
+        "Account": ["Accounts Receivable"] * n,
+        "Debit": debits,
+        "Credit": credits,
+        "Customer_Vendor": [party] * n,
+        "Reference": references,
+    })
+    if je_ids is not None:
+        df["JE_ID"] = je_ids
+    return df
+
+
+def test_reference_match_then_fifo():
+    df = ar_lines([100, 200, 0, 0], [0, 0, 200, 30], ["INV-1", "INV-2", "INV-2", None])
+    items = open_items(df)
+    assert items[["Document", "Amount", "Applied", "Open"]].to_dict("records") == [
+        {"Document": "INV-1", "Amount": 100.0, "Applied": 30.0, "Open": 70.0},
+    ]
+
+
+def test_overpayment_is_unapplied():
+    df = ar_lines([100, 0], [0, 130], ["INV-1", "INV-1"])
+    items = open_items(df)
+    assert items["Document"].tolist() == ["Unapplied"]
+    assert items["Open"].tolist() == [-30.0]
+
+
+def test_no_je_id_and_no_reference_each_line_is_a_document():
+    # Regression: every Reference blank and no JE_ID column used to raise IndexError
+    df = ar_lines([100, 200, 300], [0, 0, 0], [None, "", None])
+    items = open_items(df)
+    assert items["Document"].tolist() == ["Line:0", "Line:1", "Line:2"]
+    assert items["Open"].tolist() == [100.0, 200.0, 300.0]
+
+
+def test_unreferenced_lines_do_not_fold_into_last_reference():
+    # Regression: unreferenced invoices used to collapse into one "INV-1" of 600
+    df = ar_lines([100, 200, 300], [0, 0, 0], ["INV-1", None, None])
+    items = open_items(df)
+    assert items[["Document", "Open"]].to_dict("records") == [
+        {"Document": "INV-1", "Open": 100.0},
+        {"Document": "Line:1", "Open": 200.0},
+        {"Document": "Line:2", "Open": 300.0},
+    ]
+
+
+def test_je_id_used_when_present_line_label_otherwise():
+    df = ar_lines([100, 200, 0], [0, 0, 50], [None, None, None], je_ids=["JE-1", "", "JE-3"])
+    items = open_items(df)
+    assert items[["Document", "Applied", "Open"]].to_dict("records") == [
+        {"Document": "JE:JE-1", "Applied": 50.0, "Open": 50.0},
+        {"Document": "Line:1", "Applied": 0.0, "Open": 200.0},
+    ]
+
+
+def test_aging_buckets():
+    df = ar_lines([100, 200], [0, 0], ["INV-1", "INV-2"], dates=["2025-01-01", "2025-03-15"])
+    aging = age_open_items(open_items(df), as_of="2025-04-01")
+    assert dict(zip(aging["Aging_Bucket"], aging["Amount"])) == pytest.approx(
+        {"0-30": 200.0, "31-60": 0.0, "61-90": 100.0, "91-120": 0.0, "120+": 0.0})
@@ -0,0 +1,87 @@
+import pandas as pd
+
+from accounting_analytics import AccountingAnalytics
+
+STATEMENT = "Bank Statement"
+
+
+def cash_lines(rows):
+    # JE, date, debit, credit, transaction type
+    df = pd.DataFrame(rows, columns=["JE_ID", "Date", "Debit", "Credit", "Transaction_Type"])
+    return df.assign(Account="Cash", Category="Asset")
+
+
+def reconcile(rows, **kwargs):
+    return AccountingAnalytics(cash_lines(rows)).bank_reconciliation(**kwargs)
+
+
+def test_one_to_one_within_the_date_window():
+    result = reconcile([
+        ("S-1", "2025-03-03", 500, 0, STATEMENT),
+        ("S-2", "2025-03-05", 0, 80, STATEMENT),
+        ("B-1", "2025-03-01", 500, 0, "Sale"),
+        ("B-2", "2025-03-05", 0, 80, "Purchase"),
+    ])
+    matched = result["matched"]
+    assert matched[["Match_Type", "Statement_Rows", "Ledger_Rows", "Amount", "Days_Apart"]].to_dict("records") == [
+        {"Match_Type": "One-to-One", "Statement_Rows": [1], "Ledger_Rows": [3], "Amount": -80.0, "Days_Apart": 0},
+        {"Match_Type": "One-to-One", "Statement_Rows": [0], "Ledger_Rows": [2], "Amount": 500.0, "Days_Apart": 2},
+    ]
+    assert result["unmatched_statement"].empty and result["unmatched_ledger"].empty
+
+
+def test_same_day_book_lines_summing_to_one_deposit():
+    result = reconcile([
+        ("S-1", "2025-03-10", 300, 0, STATEMENT),
+        ("B-1", "2025-03-09", 100, 0, "Sale"),
+        ("B-2", "2025-03-09", 200, 0, "Sale"),
+    ])
+    assert result["matched"][["Match_Type", "Statement_Rows", "Ledger_Rows", "Amount"]].to_dict("records") == [
+        {"Match_Type": "Many-to-One", "Statement_Rows": [0], "Ledger_Rows": [1, 2], "Amount": 300.0},
+    ]
+
+
+def test_unmatched_lines_and_suggestions():
+    result = reconcile([
+        ("S-1", "2025-03-01", 250, 0, STATEMENT),
+        ("S-2", "2025-03-02", 99.5, 0, STATEMENT),
+        ("B-1", "2025-03-07", 250, 0, "Sale"),
+        ("B-2", "2025-03-02", 100, 0, "Sale"),
+        ("B-3", "2025-03-20", 40, 0, "Sale"),
+    ], date_window=3)
+    assert result["matched"].empty
+    assert result["unmatched_statement"]["JE_ID"].tolist() == ["S-1", "S-2"]
+    assert result["unmatched_ledger"]["JE_ID"].tolist() == ["B-1", "B-2", "B-3"]
+    assert result["suggested"].to_dict("records") == [
+        {"Statement_Row": 0, "Ledger_Row": 2, "Statement_Amount": 250.0, "Ledger_Amount": 250.0,
+         "Days_Apart": 6, "Reason": "Same amount, date outside window"},
+        {"Statement_Row": 1, "Ledger_Row": 3, "Statement_Amount": 99.5, "Ledger_Amount": 100.0,
+         "Days_Apart": 0, "Reason": "Amount within tolerance"},
+    ]
+
+
+def test_subset_of_a_days_book_lines_matches_a_deposit():
+    # The unrelated 50 keeps the day's total (350) from matching
+    result = reconcile([
+        ("S-1", "2025-03-10", 300, 0, STATEMENT),
+        ("B-1", "2025-03-10", 100, 0, "Sale"),
+        ("B-2", "2025-03-10", 200, 0, "Sale"),
+        ("B-3", "2025-03-10", 50, 0, "Sale"),
+    ])
+    assert result["matched"][["Match_Type", "Statement_Rows", "Ledger_Rows", "Amount"]].to_dict("records") == [
+        {"Match_Type": "Many-to-One", "Statement_Rows": [0], "Ledger_Rows": [1, 2], "Amount": 300.0},
+    ]
+    assert result["unmatched_ledger"]["JE_ID"].tolist() == ["B-3"]
+
+
+def test_group_spanning_days_matches_one_book_line():
+    result = reconcile([
+        ("S-1", "2025-03-10", 0, 40, STATEMENT),
+        ("S-2", "2025-03-11", 0, 35.5, STATEMENT),
+        ("B-1", "2025-03-11", 0, 75.5, "Purchase"),
+    ])
+    assert result["matched"][["Match_Type", "Statement_Rows", "Ledger_Rows", "Amount", "Days_Apart"]].to_dict(
+        "records") == [
+        {"Match_Type": "One-to-Many", "Statement_Rows": [0, 1], "Ledger_Rows": [2], "Amount": -75.5, "Days_Apart": 1},
+    ]
+    assert result["unmatched_statement"].empty and result["unmatched_ledger"].empty
@@ -0,0 +1,80 @@
+import json
+import threading
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import pandas as pd
+
+from db_io import insert_entries, insert_fx_rates
+from report_service import LedgerDocuments, LedgerState, make_handler
+
+
+def sale(je_id, amount, db):
+    assert insert_entries([
+        {"JE_ID": je_id, "Date": "2025-01-10", "Account": "Cash", "Category": "Asset",
+         "Debit": amount, "Credit": 0, "Currency": "EUR"},
+        {"JE_ID": je_id, "Date": "2025-01-10", "Account": "Sales Revenue", "Category": "Revenue",
+         "Debit": 0, "Credit": amount, "Currency": "EUR"},
+    ], db_path=db)
+
+
+def rate(value, db):
+    insert_fx_rates(pd.DataFrame({"Date": ["2025-01-01"], "From_Currency": ["EUR"], "To_Currency": ["USD"],
+                                  "Rate": [value]}), db_path=db)
+
+
+def cash(state):
+    tb = state.analytics.trial_balance()
+    return tb.loc[tb["Account"] == "Cash", "Debit"].item()
+
+
+def test_append_after_fx_change_reconverts_the_whole_ledger(tmp_path):
+    db = str(tmp_path / "ledger.db")
+    sale("JE-1", 100, db)
+    rate(1.0, db)
+    state = LedgerState(db, reporting_currency="USD", warm=())
+    state.refresh()
+    assert cash(state) == 100.0
+
+    rate(2.0, db)
+    sale("JE-2", 10, db)
+    state.refresh()
+    fresh = LedgerState(db, reporting_currency="USD", warm=())
+    fresh.refresh()
+    assert cash(state) == cash(fresh) == 220.0
+    assert state.version == fresh.version
+
+
+def test_drill_down_does_not_keep_a_frame_on_the_ledger(tmp_path):
+    db = str(tmp_path / "ledger.db")
+    sale("JE-1", 100, db)
+    state = LedgerState(db, warm=())
+    state.refresh()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(state))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        body = urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/drill-down").read()
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert [json.loads(line)["Account"] for line in body.splitlines()] == ["Cash", "Sales Revenue"]
+    assert state.analytics._df is None
+
+
+def test_duplicate_index_is_extended_on_append(tmp_path):
+    db = str(tmp_path / "ledger.db")
+    sale("JE-1", 100, db)
+    documents = LedgerDocuments(db)
+    assert documents.find_duplicates(pd.DataFrame([{"JE_ID": "X", "Date": "2025-01-10", "Debit": 5}])).empty
+    first = documents.index
+
+    sale("JE-2", 40, db)
+    again = pd.DataFrame([
+        {"JE_ID": "JE-9", "Date": "2025-01-10", "Account": "Cash", "Debit": 40, "Credit": 0},
+        {"JE_ID": "JE-9", "Date": "2025-01-10", "Account": "Sales Revenue", "Debit": 0, "Credit": 40},
+    ])
+    report = documents.find_duplicates(again)
+    assert len(documents.index) == len(first) + 1 and documents.rows == 4
+    assert report[["JE_ID_A", "JE_ID_B", "Match_Type"]].to_dict("records") == [
+        {"JE_ID_A": "JE-2", "JE_ID_B": "JE-9", "Match_Type": "Exact"},
+    ]
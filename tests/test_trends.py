@@ -0,0 +1,51 @@
+import pandas as pd
+
+from accounting_analytics import AccountingAnalytics
+
+
+def ledger():
+    rows = [
+        # JE, date, account, category, debit, credit
+        ("JE-1", "2025-01-10", "Cash", "Asset", 1000, 0),
+        ("JE-1", "2025-01-10", "Owner's Equity", "Equity", 0, 1000),
+        ("JE-2", "2025-02-05", "Cash", "Asset", 300, 0),
+        ("JE-2", "2025-02-05", "Loan", "Liability", 0, 300),
+        ("JE-3", "2025-03-20", "Rent Expense", "Expense", 200, 0),
+        ("JE-3", "2025-03-20", "Cash", "Asset", 0, 200),
+    ]
+    return pd.DataFrame(rows, columns=["JE_ID", "Date", "Account", "Category", "Debit", "Credit"])
+
+
+def test_balance_sheet_trend_unfiltered():
+    trend = AccountingAnalytics(ledger()).balance_sheet_trend("M")
+    assert trend.to_dict("list") == {
+        "Period": ["2025-01", "2025-02", "2025-03"],
+        "Assets": [1000.0, 1300.0, 1100.0],
+        "Liabilities": [0.0, 300.0, 300.0],
+        "Equity": [1000.0, 1000.0, 800.0],
+    }
+
+
+def test_filtered_balance_sheet_trend_carries_opening_balance():
+    trend = AccountingAnalytics(ledger()).filter(start_date="2025-02-01").balance_sheet_trend("M")
+    assert trend.to_dict("list") == {
+        "Period": ["2025-02", "2025-03"],
+        "Assets": [1300.0, 1100.0],
+        "Liabilities": [300.0, 300.0],
+        "Equity": [1000.0, 800.0],
+    }
+
+
+def test_opening_balance_respects_account_filter():
+    view = AccountingAnalytics(ledger()).filter(accounts=["Cash"]).filter(start_date="2025-03-01")
+    assert view.balance_sheet_trend("M")["Assets"].tolist() == [1100.0]
+
+
+def test_extend_updates_built_cube():
+    analytics = AccountingAnalytics(ledger())
+    analytics.income_statement_trend("M")
+    extra = pd.DataFrame([("JE-4", "2025-04-02", "Cash", "Asset", 50, 0),
+                          ("JE-4", "2025-04-02", "Sales Revenue", "Revenue", 0, 50)],
+                         columns=["JE_ID", "Date", "Account", "Category", "Debit", "Credit"])
+    extended = analytics.extend(extra)
+    assert extended.income_statement_trend("M")["Revenue"].tolist() == [0.0, 0.0, 0.0, 50.0]
@@ -0,0 +1,58 @@
+import pandas as pd
+
+from accounting_analytics import AccountingAnalytics
+
+
+def ledger(rows):
+    # JE, date, account, category, debit, credit
+    return pd.DataFrame(rows, columns=["JE_ID", "Date", "Account", "Category", "Debit", "Credit"])
+
+
+ROWS = [
+    ("JE-1", "2025-01-10", "Cash", "Asset", 1000, 0),
+    ("JE-1", "2025-01-10", "Owner's Equity", "Equity", 0, 1000),
+    ("JE-2", "2025-02-05", "Rent Expense", "Expense", 400, 0),
+    ("JE-2", "2025-02-05", "Cash", "Asset", 0, 400),
+    ("JE-3", "2025-03-15", "Cash", "Asset", 250.75, 0),
+    ("JE-3", "2025-03-15", "Sales Revenue", "Revenue", 0, 250.75),
+]
+
+
+def test_trial_balance_as_of():
+    # Every dated account is listed, with zeros when it has no lines in range
+    tb = AccountingAnalytics(ledger(ROWS)).trial_balance_as_of("2025-02-05")
+    assert tb.to_dict("records") == [
+        {"Account": "Cash", "Debit": 1000.0, "Credit": 400.0, "Balance": 600.0},
+        {"Account": "Owner's Equity", "Debit": 0.0, "Credit": 1000.0, "Balance": -1000.0},
+        {"Account": "Rent Expense", "Debit": 400.0, "Credit": 0.0, "Balance": 400.0},
+        {"Account": "Sales Revenue", "Debit": 0.0, "Credit": 0.0, "Balance": 0.0},
+    ]
+
+
+def test_trial_balance_as_of_with_start_date():
+    tb = AccountingAnalytics(ledger(ROWS)).trial_balance_as_of("2025-03-31", start_date="2025-02-01")
+    assert tb.to_dict("records") == [
+        {"Account": "Cash", "Debit": 250.75, "Credit": 400.0, "Balance": -149.25},
+        {"Account": "Owner's Equity", "Debit": 0.0, "Credit": 0.0, "Balance": 0.0},
+        {"Account": "Rent Expense", "Debit": 400.0, "Credit": 0.0, "Balance": 400.0},
+        {"Account": "Sales Revenue", "Debit": 0.0, "Credit": 250.75, "Balance": -250.75},
+    ]
+
+
+def test_extended_ledger_matches_a_full_build():
+    # Appends land in their own index segments; new accounts get new codes
+    later = [
+        ("JE-4", "2025-01-20", "Supplies", "Expense", 60, 0),
+        ("JE-4", "2025-01-20", "Cash", "Asset", 0, 60),
+        ("JE-5", "2025-03-01", "Loan", "Liability", 0, 500),
+        ("JE-5", "2025-03-01", "Cash", "Asset", 500, 0),
+    ]
+    extended = AccountingAnalytics(ledger(ROWS))
+    for row in range(0, len(later), 2):
+        extended = extended.extend(ledger(later[row:row + 2]))
+    full = AccountingAnalytics(ledger(ROWS + later))
+    for as_of in ("2025-01-31", "2025-03-01", "2025-12-31"):
+        pd.testing.assert_frame_equal(extended.trial_balance_as_of(as_of), full.trial_balance_as_of(as_of))
+    pd.testing.assert_frame_equal(extended.trial_balance(), full.trial_balance())
+    assert extended.filter(start_date="2025-02-01", end_date="2025-03-01").df["JE_ID"].tolist() == \
+        ["JE-2", "JE-2", "JE-5", "JE-5"]
@@ -0,0 +1,77 @@
+import sqlite3
+
+import pandas as pd
+
+from db_io import insert_entries, fetch_exceptions
+from validation import assign_document_ids, validate_entries
+
+
+def lines(**columns):
+    return pd.DataFrame(columns)
+
+
+def test_lines_without_je_id_share_one_generated_id():
+    df = lines(JE_ID=["JE-1", "JE-1", None, "", None], Debit=[10, 0, 5, 0, 0], Credit=[0, 10, 0, 3, 2])
+    ids = assign_document_ids(df)["JE_ID"].tolist()
+    assert ids[:2] == ["JE-1", "JE-1"]
+    assert ids[2] == ids[3] == ids[4] and ids[2].startswith("JE-") and ids[2] != "JE-1"
+
+
+def test_insert_rejects_unbalanced_lines_without_je_id(tmp_path):
+    db = str(tmp_path / "ledger.db")
+    entries = [
+        {"Date": "2025-01-01", "Account": "Cash", "Debit": 100, "Credit": 0, "Category": "Asset"},
+        {"Date": "2025-01-01", "Account": "Sales Revenue", "Debit": 0, "Credit": 90, "Category": "Revenue"},
+    ]
+    assert insert_entries(entries, db_path=db, batch_id="B-1") is False
+    assert fetch_exceptions(db_path=db, batch_id="B-1")["Rule"].tolist() == ["Unbalanced"]
+
+
+def test_insert_stores_lines_without_je_id_as_one_entry(tmp_path):
+    db = str(tmp_path / "ledger.db")
+    entries = [
+        {"Date": "2025-01-01", "Account": "Cash", "Debit": 100, "Credit": 0, "Category": "Asset"},
+        {"Date": "2025-01-01", "Account": "Sales Revenue", "Debit": 0, "Credit": 100, "Category": "Revenue"},
+    ]
+    assert insert_entries(entries, db_path=db) is True
+    conn = sqlite3.connect(db)
+    try:
+        ids = [row[0] for row in conn.execute("SELECT JE_ID FROM journal_entries")]
+    finally:
+        conn.close()
+    assert len(ids) == 2 and len(set(ids)) == 1
+    assert validate_entries(lines(JE_ID=ids, Debit=[100, 0], Credit=[0, 100], Category=["Asset", "Revenue"])).empty
+
+
+def test_validate_entries_reports_each_rule_per_entry():
+    df = lines(
+        JE_ID=["JE-1", "JE-1", "JE-2", "JE-2", "JE-3", "JE-3"],
+        Debit=[100, 0, 50, 0, 20, 0],
+        Credit=[0, 100, 0, 45.5, 0, 20],
+        Category=["Asset", "Revenue", "Asset", "Expense", "Assets", "Revenue"],
+    )
+    df.loc[1, "Credit"] = -100
+    df.loc[0, "Debit"] = -100
+    assert validate_entries(df).to_dict("records") == [
+        {"JE_ID": "JE-2", "Rule": "Unbalanced", "Detail": "Debits 50.00 ≠ Credits 45.50"},
+        {"JE_ID": "JE-3", "Rule": "Invalid Category", "Detail": "Category 'Assets' not in allowed set (1 line(s))"},
+        {"JE_ID": "JE-1", "Rule": "Negative Amount", "Detail": "Negative amount -100.00 (2 line(s))"},
+    ]
+
+
+def test_transactions_upload_keeps_its_je_ids(tmp_path):
+    from db_utils import insert_dataframe_to_db
+
+    db = str(tmp_path / "ledger.db")
+    upload = lines(JE_ID=["JE-1", "JE-1", None, None], Date=["2025-01-01"] * 4,
+                   Account=["Cash", "Sales Revenue", "Rent Expense", "Cash"],
+                   Debit=[100, 0, 40, 0], Credit=[0, 100, 0, 40],
+                   Category=["Asset", "Revenue", "Expense", "Asset"])
+    assert insert_dataframe_to_db(upload, db_path=db) is True
+    conn = sqlite3.connect(db)
+    try:
+        ids = [row[0] for row in conn.execute("SELECT JE_ID FROM transactions ORDER BY id")]
+    finally:
+        conn.close()
+    assert ids[:2] == ["JE-1", "JE-1"]
+    assert ids[2] == ids[3] and ids[2] != "JE-1"
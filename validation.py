@@ -0,0 +1,97 @@
+import uuid
+
+import numpy as np
+import pandas as pd
+
+from compact_ledger import to_minor_units, from_minor_units
+
+ALLOWED_CATEGORIES = ("Asset", "Liability", "Revenue", "Expense", "Equity")
+EXCEPTION_COLUMNS = ["JE_ID", "Rule", "Detail"]
+
+
+def _amounts(df):
+    zeros = np.zeros(len(df), dtype="int64")
+    debit = to_minor_units(df["Debit"]) if "Debit" in df.columns else zeros
+    credit = to_minor_units(df["Credit"]) if "Credit" in df.columns else zeros
+    return debit, credit
+
+
+def line_flags(df: pd.DataFrame):
+    """Per-line boolean masks ``(invalid_category, negative_amount)``."""
+    debit, credit = _amounts(df)
+    if "Category" in df.columns:
+        invalid_category = ~df["Category"].isin(ALLOWED_CATEGORIES).to_numpy()
+    else:
+        invalid_category = np.ones(len(df), dtype=bool)
+    negative = (debit < 0) | (credit < 0)
+    return invalid_category, negative
+
+
+def _journal_ids(df):
+    """JE_ID per line as an object array, None where missing/blank."""
+    if "JE_ID" not in df.columns:
+        return np.full(len(df), None, dtype=object)
+    je = df["JE_ID"].astype(object)
+    return je.where(je.notna() & (je != ""), None).to_numpy(dtype=object)
+
+
+def assign_document_ids(df: pd.DataFrame) -> pd.DataFrame:
+    """``df`` with one generated JE_ID shared by every line that has none.
+
+    A batch is one source document, so its unidentified lines form one journal
+    entry: they are balance-checked together and stored under the same ID
+    instead of as separate one-line entries.
+    """
+    je = _journal_ids(df).copy()
+    missing = pd.isna(je)
+    if not missing.any():
+        return df
+    je[missing] = f"JE-{uuid.uuid4().hex[:8]}"
+    return df.assign(JE_ID=je)
+
+
+def validate_entries(df: pd.DataFrame) -> pd.DataFrame:
+    """Vectorized journal validation, one exception row per (JE_ID, rule).
+
+    Rules:
+    - Unbalanced: sum of Debits != sum of Credits for a JE_ID (exact, in cents;
+      lines without a JE_ID cannot be grouped and are skipped, so ingest paths
+      call ``assign_document_ids`` first)
+    - Invalid Category: Category not in ``ALLOWED_CATEGORIES``
+    - Negative Amount: Debit or Credit below zero
+    """
+    if df.empty:
+        return pd.DataFrame(columns=EXCEPTION_COLUMNS)
+    debit, credit = _amounts(df)
+    je = _journal_ids(df)
+    frames = []
+
+    has_je = pd.notna(je)
+    if has_je.any():
+        sums = (pd.DataFrame({"JE_ID": je[has_je], "Debit": debit[has_je], "Credit": credit[has_je]})
+                .groupby("JE_ID", sort=False)[["Debit", "Credit"]].sum())
+        bad = sums[sums["Debit"] != sums["Credit"]]
+        frames.append(pd.DataFrame({
+            "JE_ID": bad.index.to_numpy(dtype=object),
+            "Rule": "Unbalanced",
+            "Detail": [f"Debits {d:,.2f} ≠ Credits {c:,.2f}" for d, c in
+                       zip(from_minor_units(bad["Debit"].to_numpy()), from_minor_units(bad["Credit"].to_numpy()))],
+        }))
+
+    invalid_category, negative = line_flags(df)
+    categories = df["Category"].to_numpy(dtype=object) if "Category" in df.columns else np.full(len(df), None)
+    for rule, mask, values in (("Invalid Category", invalid_category, categories),
+                               ("Negative Amount", negative, from_minor_units(np.minimum(debit, credit)))):
+        if not mask.any():
+            continue
+        flagged = (pd.DataFrame({"JE_ID": je[mask], "Value": values[mask]})
+                   .groupby("JE_ID", sort=False, dropna=False)["Value"].agg(["first", "size"]))
+        if rule == "Invalid Category":
+            detail = [f"Category {v!r} not in allowed set ({n} line(s))" for v, n in zip(flagged["first"], flagged["size"])]
+        else:
+            detail = [f"Negative amount {v:,.2f} ({n} line(s))" for v, n in zip(flagged["first"], flagged["size"])]
+        frames.append(pd.DataFrame({"JE_ID": flagged.index.to_numpy(dtype=object), "Rule": rule, "Detail": detail}))
+
+    if not frames:
+        return pd.DataFrame(columns=EXCEPTION_COLUMNS)
+    return pd.concat(frames, ignore_index=True)[EXCEPTION_COLUMNS]